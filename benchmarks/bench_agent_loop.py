@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the agent loop offline against the mock backends.
+
+Runs scripted tasks through AgentCode (parse, execute, observe, respond):
+each task reads a file, lists the workspace, then finishes, so it takes two
+model turns and two commands. Tasks run on several agents at once, first
+with the in-process MockBackend and then through GeminiClient and the SDK
+against the local HTTP stand-in. Reports tasks and model turns per second.
+No API calls are made.
+
+Usage:
+    python benchmarks/bench_agent_loop.py [--agents 8] [--tasks 25] [--latency-ms 0] [--tokens-per-second 0]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import Config  # noqa: E402
+from core.agent import AgentCode  # noqa: E402
+from core.llm_backend import create_backend  # noqa: E402
+
+SCRIPT = [
+    "<narration>Reading the entry point for: $request</narration>\n"
+    "<command>[CMD:READ_FILE(\"main.py\")]</command>\n"
+    "<narration>Listing the project</narration>\n"
+    "<command>[CMD:LIST_FILES]</command>",
+    "<narration>Done.</narration>\n<command>[CMD:FINISH]</command><o>Task $turn complete.</o>"
+]
+
+
+async def run_agent(workspace: Path, config: Config, backend: str, tasks: int) -> int:
+    config.llm_backend = backend
+    agent = AgentCode(config, workspace, llm=create_backend(config))
+    await agent.initialize()
+    for task in range(tasks):
+        await agent._process_user_input(f"Explain module {task}")
+    turns = agent.llm.cache_stats.requests
+    await agent.shutdown()
+    return turns
+
+
+async def run(label: str, backend: str, workspace: Path, args):
+    config = Config()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        turns = await asyncio.gather(*(run_agent(workspace, config, backend, args.tasks) for _ in range(args.agents)))
+    elapsed = time.perf_counter() - start
+    tasks = args.agents * args.tasks
+    print(f"{label:<28} {tasks / elapsed:8.1f} tasks/s  {sum(turns) / elapsed:8.1f} turns/s  ({elapsed:.1f} s)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=8)
+    parser.add_argument("--tasks", type=int, default=25, help="tasks per agent")
+    parser.add_argument("--latency-ms", type=int, default=0, help="simulated time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="simulated generation rate (0 = instant)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp)
+        (workspace / "main.py").write_text("def main():\n    print('hello')\n")
+        for i in range(20):
+            (workspace / f"module_{i}.py").write_text(f"VALUE = {i}\n")
+
+        script_path = workspace / ".mock_script.json"
+        script_path.write_text(json.dumps(SCRIPT))
+        os.environ.update({
+            "MOCK_SCRIPT": str(script_path),
+            "MOCK_LATENCY_MS": str(args.latency_ms),
+            "MOCK_TOKENS_PER_SECOND": str(args.tokens_per_second),
+            "CONTEXT_CACHE": "false",
+            "WORKSPACE_WATCH": "false",
+            "GEMINI_PROMPT_CACHE": "false",
+            "GEMINI_HEALTH_CHECK": "false"
+        })
+        print(f"{args.agents} agents x {args.tasks} tasks, {len(SCRIPT)} turns per task\n")
+
+        await run("in-process mock", "mock", workspace, args)
+        await run("HTTP stand-in (real SDK)", "mock-http", workspace, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark project context ingestion on a synthetic workspace.
+
+Compares the old one-file-at-a-time aiofiles loop with the bounded-concurrency
+FileIngestor, and the context builder's cold vs warm cache paths.
+
+Usage:
+    python benchmarks/bench_context_ingest.py [--files 50000] [--concurrency 32]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiofiles
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import Config  # noqa: E402
+from core.context import ProjectContextBuilder  # noqa: E402
+from core.file_ingest import FileIngestor  # noqa: E402
+
+
+def create_workspace(root: Path, file_count: int, files_per_dir: int = 500):
+    """Create a synthetic workspace of small source files."""
+    body = "def handler(value):\n    return value * 2\n" * 20
+    for i in range(file_count):
+        directory = root / f"pkg_{i // files_per_dir:04d}"
+        if i % files_per_dir == 0:
+            directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"module_{i}.py").write_text(f"# module {i}\n{body}")
+
+
+async def serial_read(paths):
+    """The previous ingestion strategy: one awaited aiofiles read per file."""
+    contents = []
+    for path in paths:
+        async with aiofiles.open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            contents.append(await f.read())
+    return contents
+
+
+async def timed(label, coroutine):
+    start = time.perf_counter()
+    result = await coroutine
+    print(f"{label:<40} {time.perf_counter() - start:8.2f} s")
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=50000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp) / "workspace"
+        print(f"Creating {args.files} files in {workspace}...")
+        create_workspace(workspace, args.files)
+
+        paths = sorted(str(p) for p in workspace.rglob("*.py"))
+        jobs = [(p, os.path.getsize(p)) for p in paths]
+
+        await timed("serial aiofiles loop", serial_read(paths))
+        await timed(f"FileIngestor (concurrency={args.concurrency})",
+                    FileIngestor(max_concurrency=args.concurrency).ingest(jobs, str(Path(tmp) / "blobs-threads")))
+        await timed("FileIngestor (forced process pool)",
+                    FileIngestor(max_concurrency=args.concurrency, process_pool_threshold=0).ingest(
+                        jobs, str(Path(tmp) / "blobs-processes")))
+
+        os.environ["CONTEXT_CACHE_DIR"] = str(Path(tmp) / "cache")
+        os.environ["CONTEXT_READ_CONCURRENCY"] = str(args.concurrency)
+        config = Config()
+        await timed("build_context (cold cache)", ProjectContextBuilder(workspace, config).build_context())
+        await timed("build_context (warm cache)", ProjectContextBuilder(workspace, config).build_context())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
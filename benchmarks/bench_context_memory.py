@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark resident memory of the project context on a large synthetic workspace.
+
+Each mode runs in its own subprocess so peak RSS figures are independent:
+
+  strings  the previous approach: every file read into a str, joined into one
+           context string and formatted into the meta-prompt, all kept alive
+           for the session
+  blobs    the context builder's blob-backed ContextDocument, which holds only
+           headers and blob references until a request materializes it
+
+"held" is the RSS while the context sits in the conversation between requests;
+"peak" also covers building one request's text.
+
+Usage:
+    python benchmarks/bench_context_memory.py [--mb 400] [--file-kb 256]
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def create_workspace(root: Path, total_mb: int, file_kb: int):
+    """Create a workspace of text files totalling roughly ``total_mb`` megabytes."""
+    line = "value = compute(alpha, beta, gamma)  # synthetic source line\n"
+    body = line * (file_kb * 1024 // len(line))
+    count = max(1, total_mb * 1024 // file_kb)
+    for i in range(count):
+        directory = root / f"pkg_{i // 200:03d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"module_{i}.py").write_text(f"# module {i}\n{body}")
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_strings(workspace: Path):
+    from config.meta_prompt import META_PROMPT
+
+    parts = []
+    for path in sorted(workspace.rglob("*.py")):
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            parts.append(f"--- File: {path.relative_to(workspace)} ---\n{f.read()}\n")
+    context = "\n".join(parts)
+    prompt = META_PROMPT.format(project_context=context)
+    del parts, context
+    gc.collect()
+    held = current_rss_mb()
+
+    request_text = str(prompt)
+    return held, len(request_text)
+
+
+def run_blobs(workspace: Path):
+    from config.meta_prompt import META_PROMPT
+    from config.settings import Config
+    from core.context import ProjectContextBuilder
+    from core.context_document import ContextDocument
+
+    builder = ProjectContextBuilder(workspace, Config())
+    context = asyncio.run(builder.build_context())
+    prompt = ContextDocument.from_template(META_PROMPT, '{project_context}', context)
+    gc.collect()
+    held = current_rss_mb()
+
+    request_text = prompt.materialize()
+    return held, len(request_text)
+
+
+def child(mode: str, workspace: Path):
+    held, length = (run_strings if mode == "strings" else run_blobs)(workspace)
+    print(f"{mode:<8} held {held:8.1f} MB   peak {peak_rss_mb():8.1f} MB   ({length / 2**20:.0f} MB of text)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=int, default=400)
+    parser.add_argument("--file-kb", type=int, default=256)
+    parser.add_argument("--child", choices=["strings", "blobs"], help=argparse.SUPPRESS)
+    parser.add_argument("--workspace", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, Path(args.workspace))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp) / "workspace"
+        print(f"Creating ~{args.mb} MB of files in {workspace}...")
+        create_workspace(workspace, args.mb, args.file_kb)
+
+        env = dict(os.environ)
+        env["CONTEXT_MAX_TOKENS"] = str(args.mb * 2**20)  # Large enough to include every file
+        env["CONTEXT_CACHE_DIR"] = str(Path(tmp) / "cache")
+        env["WORKSPACE_WATCH"] = "false"
+        for mode in ("strings", "blobs"):
+            result = subprocess.run(
+                [sys.executable, __file__, "--child", mode, "--workspace", str(workspace)],
+                env=env, capture_output=True, text=True
+            )
+            lines = [line for line in result.stdout.splitlines() if line.startswith(mode)]
+            print(lines[-1] if lines else result.stderr.strip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark the columnar FileTable against one WalkEntry object per file.
+
+Builds both representations for a synthetic monorepo-shaped file list (no
+files are created on disk) and reports the memory each holds plus the time
+of the queries the context builder and watcher run on every scan: selecting
+text files and detecting changes between two snapshots.
+
+Usage:
+    python benchmarks/bench_file_table.py [--files 1000000]
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.file_table import FileTable, WalkEntry  # noqa: E402
+
+EXTENSIONS = ['.py', '.ts', '.tsx', '.json', '.md', '.png', '.go', '.css']
+
+
+def synthetic_rows(count: int):
+    """Yield (directory, name, size, mtime_ns, binary) rows in walk order."""
+    for i in range(count):
+        extension = EXTENSIONS[i % len(EXTENSIONS)]
+        directory = f"services/svc_{i // 20000:03d}/src/pkg_{i // 400:05d}/"
+        yield directory, f"module_{i}{extension}", 1000 + i % 50000, 1_700_000_000_000_000_000 + i, extension == '.png'
+
+
+def measure(label: str, build):
+    """Build a structure untraced for its build time, then again under tracemalloc for its memory."""
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<34} {current / 2**20:8.1f} MB  built in {elapsed:6.2f} s")
+    return result
+
+
+def timed(label: str, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<34} {(time.perf_counter() - start) * 1000:8.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1000000)
+    args = parser.parse_args()
+
+    print(f"{args.files} synthetic files\n")
+
+    def build_entries():
+        return [
+            WalkEntry(f"{directory}{name}", size, mtime_ns, binary)
+            for directory, name, size, mtime_ns, binary in synthetic_rows(args.files)
+        ]
+
+    def build_table():
+        table = FileTable()
+        for row in synthetic_rows(args.files):
+            table.append(*row)
+        table.select()  # Freeze into NumPy columns
+        return table
+
+    entries = measure("WalkEntry list", build_entries)
+    table = measure("FileTable", build_table)
+    print()
+
+    timed("text files (list comprehension)", lambda: [entry for entry in entries if not entry.binary])
+    timed("text files (FileTable.select)", lambda: table.select(binary=False))
+
+    # A second snapshot with every 1000th file touched
+    changed = FileTable()
+    for i, (directory, name, size, mtime_ns, binary) in enumerate(synthetic_rows(args.files)):
+        changed.append(directory, name, size, mtime_ns + (i % 1000 == 0), binary)
+    changed_entries = {entry.path: (entry.size, entry.mtime_ns + (i % 1000 == 0)) for i, entry in enumerate(entries)}
+
+    def dict_diff():
+        before = {entry.path: (entry.size, entry.mtime_ns) for entry in entries}
+        return [path for path, stat in changed_entries.items() if before.get(path) != stat]
+
+    timed("change detection (dict snapshot)", dict_diff)
+    created, modified, deleted = timed("change detection (FileTable.diff)", lambda: table.diff(changed))
+    print(f"\n{len(modified)} modified, {len(created)} created, {len(deleted)} deleted")
+
+
+if __name__ == "__main__":
+    main()
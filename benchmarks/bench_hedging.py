@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark hedged requests against a local server with a latency tail.
+
+Starts FakeGeminiServer with a fixed time to first token, stalling a small
+fraction of requests for several seconds, and streams responses from a few
+concurrent GeminiClient sessions through the real SDK: once as is and once
+with hedging, where a request still without a first chunk after the rolling
+p95 is sent again. Reports latency percentiles, the duplicates sent and the
+tail latency the client estimates it saved. No API calls are made.
+
+Usage:
+    python benchmarks/bench_hedging.py [--sessions 4] [--requests 100] [--stall-probability 0.03] [--stall-seconds 5]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import Config  # noqa: E402
+from core.fake_gemini import FakeGeminiServer  # noqa: E402
+from core.gemini_client import GeminiClient  # noqa: E402
+from core.mock_backend import MockScript  # noqa: E402
+
+
+async def session(client: GeminiClient, requests: int, latencies: list):
+    """Stream ``requests`` responses one after another, recording the latency of each."""
+    history = [{'role': 'user', 'content': "Summarize the project layout."}]
+    for _ in range(requests):
+        start = time.perf_counter()
+        await client.generate_response_stream(history)
+        latencies.append(time.perf_counter() - start)
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(label: str, hedging: bool, args):
+    script = MockScript(["<o>Done.</o>"], latency_seconds=args.latency_ms / 1000)
+    with FakeGeminiServer(script, stall_probability=args.stall_probability,
+                          stall_seconds=args.stall_seconds, seed=args.seed) as server:
+        os.environ["GEMINI_BASE_URL"] = server.url
+        os.environ["GEMINI_HEDGING"] = str(hedging).lower()
+        client = GeminiClient(Config())
+        latencies = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            await client.initialize()
+            await asyncio.gather(*(session(client, args.requests, latencies) for _ in range(args.sessions)))
+        sent = sum(server.status_counts.values())
+
+    print(
+        f"{label:<10} p50 {statistics.median(latencies):5.2f}s  p95 {percentile(latencies, 0.95):5.2f}s  "
+        f"p99 {percentile(latencies, 0.99):5.2f}s  max {max(latencies):5.2f}s  "
+        f"total {sum(latencies):6.1f}s  {sent} requests sent"
+    )
+    if client.hedger:
+        print(f"           {client.hedger.stats.describe()}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=100, help="requests per session")
+    parser.add_argument("--latency-ms", type=int, default=200, help="usual time to first token")
+    parser.add_argument("--stall-probability", type=float, default=0.03)
+    parser.add_argument("--stall-seconds", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ["GEMINI_PROMPT_CACHE"] = "false"
+    print(
+        f"{args.sessions} sessions x {args.requests} requests, {args.latency_ms} ms to first token, "
+        f"{args.stall_probability:.0%} stalled for {args.stall_seconds:.0f}s\n"
+    )
+
+    await run("unhedged", False, args)
+    await run("hedged", True, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark prompt-prefix caching against the local fake Gemini backend.
+
+Runs a multi-turn conversation with a large system prompt (meta-prompt plus a
+synthetic project context) through GeminiClient, once with the prefix
+registered as cached content and once sending it inline, and reports the
+share of prompt tokens served from a cache plus the simulated prefill time of
+the uncached tokens. No API calls are made.
+
+Usage:
+    python benchmarks/bench_prompt_cache.py [--context-kb 200] [--turns 10]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.meta_prompt import META_PROMPT  # noqa: E402
+from config.settings import Config  # noqa: E402
+from core.fake_gemini import FakeGeminiClient  # noqa: E402
+from core.gemini_client import GeminiClient  # noqa: E402
+from core.history import ConversationHistory  # noqa: E402
+
+# Roughly the prefill rate of a hosted model, applied to uncached tokens only
+PREFILL_SECONDS_PER_1K_TOKENS = 0.002
+
+
+async def run(prompt_cache: bool, context: str, turns: int):
+    os.environ["GEMINI_PROMPT_CACHE"] = "true" if prompt_cache else "false"
+    fake = FakeGeminiClient(prefill_seconds_per_1k_tokens=PREFILL_SECONDS_PER_1K_TOKENS)
+    client = GeminiClient(Config(), client=fake)
+    history = ConversationHistory(max_total_chars=len(context) * 2)
+    history.add_system_message("System initialized", META_PROMPT.replace('{project_context}', context))
+
+    start = time.perf_counter()
+    for turn in range(turns):
+        history.add_user_message(f"Request {turn}: explain module_{turn}.py")
+        response = await client.generate_response(history.get_conversation_for_api())
+        history.add_assistant_response(response['thoughts'], response['final_text'])
+    elapsed = time.perf_counter() - start
+    await client.close()
+
+    label = "explicit prefix cache" if prompt_cache else "inline prefix (implicit only)"
+    print(f"{label:<32} {client.cache_stats.hit_rate:6.1%} cached  {elapsed * 1000:8.0f} ms simulated")
+    print(f"  {client.cache_stats.describe()}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--context-kb", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=10)
+    args = parser.parse_args()
+
+    block = "--- File: src/module.py ---\ndef handler(value):\n    return value * 2\n\n"
+    context = "=== PROJECT CONTEXT ===\n" + block * (args.context_kb * 1024 // len(block))
+
+    await run(True, context, args.turns)
+    await run(False, context, args.turns)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
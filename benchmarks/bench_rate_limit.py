@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark a burst of concurrent sessions against a rate-limited local server.
+
+Starts FakeGeminiServer with a requests-per-minute limit and sends a burst
+from several concurrent GeminiClient sessions through the real SDK, once
+relying only on retries (429 hints and backoff) and once with the client-side
+token bucket set to the server's limit. Reports completed and failed
+requests, the 429s the server sent and the total time. No API calls are made.
+
+Usage:
+    python benchmarks/bench_rate_limit.py [--rpm 120] [--sessions 10] [--requests 15]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import Config  # noqa: E402
+from core.fake_gemini import FakeGeminiServer  # noqa: E402
+from core.gemini_client import GeminiClient  # noqa: E402
+
+
+async def session(config: Config, requests: int) -> int:
+    """Send ``requests`` requests one after another; returns how many succeeded."""
+    client = GeminiClient(config)
+    history = [{'role': 'user', 'content': "Summarize the project layout."}]
+    succeeded = 0
+    for _ in range(requests):
+        if await client.generate_response(history):
+            succeeded += 1
+    return succeeded
+
+
+async def run(label: str, client_rpm: int, args):
+    with FakeGeminiServer(requests_per_minute=args.rpm) as server:
+        os.environ["GEMINI_BASE_URL"] = server.url
+        os.environ["GEMINI_REQUESTS_PER_MINUTE"] = str(client_rpm)
+        config = Config()
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # Retry warnings
+            results = await asyncio.gather(*(session(config, args.requests) for _ in range(args.sessions)))
+        elapsed = time.perf_counter() - start
+
+    total = args.sessions * args.requests
+    print(
+        f"{label:<28} {sum(results):4d}/{total} ok  {server.status_counts.get(429, 0):4d} x 429  "
+        f"{elapsed:6.1f} s"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpm", type=int, default=120, help="server limit in requests per minute")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=15, help="requests per session")
+    args = parser.parse_args()
+
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ["GEMINI_PROMPT_CACHE"] = "false"
+    print(f"{args.sessions} sessions x {args.requests} requests against a {args.rpm} rpm limit\n")
+
+    await run("retries only", 0, args)
+    await run("client token bucket", args.rpm, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
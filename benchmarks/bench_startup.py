@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark time-to-first-prompt on a synthetic workspace.
+
+Compares the quick context that startup now waits for (a shallow tree plus
+small key files) with the full context build that used to block the first
+prompt and now runs in the background. Then measures AgentCode.initialize,
+which sets up the Gemini client concurrently with the quick context, against
+the previous sequence: client setup, a generation round trip to test the
+connection (--round-trip-ms, simulated), then the quick context. No API calls
+are made.
+
+Usage:
+    python benchmarks/bench_startup.py [--files 50000] [--round-trip-ms 1500]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import google.genai as genai  # noqa: E402
+
+from config.settings import Config  # noqa: E402
+from core.agent import AgentCode  # noqa: E402
+from core.context import ProjectContextBuilder  # noqa: E402
+
+
+def create_workspace(root: Path, file_count: int, files_per_dir: int = 500):
+    """Create a synthetic workspace of small source files under a few key files."""
+    body = "def handler(value):\n    return value * 2\n" * 20
+    for i in range(file_count):
+        directory = root / "src" / f"pkg_{i // files_per_dir:04d}"
+        if i % files_per_dir == 0:
+            directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"module_{i}.py").write_text(f"# module {i}\n{body}")
+    (root / "README.md").write_text("# Synthetic project\n\nUsed to benchmark startup.\n")
+    (root / "pyproject.toml").write_text("[project]\nname = \"synthetic\"\nversion = \"0.1.0\"\n")
+    (root / "main.py").write_text("from src import app\n\napp.run()\n")
+
+
+async def timed(label: str, coro, extra_ms: float = 0):
+    start = time.perf_counter()
+    await coro
+    elapsed = (time.perf_counter() - start) * 1000 + extra_ms
+    print(f"{label:<44} {elapsed:10.0f} ms")
+
+
+async def sequential_startup(workspace: Path, config: Config):
+    """The previous order: client, connection test (added by the caller), then the quick context."""
+    genai.Client(api_key=config.gemini_api_key)
+    await ProjectContextBuilder(workspace, config).build_quick_context()
+
+
+async def agent_startup(workspace: Path, config: Config):
+    agent = AgentCode(config, workspace)
+    await agent.initialize()
+    await agent.shutdown()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=50000)
+    parser.add_argument("--round-trip-ms", type=float, default=1500,
+                        help="assumed latency of the generation request the connection test made")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp) / "workspace"
+        print(f"Creating {args.files} files in {workspace}...")
+        create_workspace(workspace, args.files)
+
+        os.environ["CONTEXT_CACHE_DIR"] = str(Path(tmp) / "cache")
+        os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+        os.environ["GEMINI_HEALTH_CHECK"] = "false"  # It runs in the background and would need the network
+        os.environ["WORKSPACE_WATCH"] = "false"
+        config = Config()
+
+        await timed("first prompt: quick context", ProjectContextBuilder(workspace, config).build_quick_context())
+        await timed("background: full context (cold cache)", ProjectContextBuilder(workspace, config).build_context())
+        await timed("background: full context (warm cache)", ProjectContextBuilder(workspace, config).build_context())
+        genai.Client(api_key=config.gemini_api_key)  # Warm up so neither run pays first-use costs
+        print()
+        await timed(f"previous startup (+{args.round_trip_ms:.0f} ms connection test)",
+                    sequential_startup(workspace, config), extra_ms=args.round_trip_ms)
+        await timed("agent startup (client and context concurrent)", agent_startup(workspace, config))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -18,20 +18,111 @@ class Config:
     """Configuration class for Agent Code."""
     
     gemini_api_key: Optional[str] = None
+    llm_backend: str = "gemini"
+    mock_script: Optional[str] = None
+    mock_latency_ms: int = 0
+    mock_tokens_per_second: float = 0.0
+    response_cache: str = "off"
+    response_cache_dir: Optional[str] = None
+    response_cache_max_mb: int = 256
     debug_raw_content: bool = False
+    gemini_streaming: bool = True
+    gemini_health_check: bool = True
+    gemini_base_url: Optional[str] = None
+    gemini_max_attempts: int = 5
+    gemini_retry_base_delay: float = 1.0
+    gemini_retry_max_delay: float = 60.0
+    gemini_requests_per_minute: int = 0
+    gemini_tokens_per_minute: int = 0
+    gemini_max_input_tokens: int = 1048576
+    gemini_hedging: bool = False
+    gemini_hedge_max_rate: float = 0.05
+    token_report: bool = True
+    gemini_prompt_cache: bool = True
+    gemini_prompt_cache_ttl: int = 3600
+    context_cache_enabled: bool = True
+    context_cache_dir: Optional[str] = None
+    context_read_concurrency: int = 32
+    context_max_tokens: int = 100000
+    context_respect_gitignore: bool = True
+    context_use_git_index: bool = False
+    context_mode: str = "full"
+    context_map_max_tokens: int = 8000
+    context_retrieval: bool = True
+    context_retrieval_top_k: int = 8
+    context_compaction: bool = True
+    context_delta_max_chars: int = 8000
+    context_summaries: bool = True
+    context_summary_concurrency: int = 4
+    context_summary_max_files: int = 50
+    workspace_watch: bool = True
+    workspace_watch_debounce_ms: int = 200
     
     def __post_init__(self):
         """Load configuration from environment variables."""
         self.gemini_api_key = os.getenv("GEMINI_API_KEY")
+        self.llm_backend = os.getenv("LLM_BACKEND", "gemini").lower()
+        self.mock_script = os.getenv("MOCK_SCRIPT") or None
+        self.mock_latency_ms = int(os.getenv("MOCK_LATENCY_MS", "0"))
+        self.mock_tokens_per_second = float(os.getenv("MOCK_TOKENS_PER_SECOND", "0"))
+        self.response_cache = os.getenv("RESPONSE_CACHE", "off").lower()
+        self.response_cache_dir = os.getenv("RESPONSE_CACHE_DIR") or None
+        self.response_cache_max_mb = int(os.getenv("RESPONSE_CACHE_MAX_MB", "256"))
         self.debug_raw_content = os.getenv("DEBUG_RAW_CONTENT", "false").lower() in ("true", "1", "yes", "on")
+        self.gemini_streaming = os.getenv("GEMINI_STREAMING", "true").lower() in ("true", "1", "yes", "on")
+        self.gemini_health_check = os.getenv("GEMINI_HEALTH_CHECK", "true").lower() in ("true", "1", "yes", "on")
+        self.gemini_base_url = os.getenv("GEMINI_BASE_URL") or None
+        self.gemini_max_attempts = int(os.getenv("GEMINI_MAX_ATTEMPTS", "5"))
+        self.gemini_retry_base_delay = float(os.getenv("GEMINI_RETRY_BASE_DELAY", "1.0"))
+        self.gemini_retry_max_delay = float(os.getenv("GEMINI_RETRY_MAX_DELAY", "60"))
+        self.gemini_requests_per_minute = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "0"))
+        self.gemini_tokens_per_minute = int(os.getenv("GEMINI_TOKENS_PER_MINUTE", "0"))
+        self.gemini_max_input_tokens = int(os.getenv("GEMINI_MAX_INPUT_TOKENS", "1048576"))
+        self.gemini_hedging = os.getenv("GEMINI_HEDGING", "false").lower() in ("true", "1", "yes", "on")
+        self.gemini_hedge_max_rate = float(os.getenv("GEMINI_HEDGE_MAX_RATE", "0.05"))
+        self.token_report = os.getenv("TOKEN_REPORT", "true").lower() in ("true", "1", "yes", "on")
+        self.gemini_prompt_cache = os.getenv("GEMINI_PROMPT_CACHE", "true").lower() in ("true", "1", "yes", "on")
+        self.gemini_prompt_cache_ttl = int(os.getenv("GEMINI_PROMPT_CACHE_TTL", "3600"))
+        self.context_cache_enabled = os.getenv("CONTEXT_CACHE", "true").lower() in ("true", "1", "yes", "on")
+        self.context_cache_dir = os.getenv("CONTEXT_CACHE_DIR") or None
+        self.context_read_concurrency = int(os.getenv("CONTEXT_READ_CONCURRENCY", "32"))
+        self.context_max_tokens = int(os.getenv("CONTEXT_MAX_TOKENS", "100000"))
+        self.context_respect_gitignore = os.getenv("CONTEXT_GITIGNORE", "true").lower() in ("true", "1", "yes", "on")
+        self.context_use_git_index = os.getenv("CONTEXT_GIT_INDEX", "false").lower() in ("true", "1", "yes", "on")
+        self.context_mode = os.getenv("CONTEXT_MODE", "full").lower()
+        self.context_map_max_tokens = int(os.getenv("CONTEXT_MAP_MAX_TOKENS", "8000"))
+        self.context_retrieval = os.getenv("CONTEXT_RETRIEVAL", "true").lower() in ("true", "1", "yes", "on")
+        self.context_retrieval_top_k = int(os.getenv("CONTEXT_RETRIEVAL_TOP_K", "8"))
+        self.context_compaction = os.getenv("CONTEXT_COMPACTION", "true").lower() in ("true", "1", "yes", "on")
+        self.context_delta_max_chars = int(os.getenv("CONTEXT_DELTA_MAX_CHARS", "8000"))
+        self.context_summaries = os.getenv("CONTEXT_SUMMARIES", "true").lower() in ("true", "1", "yes", "on")
+        self.context_summary_concurrency = int(os.getenv("CONTEXT_SUMMARY_CONCURRENCY", "4"))
+        self.context_summary_max_files = int(os.getenv("CONTEXT_SUMMARY_MAX_FILES", "50"))
+        self.workspace_watch = os.getenv("WORKSPACE_WATCH", "true").lower() in ("true", "1", "yes", "on")
+        self.workspace_watch_debounce_ms = int(os.getenv("WORKSPACE_WATCH_DEBOUNCE_MS", "200"))
     
     def validate(self) -> bool:
         """Validate that all required configuration is present."""
         missing = []
         
-        if not self.gemini_api_key:
+        if self.llm_backend not in ("gemini", "mock", "mock-http"):
+            console.print(f"[red]Invalid LLM_BACKEND '{self.llm_backend}' (expected 'gemini', 'mock' or 'mock-http')[/red]")
+            return False
+        
+        if self.response_cache not in ("off", "record", "replay", "read-through"):
+            console.print(
+                f"[red]Invalid RESPONSE_CACHE '{self.response_cache}' "
+                "(expected 'off', 'record', 'replay' or 'read-through')[/red]"
+            )
+            return False
+        
+        if not self.gemini_api_key and self.llm_backend == "gemini" and self.response_cache != "replay":
             missing.append("GEMINI_API_KEY")
         
+        if self.context_mode not in ("full", "map"):
+            console.print(f"[red]Invalid CONTEXT_MODE '{self.context_mode}' (expected 'full' or 'map')[/red]")
+            return False
+        
         if missing:
             console.print("[red]Missing required environment variables:[/red]")
             for var in missing:
@@ -1,8 +1,10 @@
 """Main Agent Code class."""
 
 import asyncio
+import threading
+import time
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from rich.console import Console
 from rich.prompt import Prompt
@@ -10,11 +12,14 @@ from rich.prompt import Prompt
 from config.settings import Config
 from config.meta_prompt import META_PROMPT
 from core.context import ProjectContextBuilder
-from core.gemini_client import GeminiClient
+from core.context_document import ContextDocument
+from core.llm_backend import LLMBackend, create_backend
 from core.history import ConversationHistory
+from core.token_accounting import TokenUsage
 from core.parser import ThoughtExtractor
 from core.command_executor import CommandExecutor
-from core.command_parser import CommandParser
+from core.command_parser import CommandParser, StreamingResponseParser
+from core.workspace_delta import WorkspaceDelta
 from ui.display import display_info, display_error, display_thoughts, display_action, display_observation, display_warning
 
 console = Console()
@@ -34,43 +39,126 @@ def _print_formatted(text: str, config: Config = None):
 class AgentCode:
     """The main Agent Code class that handles AI interactions and command execution."""
     
-    def __init__(self, config: Config, working_directory: Path):
-        """Initialize the agent with configuration and working directory."""
+    def __init__(self, config: Config, working_directory: Path, llm: Optional[LLMBackend] = None):
+        """Initialize the agent with configuration and working directory.
+        
+        ``llm`` is the model backend; by default the one selected by LLM_BACKEND.
+        """
         self.config = config
         self.working_directory = working_directory
-        self.context_builder = ProjectContextBuilder(working_directory)
-        self.gemini_client = GeminiClient(config)
-        self.conversation_history = ConversationHistory()
+        self.context_builder = ProjectContextBuilder(working_directory, config)
+        self.llm = llm or create_backend(config, working_directory)
+        # The project context travels in the system message, outside the history's char budget;
+        # the rest of the conversation gets a budget of the same size
+        self.conversation_history = ConversationHistory(max_total_chars=self.context_builder.packer.max_chars)
         self.thought_extractor = ThoughtExtractor()
-        self.command_executor = CommandExecutor(str(working_directory))
+        self.command_executor = CommandExecutor(str(working_directory), self.context_builder)
         self.command_parser = CommandParser()
+        self.workspace_delta = None
+        if config.context_delta_max_chars > 0:
+            self.workspace_delta = WorkspaceDelta(self.context_builder, max_chars=config.context_delta_max_chars)
         self.project_context = ""
+        self.context_version = 0
+        self.task_usage = TokenUsage()  # Reported token usage of the current request
+        
+        # Startup runs in two phases; the heavy one continues after the first prompt is shown
+        self.created_at = time.perf_counter()
+        self.time_to_first_prompt_ms: Optional[float] = None
+        self.background_startup: Optional[asyncio.Task] = None
+        self.health_check: Optional[asyncio.Task] = None
         
         display_info(f"Agent initialized with workspace: {working_directory}")
     
     async def initialize(self):
         """Initialize the agent components."""
         try:
-            # Test Gemini connection
-            display_info("Testing Gemini API connection...")
-            if not await self.gemini_client.test_connection():
+            # Phase one: client setup alongside a shallow tree and the key files, enough to start the
+            # conversation; the API itself is first contacted by the health check or the first request
+            display_info("Building quick project context...")
+            client_ready, self.project_context = await asyncio.gather(
+                self.llm.initialize(),
+                self.context_builder.build_quick_context()
+            )
+            if not client_ready:
                 return False
-            
-            # Build project context
-            display_info("Building project context...")
-            self.project_context = await self.context_builder.build_context()
+            if self.config.gemini_health_check:
+                self.health_check = asyncio.create_task(self.llm.health_check())
             
             # Initialize conversation with meta-prompt
-            meta_prompt_with_context = META_PROMPT.format(project_context=self.project_context)
+            meta_prompt_with_context = ContextDocument.from_template(META_PROMPT, '{project_context}', self.project_context)
             self.conversation_history.add_system_message("System initialized", meta_prompt_with_context)
+            self.context_version = self.context_builder.version
             
-            display_info("Agent initialization complete!")
+            # Phase two: full contents, indexes, watcher and summaries, picked up by a later request
+            self.background_startup = asyncio.create_task(self._finish_startup())
+            
+            self.time_to_first_prompt_ms = (time.perf_counter() - self.created_at) * 1000
+            display_info(
+                f"Agent initialization complete in {self.time_to_first_prompt_ms:.0f} ms "
+                "(project indexing continues in the background)"
+            )
             return True
             
         except Exception as e:
             display_error(f"Failed to initialize agent: {e}")
             return False
     
+    async def _finish_startup(self):
+        """Build the full project context, then keep it current and summarize what did not fit."""
+        try:
+            await self.context_builder.build_context()
+            
+            # Keep the context current as files change
+            if self.config.workspace_watch:
+                await self.context_builder.start_watching(self.config.workspace_watch_debounce_ms / 1000)
+            
+            # Summarize large files that did not fit while the user types
+            if self.context_builder.use_summaries:
+                self.context_builder.start_summarizing(self.llm.summarize_file)
+        except Exception as e:
+            display_error(f"Background project indexing failed: {e}")
+    
+    async def shutdown(self):
+        """Stop background startup work, summarization and the watcher, and release the cached prompt prefix."""
+        for task in (self.background_startup, self.health_check):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        await self.context_builder.stop_summarizing()
+        await self.context_builder.stop_watching()
+        await self.llm.close()
+    
+    async def _refresh_project_context(self):
+        """Swap in the latest project context if the workspace changed since it was sent."""
+        await self.context_builder.sync()
+        if self.context_builder.version == self.context_version:
+            return
+        
+        self.project_context = self.context_builder.context
+        self.context_version = self.context_builder.version
+        meta_prompt_with_context = ContextDocument.from_template(META_PROMPT, '{project_context}', self.project_context)
+        self.conversation_history.add_system_message("Project context refreshed", meta_prompt_with_context)
+    
+    async def _ask_user(self) -> str:
+        """Read the next prompt on a daemon thread so background startup keeps running while the user types."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        def read():
+            try:
+                result = Prompt.ask("\n[bold cyan]USER >[/bold cyan]")
+            except BaseException as e:  # EOF at the terminal
+                loop.call_soon_threadsafe(lambda error=e: future.done() or future.set_exception(error))
+            else:
+                loop.call_soon_threadsafe(lambda: future.done() or future.set_result(result))
+        
+        # A daemon thread, unlike the default executor, never holds up exit while blocked on input
+        threading.Thread(target=read, name="prompt", daemon=True).start()
+        return await future
+    
     async def run(self):
         """Main interaction loop for the agent."""
         # Initialize the agent
@@ -83,7 +171,7 @@ class AgentCode:
         while True:
             try:
                 # Get user input
-                user_input = Prompt.ask("\n[bold cyan]USER >[/bold cyan]")
+                user_input = await self._ask_user()
                 
                 if user_input.lower() in ['quit', 'exit', 'q']:
                     if self.config.debug_raw_content:
@@ -98,7 +186,7 @@ class AgentCode:
                 # Process the user input
                 await self._process_user_input(user_input)
                 
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, asyncio.CancelledError):
                 if self.config.debug_raw_content:
                     print("\n👋 Goodbye!")
                 else:
@@ -106,12 +194,101 @@ class AgentCode:
                 break
             except Exception as e:
                 display_error(f"Error during interaction: {e}")
+        
+        await self.shutdown()
+    
+    def _print_narration(self, narration: str):
+        """Print one narration from the AI response."""
+        if self.config.debug_raw_content:
+            print(f"\nAgent: {narration}")
+        else:
+            console.print(f"\n[dim]Agent: {narration}[/dim]")
+    
+    async def _generate_response(self, eager: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Get the next AI response, streaming it when enabled.
+        
+        While streaming, narrations are printed as soon as they are complete
+        and read-only commands are started as soon as their tags are; each
+        started command is appended to ``eager`` with its task. The response's
+        ``narrations_shown`` counts the narrations already printed.
+        """
+        prompt_sources = self._fit_input_limit()
+        if prompt_sources is None:
+            return None
+        conversation = self.conversation_history.get_conversation_for_api()
+        if not self.config.gemini_streaming:
+            return self._report_usage(await self.llm.generate_response(conversation), prompt_sources)
+        
+        stream = StreamingResponseParser(self.command_parser)
+        
+        def on_text(delta: str):
+            for kind, value in stream.feed(delta):
+                if kind == 'narration':
+                    self._print_narration(value)
+                else:
+                    value['task'] = asyncio.create_task(
+                        self.command_executor.execute_command(value['type'], value['args'])
+                    )
+                    eager.append(value)
+        
+        response_data = await self.llm.generate_response_stream(conversation, on_text=on_text)
+        if response_data:
+            response_data['narrations_shown'] = stream.narrations_shown
+        return self._report_usage(response_data, prompt_sources)
+    
+    def _fit_input_limit(self) -> Optional[Dict[str, int]]:
+        """Check the request against the model's input limit before sending it.
+        
+        If it is estimated to be too large the oldest messages are dropped;
+        if it still is, the request is refused and None returned. Otherwise
+        returns the estimated prompt tokens by message type.
+        """
+        limit = self.config.gemini_max_input_tokens
+        prompt_sources = self.conversation_history.estimate_tokens_by_type()
+        estimated = sum(prompt_sources.values())
+        if not limit or estimated <= limit:
+            return prompt_sources
+        
+        dropped = self.conversation_history.trim_to_tokens(limit)
+        prompt_sources = self.conversation_history.estimate_tokens_by_type()
+        if sum(prompt_sources.values()) > limit:
+            display_error(
+                f"Request of about {sum(prompt_sources.values()):,} tokens exceeds the input limit of "
+                f"{limit:,} tokens even without earlier messages; not sending it"
+            )
+            return None
+        display_warning(
+            f"Request of about {estimated:,} tokens exceeded the input limit of {limit:,} tokens; "
+            f"dropped the {dropped} oldest messages"
+        )
+        return prompt_sources
+    
+    def _report_usage(self, response_data: Optional[Dict[str, Any]], prompt_sources: Dict[str, int]) -> Optional[Dict[str, Any]]:
+        """Add a response's reported token usage to the request's total and show it per source."""
+        usage = response_data.get('usage') if response_data else None
+        if usage is not None:
+            self.task_usage.add(usage)
+            if self.config.token_report:
+                display_info(f"Turn tokens: {usage.describe(prompt_sources)}")
+        return response_data
+    
+    async def _discard_eager(self, eager: List[Dict[str, Any]]):
+        """Cancel started commands whose results were not used."""
+        for command in eager:
+            command['task'].cancel()
+        await asyncio.gather(*(command['task'] for command in eager), return_exceptions=True)
+        eager.clear()
     
     async def _process_user_input(self, user_input: str):
         """Process a user input through the AI agent with continuous task execution."""
         try:
+            self.task_usage = TokenUsage()
+            
+            # Attach the most relevant file excerpts when the workspace is too large to send in full
+            excerpts = await self.context_builder.retrieve(user_input)
+            
             # Add user message to history
-            self.conversation_history.add_user_message(user_input)
+            self.conversation_history.add_user_message(f"{user_input}\n\n{excerpts}" if excerpts else user_input)
             
             # Start task execution loop - continues until FINISH command or max iterations
             max_iterations = 10  # Prevent infinite loops
@@ -119,24 +296,28 @@ class AgentCode:
             task_completed = False
             total_commands = 0
             max_commands = 20
+            eager = []  # Read-only commands started while their response was streaming
             
             while not task_completed and iteration < max_iterations and total_commands < max_commands:
                 iteration += 1
+                await self._discard_eager(eager)
+                
+                # Pick up changes made outside the agent; changes made by this request's commands
+                # are reported as deltas so the system message stays the same between iterations
+                if iteration == 1 or self.workspace_delta is None:
+                    await self._refresh_project_context()
                 
                 # Get AI response
                 display_info("🤔 Agent is thinking...")
-                response_data = await self.gemini_client.generate_response(
-                    self.conversation_history.get_conversation_for_api(),
-                )
+                response_data = await self._generate_response(eager)
                 
                 if not response_data:
                     display_error("Failed to get response from AI. Trying simplified approach...")
+                    await self._discard_eager(eager)
                     # Try with a simpler prompt to recover
                     simple_prompt = f"Continue working on: {user_input}. What should be the next step?"
                     self.conversation_history.add_user_message(simple_prompt)
-                    response_data = await self.gemini_client.generate_response(
-                        self.conversation_history.get_conversation_for_api(),
-                    )
+                    response_data = await self._generate_response(eager)
                     if not response_data:
                         display_error("Unable to get AI response after retry. Ending task.")
                         break
@@ -162,12 +343,9 @@ class AgentCode:
                         display_error(f"  - {error}")
                     break
 
-                # Display narrations if present
-                for i, narration in enumerate(parsed_response['narrations']):
-                    if self.config.debug_raw_content:
-                        print(f"\nAgent: {narration}")
-                    else:
-                        console.print(f"\n[dim]Agent: {narration}[/dim]")
+                # Display narrations not already shown while streaming
+                for narration in parsed_response['narrations'][response_data.get('narrations_shown', 0):]:
+                    self._print_narration(narration)
                 
                 # Check if AI response has commands
                 if not parsed_response['commands']:
@@ -207,14 +385,24 @@ class AgentCode:
                 # Execute commands
                 observations = []
                 
+                # Snapshot the workspace when a command may change it
+                before = None
+                if self.workspace_delta and any(
+                    command['type'] in ('WRITE_FILE', 'TERMINAL_COMMAND') for command in parsed_response['commands']
+                ):
+                    before = await self.workspace_delta.snapshot()
+                
                 for i, command in enumerate(parsed_response['commands']):
                     display_action(i + 1, "", f"[CMD:{command['type']}]")
                     
-                    # Execute the command
-                    result = await self.command_executor.execute_command(
-                        command['type'], 
-                        command['args']
-                    )
+                    # Use the result of a command started while streaming, or execute it now
+                    if i < len(eager) and (eager[i]['type'], eager[i]['args']) == (command['type'], command['args']):
+                        result = await eager[i]['task']
+                    else:
+                        result = await self.command_executor.execute_command(
+                            command['type'], 
+                            command['args']
+                        )
                     
                     if result['success']:
                         # Format observation based on command type for better readability
@@ -228,6 +416,8 @@ class AgentCode:
                             observation = f"[Command {i+1} - {command['type']}]: Successfully wrote {result.get('size', 0)} characters to '{command['args'][0]}'"
                         elif command['type'] == 'TERMINAL_COMMAND':
                             observation = f"[Command {i+1} - {command['type']}]: Executed '{command['args'][0]}'\n\nOutput:\n{result['output']}"
+                        elif command['type'] == 'SEARCH':
+                            observation = f"[Command {i+1} - {command['type']}]: Searched for '{command['args'][0]}'\n\n{result['output']}"
                         else:
                             observation = f"[Command {i+1} - {command['type']}]: {result['output']}"
                     else:
@@ -245,6 +435,12 @@ class AgentCode:
                             console.print(f"\n[green]🏁 FINISH command received - Task completion signaled[/green]")
                         break
                 
+                # Report files created, modified or deleted by the commands
+                if before is not None:
+                    delta = await self.workspace_delta.describe(before, await self.workspace_delta.snapshot())
+                    if delta:
+                        observations.append(delta)
+                
                 # Display observations
                 if observations:
                     display_observation('\n\n'.join(observations))
@@ -279,6 +475,12 @@ class AgentCode:
                 
                 # Continue loop for next AI iteration (unless FINISH was called)
             
+            await self._discard_eager(eager)
+            if self.llm.cache_stats.requests:
+                display_info(self.llm.cache_stats.describe())
+            if self.config.token_report and self.task_usage.prompt_tokens:
+                display_info(f"Task tokens: {self.task_usage.describe()}")
+            
             # Handle cases where loop ended without proper completion
             if not task_completed and total_commands > 0:
                 if iteration >= max_iterations:
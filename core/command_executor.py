@@ -4,7 +4,7 @@ from pathlib import Path
 from typing import Dict, Any, List
 from rich.console import Console
 
-from tools import FileLister, FileReader, FileWriter, TerminalExecutor, TaskFinisher
+from tools import FileLister, FileReader, FileWriter, TerminalExecutor, TaskFinisher, CodeSearcher
 from ui.display import display_info, display_error
 
 console = Console()
@@ -13,8 +13,8 @@ console = Console()
 class CommandExecutor:
     """Executes commands parsed from AI responses with proper sandboxing."""
     
-    def __init__(self, workspace_path: str):
-        """Initialize the command executor with workspace path."""
+    def __init__(self, workspace_path: str, workspace_view=None):
+        """Initialize the command executor with workspace path and optional live workspace view."""
         self.workspace_path = Path(workspace_path).resolve()
         self.console = Console()
         
@@ -22,11 +22,12 @@ class CommandExecutor:
         self.workspace_path.mkdir(parents=True, exist_ok=True)
         
         # Initialize tools
-        self.file_lister = FileLister(str(self.workspace_path))
+        self.file_lister = FileLister(str(self.workspace_path), workspace_view)
         self.file_reader = FileReader(str(self.workspace_path))
         self.file_writer = FileWriter(str(self.workspace_path))
         self.terminal_executor = TerminalExecutor(str(self.workspace_path))
         self.task_finisher = TaskFinisher()
+        self.code_searcher = CodeSearcher(str(self.workspace_path), workspace_view)
         
     async def execute_command(self, command_type: str, args: List[str]) -> Dict[str, Any]:
         """Execute a command and return the result."""
@@ -44,6 +45,11 @@ class CommandExecutor:
                 )
             elif command_type == "TERMINAL_COMMAND":
                 return await self.terminal_executor.execute_command(args[0] if args else "")
+            elif command_type == "SEARCH":
+                return await self.code_searcher.search(
+                    args[0] if args else "",
+                    args[1] if len(args) > 1 else "literal"
+                )
             elif command_type == "FINISH":
                 return await self.task_finisher.finish_task()
             else:
@@ -20,6 +20,7 @@ class CommandParser:
             'WRITE_FILE': re.compile(r'<command>\[CMD:WRITE_FILE\("([^"]+)",\s*"<code\s+(\d+)>"\)\]</command>', re.IGNORECASE),
             'WRITE_FILE_LEGACY': re.compile(r'<command>\[CMD:WRITE_FILE\("([^"]+)",\s*"<code>(.*?)</code>"\)\]</command>', re.IGNORECASE | re.DOTALL),
             'TERMINAL_COMMAND': re.compile(r'<command>\[CMD:TERMINAL_COMMAND\("([^"]+)"\)\]</command>', re.IGNORECASE),
+            'SEARCH': re.compile(r'<command>\[CMD:SEARCH\("([^"]+)"(?:,\s*"(literal|regex)")?\)\]</command>', re.IGNORECASE),
             'FINISH': re.compile(r'<command>\[CMD:FINISH\]</command>', re.IGNORECASE)
         }
         
@@ -96,6 +97,12 @@ class CommandParser:
                             'args': [match.group(1)],
                             'position': match.start()
                         })
+                    elif command_type == 'SEARCH':
+                        commands.append({
+                            'type': command_type,
+                            'args': [match.group(1), (match.group(2) or 'literal').lower()],
+                            'position': match.start()
+                        })
             
             # Handle legacy WRITE_FILE pattern (with inline <code> tags) if no new version was found
             write_file_found = any(cmd['type'] == 'WRITE_FILE' for cmd in commands)
@@ -190,6 +197,12 @@ class CommandParser:
                     if not cmd['args'] or not cmd['args'][0].strip():
                         validation_results['errors'].append(f"Command {i+1}: Empty terminal command")
                         validation_results['valid'] = False
+                
+                # Check for empty search query
+                if cmd['type'] == 'SEARCH':
+                    if not cmd['args'] or not cmd['args'][0].strip():
+                        validation_results['errors'].append(f"Command {i+1}: Empty search query")
+                        validation_results['valid'] = False
             
             # Display validation results
             if validation_results['errors']:
@@ -240,7 +253,84 @@ class CommandParser:
             elif cmd_type == 'TERMINAL_COMMAND':
                 command = args[0] if args else "[missing command]"
                 summary_lines.append(f"  {i}. Execute: {command}")
+            elif cmd_type == 'SEARCH':
+                query = args[0] if args else "[missing query]"
+                mode = args[1] if len(args) > 1 else "literal"
+                summary_lines.append(f"  {i}. Search ({mode}): {query}")
             elif cmd_type == 'FINISH':
                 summary_lines.append(f"  {i}. Finish task")
         
         return "\n".join(summary_lines)
+
+
+# Commands that only read the workspace and may run while the response is still streaming
+READ_ONLY_COMMANDS = ('LIST_FILES', 'READ_FILE', 'SEARCH')
+
+
+class StreamingResponseParser:
+    """Finds complete narrations and command tags in a response as it streams in.
+    
+    Text is fed in arbitrary pieces. Each complete ``<narration>`` is
+    reported once, as is each complete read-only command tag, as long as
+    every command before it was read-only too, so eager execution can never
+    observe the workspace before an earlier write. Code blocks are skipped
+    so tags quoted inside file contents are ignored.
+    """
+    
+    def __init__(self, parser: CommandParser):
+        """Initialize with the parser whose command patterns are used."""
+        self.parser = parser
+        self.text = ""
+        self.position = 0  # Everything before this has been scanned
+        self.narrations_shown = 0
+        self.eager_allowed = True
+        self.opening_pattern = re.compile(r'<(narration|naration|command|code\s+(\d+))>', re.IGNORECASE)
+    
+    def feed(self, delta: str) -> List[Tuple[str, Any]]:
+        """Add streamed text, returning new ('narration', text) and ('command', command) events."""
+        self.text += delta
+        events = []
+        
+        while True:
+            opening = self.opening_pattern.search(self.text, self.position)
+            if not opening:
+                # Keep a possible partial opening tag for the next piece
+                self.position = max(self.position, len(self.text) - 16)
+                break
+            
+            tag = opening.group(1).lower()
+            if tag.startswith('code'):
+                closing = re.compile(rf'</code\s+{opening.group(2)}>', re.IGNORECASE).search(self.text, opening.end())
+            elif tag == 'command':
+                closing = re.compile(r'</command>', re.IGNORECASE).search(self.text, opening.end())
+            else:
+                closing = re.compile(r'</(?:narration|naration)>', re.IGNORECASE).search(self.text, opening.end())
+            if not closing:
+                self.position = opening.start()
+                break
+            self.position = closing.end()
+            
+            if tag == 'command':
+                command = self._parse_read_only(self.text[opening.start():closing.end()])
+                if command is None:
+                    self.eager_allowed = False
+                elif self.eager_allowed:
+                    events.append(('command', command))
+            elif not tag.startswith('code'):
+                self.narrations_shown += 1
+                events.append(('narration', self.text[opening.end():closing.start()].strip()))
+        
+        return events
+    
+    def _parse_read_only(self, tag: str) -> Optional[Dict[str, Any]]:
+        """Parse one complete command tag if it is a read-only command."""
+        for command_type in READ_ONLY_COMMANDS:
+            match = self.parser.patterns[command_type].fullmatch(tag)
+            if not match:
+                continue
+            if command_type == 'LIST_FILES':
+                return {'type': command_type, 'args': []}
+            if command_type == 'SEARCH':
+                return {'type': command_type, 'args': [match.group(1), (match.group(2) or 'literal').lower()]}
+            return {'type': command_type, 'args': [match.group(1)]}
+        return None
@@ -0,0 +1,94 @@
+"""Detection of files that cost many tokens but tell the model little (lockfiles, bundles, generated code)."""
+
+import re
+from pathlib import PurePosixPath
+from typing import Dict, Optional, Tuple
+
+from core.context_packer import CHARS_PER_TOKEN
+
+
+LOCKFILE_NAMES = {
+    'package-lock.json', 'npm-shrinkwrap.json', 'yarn.lock', 'pnpm-lock.yaml', 'bun.lockb',
+    'poetry.lock', 'pipfile.lock', 'pdm.lock', 'uv.lock', 'cargo.lock', 'composer.lock',
+    'gemfile.lock', 'go.sum', 'mix.lock', 'pubspec.lock', 'podfile.lock', 'flake.lock'
+}
+MINIFIED_SUFFIXES = ('.min.js', '.min.css', '.min.mjs', '.bundle.js', '.chunk.js')
+SOURCE_MAP_SUFFIXES = ('.map',)
+VENDORED_DIRS = {'vendor', 'vendors', 'vendored', 'third_party', 'third-party', 'thirdparty', 'bower_components'}
+
+# Generated-code markers count only in a comment line among the first lines of a file
+GENERATED_HEADER_LINES = 10
+_GENERATED_MARKER = re.compile(
+    r'\s*(#|//|/\*|\*|--|<!--|;|%|"""|\'\'\')[^\n]*?'
+    r'(@generated\b|code generated\b.{0,80}\bdo not edit\b|'
+    r'generated by (the )?(protoc|protocol buffer|swagger|openapi|thrift|django|sqlc|graphql)\b)',
+    re.IGNORECASE
+)
+
+# A line this long is almost never hand-written source
+MINIFIED_LINE_CHARS = 1000
+MINIFIED_AVERAGE_LINE_CHARS = 300
+
+# Upper bound on a stub line besides the file path
+STUB_CHARS = 96
+
+# Categories, in the order they are reported
+CATEGORIES = ('lockfile', 'minified', 'source map', 'generated', 'vendored', 'duplicate')
+
+
+def classify_path(path: str) -> Optional[str]:
+    """Flag a file by its name and location alone, without reading it."""
+    pure = PurePosixPath(path)
+    name = pure.name.lower()
+    if name in LOCKFILE_NAMES:
+        return 'lockfile'
+    if name.endswith(SOURCE_MAP_SUFFIXES):
+        return 'source map'
+    if name.endswith(MINIFIED_SUFFIXES):
+        return 'minified'
+    if any(part.lower() in VENDORED_DIRS for part in pure.parts[:-1]):
+        return 'vendored'
+    return None
+
+
+def classify_content(text: str) -> Optional[str]:
+    """Flag generated files by their header and minified files by their line lengths."""
+    header = text.split('\n', GENERATED_HEADER_LINES)[:GENERATED_HEADER_LINES]
+    if any(_GENERATED_MARKER.match(line) for line in header):
+        return 'generated'
+
+    if len(text) >= MINIFIED_LINE_CHARS:
+        line_count = text.count('\n') + 1
+        if len(text) / line_count >= MINIFIED_AVERAGE_LINE_CHARS:
+            return 'minified'
+        if max(map(len, text.splitlines())) >= MINIFIED_LINE_CHARS * 10:
+            return 'minified'
+    return None
+
+
+class CompactionReport:
+    """Per-category tally of compacted files and the tokens their stubs saved."""
+
+    def __init__(self):
+        self.categories: Dict[str, Tuple[int, int]] = {}  # category -> (files, tokens saved)
+
+    def add(self, category: str, size: int, stub_chars: int):
+        """Record a file of ``size`` characters replaced by a stub."""
+        files, saved = self.categories.get(category, (0, 0))
+        self.categories[category] = (files + 1, saved + max(size - stub_chars, 0) // CHARS_PER_TOKEN)
+
+    @property
+    def total_files(self) -> int:
+        return sum(files for files, _ in self.categories.values())
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(saved for _, saved in self.categories.values())
+
+    def describe(self) -> str:
+        """Summarize the savings, e.g. ``lockfile: 2 files, ~41,200 tokens``."""
+        order = {category: i for i, category in enumerate(CATEGORIES)}
+        return "; ".join(
+            f"{category}: {files} file{'s' if files != 1 else ''}, ~{saved:,} tokens"
+            for category, (files, saved) in sorted(self.categories.items(), key=lambda item: order.get(item[0], 99))
+        )
@@ -1,163 +1,711 @@
 """Project context builder for Agent Code."""
 
-import os
 import asyncio
+import time
 from pathlib import Path
-from typing import List, Dict, Any
-import aiofiles
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Set, Tuple
 
 from rich.console import Console
+from config.settings import Config
+from core.compaction import STUB_CHARS, CompactionReport, classify_path
+from core.context_cache import ContextCache, default_cache_root
+from core.context_document import ContextDocument
+from core.data_summary import is_data_file, summarize_data_file
+from core.context_packer import CHARS_PER_TOKEN, ENTRY_POINT_NAMES, ContextPacker
+from core.file_ingest import FileIngestor
+from core.repo_map import RepoMap
+from core.retrieval import Chunk, RetrievalIndex
+from core.summary_cache import SummaryCache
+from core.token_accounting import estimate_tokens
+from core.watcher import WorkspaceWatcher
+from tools.content_sniffer import SNIFF_BLOCK_SIZE, sniff_bytes, decode_text
+from tools.workspace_walker import WorkspaceWalker, WalkEntry, WalkResult
 from ui.display import display_error, display_info
 
 console = Console()
 
+# Omitted files smaller than this are cheap enough to READ_FILE without a summary
+SUMMARY_MIN_SIZE = 8 * 1024
+
+# The quick context shown while the full build runs: a shallow tree plus small key files
+QUICK_TREE_DEPTH = 2
+QUICK_KEY_FILE_SIZE = 16 * 1024
+QUICK_KEY_FILES_CHARS = 64 * 1024
+
 
 class ProjectContextBuilder:
-    """Builds comprehensive project context from a directory."""
+    """Builds comprehensive project context from a directory.
+    
+    After ``build_context`` the builder holds a view of the workspace (the
+    last walk plus cached file contents). ``start_watching`` keeps that view
+    current by patching it with the changes a ``WorkspaceWatcher`` reports;
+    ``version`` increases every time ``context`` is re-rendered.
+    
+    When the workspace does not fit the token budget and retrieval is
+    enabled, the context carries only the tree and ``retrieve`` supplies
+    the chunks relevant to each request instead. In ``map`` context mode
+    the file contents are replaced by a ranked outline of their symbols.
+    With compaction on, lockfiles, minified, generated and vendored files
+    and exact duplicates are sent as one-line stubs. Large files that do
+    not fit are listed with a model-written summary once one exists;
+    ``start_summarizing`` writes missing summaries in the background.
+    ``build_quick_context`` gives a shallow first context without the
+    cache or indexes, for use until ``build_context`` completes.
+    """
     
-    def __init__(self, root_directory: Path):
+    def __init__(self, root_directory: Path, config: Optional[Config] = None):
         """Initialize with the root directory to scan."""
         self.root_directory = Path(root_directory).resolve()
+        self.config = config
         self.max_file_size = 1024 * 1024  # 1MB max file size
-        self.excluded_dirs = {
-            '.git', '__pycache__', '.pytest_cache', 'node_modules', 
-            '.venv', 'venv', '.env', 'dist', 'build', '.next',
-            '.docker', 'coverage', '.nyc_output', 'target'
-        }
-        self.excluded_extensions = {
-            '.pyc', '.pyo', '.pyd', '.so', '.dll', '.dylib',
-            '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.ico',
-            '.mp3', '.mp4', '.avi', '.mov', '.wav', '.pdf',
-            '.zip', '.tar', '.gz', '.rar', '.7z', '.exe', '.bin'
-        }
+        self.walker = WorkspaceWalker(
+            self.root_directory,
+            respect_gitignore=config.context_respect_gitignore if config else True
+        )
+        self.use_git_index = config.context_use_git_index if config else False
+        
+        # Contents always go through the cache's blob store; the manifest is only persisted when enabled
+        cache_root = Path(config.context_cache_dir).expanduser() if config and config.context_cache_dir else None
+        self.persist_cache = config.context_cache_enabled if config else True
+        self.cache = ContextCache(self.root_directory, cache_root, persist=self.persist_cache)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        self.ingestor = FileIngestor(max_concurrency=config.context_read_concurrency if config else 32)
+        self.packer = ContextPacker(
+            max_tokens=config.context_max_tokens if config else 100000,
+            max_file_size=self.max_file_size
+        )
+        
+        self.retrieval_enabled = config.context_retrieval if config else True
+        self.retrieval_top_k = config.context_retrieval_top_k if config else 8
+        self.retriever = RetrievalIndex(self.root_directory, max_file_size=self.max_file_size)
+        self.retrieval_active = False
+        
+        self.context_mode = config.context_mode if config else "full"
+        # The outline gets its own, smaller budget so map mode actually shrinks the prompt
+        self.map_max_tokens = min(config.context_map_max_tokens if config else 8000, self.packer.max_tokens)
+        self.repo_map = RepoMap(self.cache.read_content)
+        self.map_symbols = (0, 0)  # (shown, total) in the last repo map
+        
+        self.compaction_enabled = config.context_compaction if config else True
+        self.compaction = CompactionReport()
+        
+        # Summaries are keyed by content hash, so they are shared by every workspace
+        summary_dir = (Path(cache_root) if cache_root else default_cache_root()) / "summaries"
+        self.summaries = SummaryCache(summary_dir if self.persist_cache else None)
+        self.use_summaries = config.context_summaries if config else True
+        self.summary_concurrency = config.context_summary_concurrency if config else 4
+        self.summary_max_files = config.context_summary_max_files if config else 50
+        self.summary_attempted: Set[str] = set()
+        self.summary_task: Optional[asyncio.Task] = None
+        self.unsummarized: List[WalkEntry] = []
+        
+        # Live view of the workspace
+        self.current_walk: Optional[WalkResult] = None
+        self.context = ContextDocument()
+        self.omitted_count = 0
+        self.version = 0
+        self.indexed = False  # Whether build_context has completed
+        self.lock = asyncio.Lock()
+        self.watcher: Optional[WorkspaceWatcher] = None
     
-    async def build_context(self) -> str:
-        """Build the complete project context string."""
+    async def build_context(self) -> ContextDocument:
+        """Build the complete project context document."""
         try:
             display_info(f"Scanning project directory: {self.root_directory}")
+            start_time = time.perf_counter()
             
-            # Get file structure
-            structure = await self._get_directory_structure()
-            
-            # Get file contents
-            file_contents = await self._get_file_contents()
+            async with self.lock:
+                warm = self.cache.load() if self.persist_cache else False
+                self.cache_hits = 0
+                self.cache_misses = 0
+                
+                # Walk the tree once for both the structure and the file list
+                self.current_walk = await asyncio.to_thread(self._walk)
+                context = await self._render_context()
+                if self.persist_cache:
+                    await asyncio.to_thread(self.cache.prune_blobs)
             
-            # Build the context string
-            context = self._format_context(structure, file_contents)
+            self.indexed = True
             
-            display_info(f"Project context built: {len(file_contents)} files processed")
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            display_info(
+                f"Project context built: {len(self.current_walk.table)} files processed in {elapsed_ms:.0f} ms "
+                f"({'warm' if warm else 'cold'} cache: {self.cache_hits} reused, {self.cache_misses} read)"
+            )
+            if self.context_mode == "map":
+                shown, total = self.map_symbols
+                display_info(f"Repo map: {shown} of {total} symbols fit the {self.map_max_tokens} token map budget")
+            elif self.retrieval_active:
+                display_info(
+                    f"Context budget of {self.packer.max_tokens} tokens reached: relevant file contents "
+                    f"will be retrieved per request from {len(self.retriever.chunks)} indexed chunks"
+                )
+            elif self.omitted_count:
+                display_info(
+                    f"Context budget of {self.packer.max_tokens} tokens reached: "
+                    f"{self.omitted_count} files listed without content"
+                )
+            if self.compaction.total_files:
+                display_info(
+                    f"Compacted {self.compaction.total_files} files to stubs, saving "
+                    f"~{self.compaction.total_tokens:,} tokens ({self.compaction.describe()})"
+                )
             return context
             
         except Exception as e:
             display_error(f"Failed to build project context: {e}")
-            return f"Error building project context: {e}"
+            return ContextDocument([f"Error building project context: {e}"])
     
-    async def _get_directory_structure(self) -> str:
-        """Get the directory structure as a tree."""
-        structure_lines = []
-        
-        def add_directory(path: Path, prefix: str = ""):
-            """Recursively add directory structure."""
+    async def build_quick_context(self) -> ContextDocument:
+        """Build a first context from a shallow walk and the small key files at the top of the tree."""
+        try:
+            start_time = time.perf_counter()
+            walk = await asyncio.to_thread(self.walker.walk, QUICK_TREE_DEPTH)
+            
+            candidates = walk.table.entries(walk.table.select(binary=False, max_size=QUICK_KEY_FILE_SIZE))
+            key_files = sorted(
+                (entry for entry in candidates if entry.path.rpartition('/')[2].lower() in ENTRY_POINT_NAMES),
+                key=lambda entry: (entry.path.count('/'), entry.path)
+            )
+            contents = await asyncio.to_thread(self._read_key_files, key_files)
+            
+            context = ContextDocument()
+            context.append_text("\n".join([
+                "=== PROJECT CONTEXT ===",
+                f"Working Directory: {self.root_directory}",
+                "Context Mode: quick (the project is still being indexed; use LIST_FILES, READ_FILE or SEARCH "
+                "for anything not shown)"
+            ]) + "\n\n")
+            context.append_text(f"=== DIRECTORY STRUCTURE (top {QUICK_TREE_DEPTH} levels) ===\n{walk.tree}\n\n")
+            context.append_text("=== KEY FILES ===\n")
+            for path, content in contents:
+                context.append_text(f"--- File: {path} ---\n{content}\n\n")
+            
+            self.context = context
+            self.version += 1
+            
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            display_info(f"Quick project context: {len(contents)} key files in {elapsed_ms:.0f} ms")
+            return context
+            
+        except Exception as e:
+            display_error(f"Failed to build quick project context: {e}")
+            return ContextDocument([f"Error building project context: {e}"])
+    
+    def _read_key_files(self, files: List[WalkEntry]) -> List[Tuple[str, str]]:
+        """Read small text files in order until the quick context's character cap."""
+        contents = []
+        remaining = min(QUICK_KEY_FILES_CHARS, self.packer.max_chars // 2)
+        for entry in files:
             try:
-                items = sorted(path.iterdir(), key=lambda x: (x.is_file(), x.name.lower()))
+                with open(self.root_directory / entry.path, 'rb') as f:
+                    data = f.read(QUICK_KEY_FILE_SIZE + 1)
+            except OSError:
+                continue
+            sniff = sniff_bytes(data[:SNIFF_BLOCK_SIZE])
+            if sniff.is_binary:
+                continue
+            text = decode_text(data, sniff.encoding)
+            if len(text) > remaining:
+                continue
+            contents.append((entry.path, text))
+            remaining -= len(text)
+        return contents
+    
+    async def start_watching(self, debounce: float = 0.2) -> bool:
+        """Keep the context current by applying filesystem events as they happen."""
+        if self.watcher is None:
+            self.watcher = WorkspaceWatcher(self.root_directory, self.apply_changes, debounce=debounce)
+            if not await self.watcher.start():
+                self.watcher = None
+        return self.watcher is not None
+    
+    async def stop_watching(self):
+        """Stop applying filesystem events."""
+        if self.watcher:
+            await self.watcher.stop()
+            self.watcher = None
+    
+    @property
+    def live_view(self) -> bool:
+        """Whether the in-memory view is being kept current by a watcher."""
+        return self.watcher is not None and self.current_walk is not None
+    
+    async def sync(self):
+        """Apply every pending filesystem change before the view is used."""
+        if self.watcher:
+            await self.watcher.flush()
+    
+    async def apply_changes(self, rel_paths: Optional[Set[str]]):
+        """Patch the view with changed paths, or rescan everything when ``rel_paths`` is None."""
+        async with self.lock:
+            if self.current_walk is None:
+                return
+            
+            if rel_paths is None:
+                self.current_walk = await asyncio.to_thread(self._walk)
+            else:
+                found = await asyncio.to_thread(self.walker.scan_paths, rel_paths)
+                walk = self.current_walk
                 
-                for i, item in enumerate(items):
-                    if item.name.startswith('.') and item.name not in {'.env.example', '.gitignore'}:
-                        continue
-                    
-                    if item.is_dir() and item.name in self.excluded_dirs:
-                        continue
-                    
-                    is_last = i == len(items) - 1
-                    current_prefix = "└── " if is_last else "├── "
-                    structure_lines.append(f"{prefix}{current_prefix}{item.name}")
-                    
-                    if item.is_dir():
-                        next_prefix = prefix + ("    " if is_last else "│   ")
-                        add_directory(item, next_prefix)
-                        
-            except PermissionError:
-                structure_lines.append(f"{prefix}└── [Permission Denied]")
-        
-        structure_lines.append(f"{self.root_directory.name}/")
-        add_directory(self.root_directory)
-        
-        return "\n".join(structure_lines)
-    
-    async def _get_file_contents(self) -> List[Dict[str, Any]]:
-        """Get contents of all readable files."""
-        file_contents = []
+                def kept(paths: Set[str]) -> Set[str]:
+                    return {path for path in paths if not self._is_affected(path, rel_paths)}
+                
+                files = {
+                    entry.path: entry for entry in walk.files
+                    if not self._is_affected(entry.path, rel_paths)
+                }
+                files.update((entry.path, entry) for entry in found.files)
+                self.current_walk = self.walker.render_tree(
+                    list(files.values()),
+                    dirs=kept(walk.dirs) | found.dirs,
+                    denied=kept(walk.denied) | found.denied,
+                    other_paths=kept(walk.other_paths) | found.other_paths,
+                )
+            
+            await self._render_context()
+    
+    async def _render_context(self) -> ContextDocument:
+        """Pack, read and format the current view into ``self.context``."""
+        walk = self.current_walk
+        
+        text_files = self._get_text_files(walk)
+        self.compaction = CompactionReport()
+        
+        # Files flagged by name alone (lockfiles, bundles, vendored code) are never read
+        flagged = {}
+        if self.compaction_enabled:
+            flagged = {entry.path: entry for entry in text_files if classify_path(entry.path)}
+        candidates = [entry for entry in text_files if entry.path not in flagged]
+        
+        if self.context_mode == "map":
+            self.context = await self._render_repo_map(walk, candidates)
+        else:
+            # Data files are represented by a summary, which shares the budget with everything else
+            summaries = await self._get_data_summaries([entry for entry in candidates if is_data_file(entry.path)])
+            summary_chars = sum(len(info['content']) + len(path) + 64 for path, info in summaries.items())
+            stub_chars = sum(len(path) + STUB_CHARS for path in flagged)
+            
+            # Pick the files that fit the token budget before reading anything
+            reserved_chars = len(walk.tree) + 1024 + summary_chars + stub_chars
+            included, omitted = self.packer.pack(
+                [entry for entry in candidates if entry.path not in summaries],
+                reserved_chars=reserved_chars
+            )
+            
+            # Too large for the budget: send the tree only and retrieve contents per request
+            self.retrieval_active = self.retrieval_enabled and bool(omitted)
+            if self.retrieval_active:
+                await asyncio.to_thread(self.retriever.update, candidates)
+                included = []
+                summaries = {}
+                flagged = {}
+            
+            # Get file contents, stubbing flagged files and keeping everything in walk order
+            contents = {info['path']: info for info in await self._get_file_contents(included)}
+            contents.update(summaries)
+            contents.update((path, self._stub(entry, classify_path(path))) for path, entry in flagged.items())
+            if self.compaction_enabled and not self.retrieval_active:
+                freed = self._compact_contents(contents, text_files)
+                
+                # Spend what the stubs freed on files that did not fit; these get a single compaction pass
+                if freed and omitted:
+                    refill, omitted = self.packer.pack(omitted, reserved_chars=self.packer.max_chars - freed)
+                    contents.update((info['path'], info) for info in await self._get_file_contents(refill))
+                    self._compact_contents(contents, text_files)
+            
+            file_contents = [contents[entry.path] for entry in text_files if entry.path in contents]
+            
+            # Describe large omitted files by their summary, with whatever budget is left
+            used = reserved_chars + sum(info.get('length', 0) + len(info['path']) + 16 for info in file_contents)
+            budget = max(self.packer.max_chars - used, 0)
+            if self.retrieval_active:
+                budget //= 2  # Leave room for the excerpts attached to each request
+            file_summaries = self._get_file_summaries(omitted, budget)
+            
+            # Build the context document
+            self.context = self._format_context(
+                walk.tree, file_contents, omitted, self.retrieval_active, file_summaries
+            )
+            self.omitted_count = len(omitted)
+        
+        self.version += 1
         
-        for file_path in self._get_text_files():
+        self.cache.retain(walk.table.paths())
+        if self.persist_cache:
+            await asyncio.to_thread(self.cache.save)
+        
+        return self.context
+    
+    def _get_file_summaries(self, omitted: List[WalkEntry], budget: int) -> Dict[str, str]:
+        """Get known summaries of large omitted files within a character budget.
+        
+        Files without a summary are remembered in ``unsummarized`` for the
+        background summarizer.
+        """
+        summaries = {}
+        self.unsummarized = []
+        if not self.use_summaries:
+            return summaries
+        for entry in omitted:
+            if entry.size < SUMMARY_MIN_SIZE or entry.size > self.max_file_size:
+                continue
+            cached = self.cache.lookup(entry.path, entry.size, entry.mtime_ns)
+            content_hash = cached.get('hash') if cached else entry.git_oid
+            summary = self.summaries.get(content_hash)
+            if summary is None:
+                self.unsummarized.append(entry)
+            elif len(summary) + len(entry.path) + 32 <= budget:
+                summaries[entry.path] = summary
+                budget -= len(summary) + len(entry.path) + 32
+        return summaries
+    
+    def start_summarizing(self, summarize: Callable[[str, str], Awaitable[Optional[str]]]):
+        """Summarize large omitted files in the background with ``summarize(path, content)``."""
+        if self.summary_task is None or self.summary_task.done():
+            self.summary_task = asyncio.create_task(self._summarize_omitted(summarize))
+    
+    async def stop_summarizing(self):
+        """Cancel background summarization."""
+        if self.summary_task and not self.summary_task.done():
+            self.summary_task.cancel()
             try:
-                # Check file size
-                if file_path.stat().st_size > self.max_file_size:
-                    file_contents.append({
-                        'path': str(file_path.relative_to(self.root_directory)),
-                        'content': f"[File too large: {file_path.stat().st_size} bytes]",
-                        'type': 'large_file'
-                    })
+                await self.summary_task
+            except asyncio.CancelledError:
+                pass
+        self.summary_task = None
+    
+    async def _summarize_omitted(self, summarize: Callable[[str, str], Awaitable[Optional[str]]]):
+        """Write the missing summaries with bounded concurrency, then re-render the context."""
+        async with self.lock:
+            pending = self.unsummarized[:self.summary_max_files]
+            file_contents = await self._get_file_contents(pending)
+        
+        semaphore = asyncio.Semaphore(max(1, self.summary_concurrency))
+        written = 0
+        
+        async def run(info: Dict[str, Any]):
+            nonlocal written
+            content_hash = info.get('hash')
+            # Content hashes already summarized (or tried) this session are never sent again
+            if not content_hash or content_hash in self.summary_attempted or self.summaries.get(content_hash):
+                return
+            self.summary_attempted.add(content_hash)
+            async with semaphore:
+                content = await asyncio.to_thread(self.cache.read_content, content_hash)
+                summary = await summarize(info['path'], content)
+            if summary:
+                self.summaries.store(content_hash, summary)
+                written += 1
+        
+        await asyncio.gather(*(run(info) for info in file_contents))
+        
+        if written:
+            async with self.lock:
+                await self._render_context()
+            display_info(f"Summarized {written} large files for the project context")
+    
+    def _stub(self, entry: WalkEntry, category: str) -> Dict[str, Any]:
+        """Replace a file flagged by its path with a stub, recording the tokens saved."""
+        self.compaction.add(category, entry.size, len(entry.path) + STUB_CHARS)
+        return {
+            'path': entry.path,
+            'category': category,
+            'size': entry.size,
+            'type': 'compacted'
+        }
+    
+    def _compact_contents(self, contents: Dict[str, Dict[str, Any]], files: List[WalkEntry]) -> int:
+        """Stub read files flagged by their content or duplicating an earlier file.
+        
+        Returns the number of characters freed for other files.
+        """
+        seen: Dict[str, str] = {}  # content hash -> first path with it
+        freed = 0
+        for entry in files:
+            info = contents.get(entry.path)
+            if info is None or info['type'] != 'text_file':
+                continue
+            
+            category = info.get('category')
+            original = entry.path
+            if not category:
+                original = seen.setdefault(info['hash'], entry.path)
+                if original == entry.path:
                     continue
-                
-                # Read file content
-                async with aiofiles.open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = await f.read()
-                
+                category = 'duplicate'
+            
+            stub_chars = len(entry.path) + len(original) + STUB_CHARS
+            self.compaction.add(category, info['length'], stub_chars)
+            freed += max(info['length'] - stub_chars, 0)
+            contents[entry.path] = {
+                'path': entry.path,
+                'category': category,
+                'size': entry.size,
+                'duplicate_of': original if category == 'duplicate' else None,
+                'type': 'compacted'
+            }
+        return freed
+    
+    async def _get_data_summaries(self, files: List[WalkEntry]) -> Dict[str, Dict[str, Any]]:
+        """Summarize data files, keeping only summaries that are smaller than the file itself."""
+        results: Dict[str, str] = {}
+        pending = []
+        for entry in files:
+            cached = self.cache.lookup(entry.path, entry.size, entry.mtime_ns)
+            if cached and 'summary' in cached:
+                results[entry.path] = cached['summary']
+            else:
+                pending.append(entry)
+        
+        semaphore = asyncio.Semaphore(self.ingestor.max_concurrency)
+        
+        async def summarize(entry: WalkEntry):
+            async with semaphore:
+                summary = await asyncio.to_thread(summarize_data_file, self.root_directory / entry.path)
+            results[entry.path] = summary or ""
+            self.cache.store_summary(entry.path, entry.size, entry.mtime_ns, summary or "")
+        
+        await asyncio.gather(*(summarize(entry) for entry in pending))
+        
+        return {
+            entry.path: {
+                'path': entry.path,
+                'content': results[entry.path],
+                'size': entry.size,
+                'type': 'data_summary'
+            }
+            for entry in files if results[entry.path] and len(results[entry.path]) < entry.size
+        }
+    
+    async def _render_repo_map(self, walk: WalkResult, text_files: List[WalkEntry]) -> ContextDocument:
+        """Outline the workspace's highest-ranked symbols within the map's token budget."""
+        sources = [entry for entry in text_files if RepoMap.supports(entry.path) and entry.size <= self.max_file_size]
+        file_contents = await self._get_file_contents(sources)
+        await asyncio.to_thread(
+            self.repo_map.update, [(info['path'], info['hash']) for info in file_contents if 'hash' in info]
+        )
+        
+        budget = max(min(self.map_max_tokens * CHARS_PER_TOKEN, self.packer.max_chars - len(walk.tree) - 1024), 0)
+        outline, shown, total = await asyncio.to_thread(self.repo_map.render, budget)
+        self.map_symbols = (shown, total)
+        
+        context = ContextDocument()
+        context.append_text("\n".join([
+            "=== PROJECT CONTEXT ===",
+            f"Working Directory: {self.root_directory}",
+            f"Total Files: {len(text_files)}",
+            "Context Mode: repo map (file contents not included)"
+        ]) + "\n\n")
+        context.append_text(f"=== DIRECTORY STRUCTURE ===\n{walk.tree}\n\n")
+        context.append_text("=== REPO MAP (most referenced definitions first; use READ_FILE or SEARCH for contents) ===\n")
+        context.append_text(f"{outline}\n" if outline else "No definitions found.\n")
+        return context
+    
+    async def retrieve(self, request: str) -> str:
+        """Get the file excerpts most relevant to a request, or '' when the full context is sent."""
+        if not self.retrieval_active:
+            return ""
+        await self.sync()
+        
+        async with self.lock:
+            ranked = await asyncio.to_thread(self.retriever.query, request, self.retrieval_top_k)
+            budget = max(self.packer.max_chars - len(self.context), 0)
+            
+            # Merge chunks of the same file that touch, keeping the best-first order
+            selected = []
+            for chunk, _ in ranked:
+                for i, (path, start, end) in enumerate(selected):
+                    if path == chunk.path and chunk.start_line <= end + 1 and chunk.end_line >= start - 1:
+                        selected[i] = (path, min(start, chunk.start_line), max(end, chunk.end_line))
+                        break
+                else:
+                    selected.append((chunk.path, chunk.start_line, chunk.end_line))
+            
+            sections = []
+            used = 0
+            for path, start, end in selected:
+                lines = await asyncio.to_thread(self.retriever.read_lines, Chunk(path, start, end))
+                section = f"--- File: {path} (lines {start}-{end}) ---\n{lines}\n"
+                if used + len(section) > budget:
+                    continue
+                sections.append(section)
+                used += len(section)
+        
+        if not sections:
+            return ""
+        display_info(f"Retrieved {len(sections)} relevant excerpts (~{estimate_tokens(''.join(sections))} tokens)")
+        return (
+            "=== RELEVANT FILE EXCERPTS (retrieved for this request; use READ_FILE or SEARCH for more) ===\n"
+            + "\n".join(sections)
+        )
+    
+    @staticmethod
+    def _is_affected(path: str, changed: Set[str]) -> bool:
+        """Check whether a file is one of the changed paths or lies below one."""
+        if path in changed:
+            return True
+        index = path.find('/')
+        while index != -1:
+            if path[:index] in changed:
+                return True
+            index = path.find('/', index + 1)
+        return False
+    
+    async def _get_file_contents(self, files: List[WalkEntry]) -> List[Dict[str, Any]]:
+        """Get blob references for the contents of all readable files."""
+        file_contents = []
+        pending = []  # (index into file_contents, entry) for files that must be read
+        
+        for entry in files:
+            # Reuse cached content when size and mtime are unchanged
+            cached = self.cache.lookup(entry.path, entry.size, entry.mtime_ns)
+            
+            # A blob id from the git index identifies the content without reading it
+            if not cached and entry.git_oid:
+                cached = self.cache.lookup_hash(entry.git_oid)
+                if cached:
+                    self.cache.store(
+                        entry.path, entry.size, entry.mtime_ns, entry.git_oid, cached['length'], cached.get('category')
+                    )
+            
+            if cached and 'hash' in cached and self.cache.blob_path(cached['hash']).exists():
+                self.cache_hits += 1
                 file_contents.append({
-                    'path': str(file_path.relative_to(self.root_directory)),
-                    'content': content,
+                    'path': entry.path,
+                    'hash': cached['hash'],
+                    'length': cached['length'],
+                    'category': cached.get('category'),
                     'type': 'text_file'
                 })
-                
-            except Exception as e:
-                file_contents.append({
-                    'path': str(file_path.relative_to(self.root_directory)),
-                    'content': f"[Error reading file: {e}]",
+                continue
+            
+            pending.append((len(file_contents), entry))
+            file_contents.append(None)
+        
+        # Read everything that missed the cache concurrently
+        results = await self.ingestor.ingest([
+            (str(self.root_directory / entry.path), entry.size) for _, entry in pending
+        ], self.cache.blob_dir)
+        
+        for (index, entry), result in zip(pending, results):
+            if result.get('binary'):
+                # Content sniffing found a binary file behind a text-looking name
+                self.cache.store_binary(entry.path, entry.size, entry.mtime_ns)
+                continue
+            
+            if 'error' in result:
+                file_contents[index] = {
+                    'path': entry.path,
+                    'content': f"[Error reading file: {result['error']}]",
                     'type': 'error'
-                })
+                }
+                continue
+            
+            self.cache_misses += 1
+            self.cache.store(
+                entry.path, entry.size, entry.mtime_ns, result['hash'], result['length'], result['category']
+            )
+            
+            file_contents[index] = {
+                'path': entry.path,
+                'hash': result['hash'],
+                'length': result['length'],
+                'category': result['category'],
+                'type': 'text_file'
+            }
         
-        return file_contents
+        return [info for info in file_contents if info is not None]
     
-    def _get_text_files(self):
-        """Generator for all text files in the project."""
-        for root, dirs, files in os.walk(self.root_directory):
-            # Skip excluded directories
-            dirs[:] = [d for d in dirs if d not in self.excluded_dirs]
-            
-            for file in files:
-                file_path = Path(root) / file
-                
-                # Skip excluded extensions
-                if file_path.suffix.lower() in self.excluded_extensions:
-                    continue
-                
-                # Skip hidden files (except specific ones)
-                if file.startswith('.') and file not in {'.env.example', '.gitignore'}:
-                    continue
-                
-                yield file_path
+    def _walk(self):
+        """Walk the workspace, taking the file list from the git index when configured."""
+        if self.use_git_index:
+            walk = self.walker.walk_git_index()
+            if walk is not None:
+                return walk
+        return self.walker.walk()
     
-    def _format_context(self, structure: str, file_contents: List[Dict[str, Any]]) -> str:
-        """Format the complete context string."""
-        context_parts = []
+    def _get_text_files(self, walk: WalkResult) -> List[WalkEntry]:
+        """Get the walked files not known to be binary; binary rows are dropped on the file table."""
+        return [
+            entry for entry in walk.table.entries(walk.table.select(binary=False))
+            if not self.cache.is_known_binary(entry.path, entry.size, entry.mtime_ns)
+        ]
+    
+    def _format_context(
+        self,
+        structure: str,
+        file_contents: List[Dict[str, Any]],
+        omitted: List[WalkEntry] = None,
+        retrieval: bool = False,
+        summaries: Dict[str, str] = None
+    ) -> ContextDocument:
+        """Format the complete context as segments, with file contents left in the blob store."""
+        context = ContextDocument()
+        omitted = omitted or []
+        summaries = summaries or {}
         
         # Add header
-        context_parts.append("=== PROJECT CONTEXT ===")
-        context_parts.append(f"Working Directory: {self.root_directory}")
-        context_parts.append(f"Total Files: {len(file_contents)}")
-        context_parts.append("")
+        header = [
+            "=== PROJECT CONTEXT ===",
+            f"Working Directory: {self.root_directory}",
+            f"Total Files: {len(file_contents) + len(omitted)}"
+        ]
+        if omitted and not retrieval:
+            shown = sum(1 for file_info in file_contents if file_info['type'] != 'compacted')
+            header.append(f"Files With Content Below: {shown}")
+        context.append_text("\n".join(header) + "\n\n")
         
         # Add directory structure
-        context_parts.append("=== DIRECTORY STRUCTURE ===")
-        context_parts.append(structure)
-        context_parts.append("")
+        context.append_text(f"=== DIRECTORY STRUCTURE ===\n{structure}\n\n")
         
         # Add file contents
-        context_parts.append("=== FILE CONTENTS ===")
+        context.append_text("=== FILE CONTENTS ===\n")
+        if retrieval:
+            context.append_text(
+                "The project is larger than the context budget. Excerpts relevant to each request are "
+                "attached to it under RELEVANT FILE EXCERPTS; use SEARCH or READ_FILE for anything else.\n"
+            )
+            # Summaries are written in the background by the model, so they are volatile text
+            if summaries:
+                context.append_volatile("\n=== FILE SUMMARIES (generated; use READ_FILE for exact content) ===\n")
+                for entry in omitted:
+                    if entry.path in summaries:
+                        context.append_volatile(f"{entry.path} ({entry.size} bytes):\n{summaries[entry.path]}\n\n")
+            return context
         
         for file_info in file_contents:
-            context_parts.append(f"--- File: {file_info['path']} ---")
-            context_parts.append(file_info['content'])
-            context_parts.append("")
+            if file_info['type'] == 'compacted':
+                if file_info.get('duplicate_of'):
+                    note = f"duplicate of {file_info['duplicate_of']}"
+                else:
+                    note = f"{file_info['category']}, {file_info['size']} bytes"
+                context.append_text(
+                    f"--- File: {file_info['path']} ({note}; content omitted, use READ_FILE if needed) ---\n\n"
+                )
+                continue
+            if file_info['type'] == 'data_summary':
+                context.append_text(
+                    f"--- File: {file_info['path']} (data summary of {file_info['size']} bytes; "
+                    f"use READ_FILE for full content) ---\n"
+                )
+            else:
+                context.append_text(f"--- File: {file_info['path']} ---\n")
+            if 'hash' in file_info:
+                context.append_blob(self.cache.blob_path(file_info['hash']), file_info['length'])
+            else:
+                context.append_text(file_info['content'])
+            context.append_text("\n\n")
+        
+        # List files that did not fit the budget so they can be loaded on demand
+        if omitted:
+            context.append_text("=== FILES NOT INCLUDED (use READ_FILE to load) ===\n")
+            for entry in omitted:
+                context.append_text(f"{entry.path} ({entry.size} bytes)\n")
+                if entry.path in summaries:
+                    summary = "\n    ".join(summaries[entry.path].splitlines())
+                    context.append_volatile(f"  Summary: {summary}\n")
         
-        return "\n".join(context_parts)
+        return context
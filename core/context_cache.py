@@ -0,0 +1,221 @@
+"""Persistent on-disk cache for project context scans."""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from tools.git_index import git_blob_id
+from ui.display import display_warning
+
+
+MANIFEST_VERSION = 4
+
+
+def default_cache_root() -> Path:
+    """Get the base directory used for per-workspace caches."""
+    xdg_cache = os.getenv("XDG_CACHE_HOME")
+    base = Path(xdg_cache) if xdg_cache else Path.home() / ".cache"
+    return base / "agent-code"
+
+
+def hash_content(data: bytes) -> str:
+    """Get the content hash recorded for a file in the manifest.
+
+    This is the git blob id, so hashes can be taken from the git index
+    for tracked files without reading them.
+    """
+    return git_blob_id(data)
+
+
+def blob_path(blob_dir: str, content_hash: str) -> Path:
+    """Get the location of a decoded-content blob in a blob store."""
+    return Path(blob_dir) / content_hash[:2] / content_hash
+
+
+def write_blob(blob_dir: str, content_hash: str, text: str):
+    """Store decoded content as UTF-8 under its hash, unless it is already present."""
+    path = blob_path(blob_dir, content_hash)
+    if path.exists():
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{content_hash}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class ContextCache:
+    """Per-workspace manifest of file metadata plus a content-addressed blob store.
+
+    Entries are keyed by path relative to the workspace root and record
+    ``size``, ``mtime_ns``, ``hash`` and the decoded ``length`` in
+    characters, or a ``binary`` flag for files that sniffed as binary.
+    Data files may also carry their ``summary``. A
+    file whose size and mtime still match its entry is served from the
+    cache without being read. Decoded contents live in ``blobs/`` keyed by
+    hash and are only loaded (memory-mapped) when a context is sent, so
+    they are never all resident at once. Without persistence the blob
+    store is a temporary directory removed at exit.
+    """
+
+    def __init__(self, root_directory: Path, cache_root: Optional[Path] = None, persist: bool = True):
+        """Initialize the cache for a workspace root."""
+        self.root_directory = Path(root_directory).resolve()
+        workspace_key = hashlib.sha256(str(self.root_directory).encode('utf-8')).hexdigest()[:16]
+        self.cache_dir = Path(cache_root or default_cache_root()) / workspace_key
+        self.manifest_path = self.cache_dir / "manifest.json"
+        self.persist = persist
+
+        self._temp_blobs = None
+        if persist:
+            self.blob_dir = str(self.cache_dir / "blobs")
+        else:
+            self._temp_blobs = tempfile.TemporaryDirectory(prefix="agent-code-blobs-")
+            self.blob_dir = self._temp_blobs.name
+
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.by_hash: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+
+    def load(self) -> bool:
+        """Load the manifest from disk. Returns True if a valid manifest was found."""
+        if not self.persist:
+            return False
+
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            display_warning(f"Ignoring unreadable context cache {self.manifest_path}: {e}")
+            return False
+
+        if manifest.get('version') != MANIFEST_VERSION or manifest.get('root') != str(self.root_directory):
+            return False
+
+        self.entries = manifest.get('files', {})
+        self.by_hash = {entry['hash']: entry for entry in self.entries.values() if 'hash' in entry}
+        self.dirty = False
+        return True
+
+    def save(self):
+        """Write the manifest to disk atomically if it changed."""
+        if not self.dirty or not self.persist:
+            return
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.manifest_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': MANIFEST_VERSION,
+                    'root': str(self.root_directory),
+                    'files': self.entries
+                }, f)
+            os.replace(tmp_path, self.manifest_path)
+            self.dirty = False
+        except OSError as e:
+            display_warning(f"Failed to save context cache: {e}")
+
+    def lookup(self, rel_path: str, size: int, mtime_ns: int) -> Optional[Dict[str, Any]]:
+        """Get the cached entry for a file if its metadata is unchanged."""
+        entry = self.entries.get(rel_path)
+        if entry and entry['size'] == size and entry['mtime_ns'] == mtime_ns:
+            return entry
+        return None
+
+    def lookup_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Get any cached entry with the given content hash, regardless of path or mtime."""
+        entry = self.by_hash.get(content_hash)
+        if entry and self.blob_path(content_hash).exists():
+            return entry
+        return None
+
+    def store(
+        self,
+        rel_path: str,
+        size: int,
+        mtime_ns: int,
+        content_hash: str,
+        length: int,
+        category: Optional[str] = None
+    ):
+        """Record a file whose decoded content has been written to the blob store.
+
+        ``category`` is the compaction category its content was flagged with, if any.
+        """
+        entry = {
+            'size': size,
+            'mtime_ns': mtime_ns,
+            'hash': content_hash,
+            'length': length,
+            'category': category
+        }
+        previous = self.lookup(rel_path, size, mtime_ns)
+        if previous and 'summary' in previous:
+            entry['summary'] = previous['summary']
+        self.entries[rel_path] = entry
+        self.by_hash[content_hash] = entry
+        self.dirty = True
+
+    def store_summary(self, rel_path: str, size: int, mtime_ns: int, summary: str):
+        """Record the data summary of a file ('' if it could not be summarized)."""
+        entry = self.lookup(rel_path, size, mtime_ns)
+        if entry is None:
+            entry = self.entries[rel_path] = {'size': size, 'mtime_ns': mtime_ns}
+        entry['summary'] = summary
+        self.dirty = True
+
+    def store_binary(self, rel_path: str, size: int, mtime_ns: int):
+        """Record a file whose content sniffed as binary so it is not re-read."""
+        self.entries[rel_path] = {
+            'size': size,
+            'mtime_ns': mtime_ns,
+            'binary': True
+        }
+        self.dirty = True
+
+    def is_known_binary(self, rel_path: str, size: int, mtime_ns: int) -> bool:
+        """Check whether an unchanged file was previously sniffed as binary."""
+        entry = self.lookup(rel_path, size, mtime_ns)
+        return bool(entry and entry.get('binary'))
+
+    def blob_path(self, content_hash: str) -> Path:
+        """Get the blob holding the decoded content for a hash."""
+        return blob_path(self.blob_dir, content_hash)
+
+    def read_content(self, content_hash: str) -> str:
+        """Load the decoded content for a hash."""
+        with open(self.blob_path(content_hash), 'r', encoding='utf-8', newline='') as f:
+            return f.read()
+
+    def retain(self, rel_paths):
+        """Drop entries for files that no longer exist in the workspace."""
+        keep = set(rel_paths)
+        stale = [path for path in self.entries if path not in keep]
+        for path in stale:
+            del self.entries[path]
+        if stale:
+            self.dirty = True
+
+    def prune_blobs(self):
+        """Delete blobs no longer referenced by any manifest entry."""
+        referenced = {entry['hash'] for entry in self.entries.values() if 'hash' in entry}
+        self.by_hash = {h: e for h, e in self.by_hash.items() if h in referenced}
+        try:
+            shards = list(os.scandir(self.blob_dir))
+        except OSError:
+            return
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            for blob in os.scandir(shard.path):
+                if blob.name not in referenced:
+                    try:
+                        os.remove(blob.path)
+                    except OSError:
+                        pass
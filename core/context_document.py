@@ -0,0 +1,119 @@
+"""Segmented project context that is only materialized at request time."""
+
+import mmap
+from pathlib import Path
+from typing import Iterator, List, Union
+
+
+class BlobSegment:
+    """A reference to decoded file content stored in the context cache's blob store."""
+
+    __slots__ = ('path', 'length')
+
+    def __init__(self, path: Path, length: int):
+        """Initialize with the blob location and its length in characters."""
+        self.path = path
+        self.length = length
+
+    def read(self) -> str:
+        """Load the blob through a read-only memory map."""
+        if self.length == 0:
+            return ""
+        with open(self.path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return str(mapped, 'utf-8')
+
+
+class VolatileText(str):
+    """Text that can differ between otherwise identical requests, such as model-written summaries.
+
+    It is sent like any other text but left out of ``stable_text``.
+    """
+
+    __slots__ = ()
+
+
+Segment = Union[str, BlobSegment]
+
+
+class ContextDocument:
+    """Ordered text and blob segments forming one prompt message.
+
+    File contents stay on disk as blob references until ``materialize`` is
+    called when a request is built; the document itself only holds the
+    small text segments (headers, tree, separators). ``len()`` gives the
+    materialized length in characters without loading anything.
+    """
+
+    def __init__(self, segments: List[Segment] = None):
+        """Initialize with an optional list of segments."""
+        self.segments: List[Segment] = []
+        self._length = 0
+        for segment in segments or []:
+            self._append(segment)
+
+    def append_text(self, text: str):
+        """Append literal text, merging it into a preceding text segment."""
+        if not text:
+            return
+        if self.segments and type(self.segments[-1]) is str:
+            self.segments[-1] += text
+            self._length += len(text)
+        else:
+            self._append(text)
+
+    def append_volatile(self, text: str):
+        """Append text that is left out of ``stable_text``."""
+        if text:
+            self._append(VolatileText(text))
+
+    def append_blob(self, path: Path, length: int):
+        """Append a reference to stored file content."""
+        self._append(BlobSegment(path, length))
+
+    def extend(self, other: 'ContextDocument'):
+        """Append all segments of another document."""
+        for segment in other.segments:
+            if type(segment) is str:
+                self.append_text(segment)
+            else:
+                self._append(segment)
+
+    @classmethod
+    def from_template(cls, template: str, placeholder: str, body: 'ContextDocument') -> 'ContextDocument':
+        """Substitute a document for a placeholder in a template without materializing it."""
+        before, _, after = template.partition(placeholder)
+        document = cls()
+        document.append_text(before)
+        document.extend(body)
+        document.append_text(after)
+        return document
+
+    def iter_text(self) -> Iterator[str]:
+        """Yield the document's text one segment at a time."""
+        for segment in self.segments:
+            yield segment if isinstance(segment, str) else segment.read()
+
+    def materialize(self) -> str:
+        """Build the full text of the document."""
+        return "".join(self.iter_text())
+
+    def stable_text(self) -> str:
+        """Build the text of the document without its volatile segments."""
+        return "".join(
+            segment if isinstance(segment, str) else segment.read()
+            for segment in self.segments if not isinstance(segment, VolatileText)
+        )
+
+    def _append(self, segment: Segment):
+        self.segments.append(segment)
+        self._length += len(segment) if isinstance(segment, str) else segment.length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __str__(self) -> str:
+        return self.materialize()
+
+    def __contains__(self, text: str) -> bool:
+        return any(text in piece for piece in self.iter_text())
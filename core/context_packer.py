@@ -0,0 +1,89 @@
+"""Token-budgeted packing of workspace files into the project context."""
+
+from pathlib import PurePosixPath
+from typing import List, Tuple
+
+from tools.workspace_walker import WalkEntry
+
+
+# Rough average used to turn the token budget into a character budget, as files are selected unread
+CHARS_PER_TOKEN = 4
+
+ENTRY_POINT_NAMES = {
+    'main.py', '__main__.py', 'app.py', 'manage.py', 'setup.py', 'pyproject.toml',
+    'requirements.txt', 'package.json', 'index.html', 'index.js', 'index.ts',
+    'server.js', 'main.go', 'main.rs', 'cargo.toml', 'go.mod', 'makefile',
+    'dockerfile', 'docker-compose.yml', 'readme.md'
+}
+SOURCE_EXTENSIONS = {
+    '.py', '.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs', '.html', '.css', '.scss',
+    '.go', '.rs', '.java', '.kt', '.c', '.h', '.cc', '.cpp', '.hpp', '.cs',
+    '.rb', '.php', '.swift', '.sh', '.sql', '.vue', '.svelte'
+}
+DATA_EXTENSIONS = {
+    '.csv', '.tsv', '.json', '.jsonl', '.ndjson', '.xml', '.log', '.dat',
+    '.parquet', '.sqlite', '.db', '.lock', '.map'
+}
+
+
+class ContextPacker:
+    """Chooses which files are included in full within a token budget.
+
+    Selection uses walk metadata only, so files that do not fit are never
+    read and the packed context never exceeds the budget. File size in
+    bytes is an upper bound on its decoded character count.
+    """
+
+    def __init__(self, max_tokens: int = 100000, max_file_size: int = 1024 * 1024):
+        """Initialize the packer with its token budget."""
+        self.max_tokens = max_tokens
+        self.max_file_size = max_file_size
+
+    @property
+    def max_chars(self) -> int:
+        """Get the character budget corresponding to the token budget."""
+        return self.max_tokens * CHARS_PER_TOKEN
+
+    def rank(self, files: List[WalkEntry]) -> List[WalkEntry]:
+        """Order files by how useful they are to include in full."""
+        return sorted(files, key=self._rank_key)
+
+    def pack(self, files: List[WalkEntry], reserved_chars: int = 0) -> Tuple[List[WalkEntry], List[WalkEntry]]:
+        """Split files into those included in full and those listed as stubs.
+
+        ``reserved_chars`` accounts for the header and directory tree that
+        share the budget with file contents. Both lists preserve the order
+        of ``files``.
+        """
+        remaining = self.max_chars - reserved_chars
+        selected = set()
+
+        for entry in self.rank(files):
+            cost = entry.size + len(entry.path) + 16  # Content plus its file header line
+            if entry.size <= self.max_file_size and cost <= remaining:
+                selected.add(entry.path)
+                remaining -= cost
+
+        # Keep the walk order in both lists so the context reads like the tree
+        included = [entry for entry in files if entry.path in selected]
+        omitted = [entry for entry in files if entry.path not in selected]
+        return included, omitted
+
+    def _rank_key(self, entry: WalkEntry):
+        """Sort key: entry points, then source, docs/config and data; small and recent first."""
+        path = PurePosixPath(entry.path)
+        name = path.name.lower()
+        suffix = path.suffix.lower()
+
+        if name in ENTRY_POINT_NAMES:
+            tier = 0
+        elif suffix in SOURCE_EXTENSIONS:
+            tier = 1
+        elif suffix in DATA_EXTENSIONS:
+            tier = 3
+        else:
+            tier = 2
+
+        # Group sizes by order of magnitude so recency decides among similar files
+        size_bucket = entry.size.bit_length() // 2
+        return (tier, size_bucket, -entry.mtime_ns, entry.path)
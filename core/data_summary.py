@@ -0,0 +1,422 @@
+"""Single-pass, bounded-memory summaries of CSV and JSON data files for the project context."""
+
+import csv
+import json
+import re
+from collections import deque
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from tools.content_sniffer import sniff_file
+
+
+TABULAR_EXTENSIONS = {'.csv', '.tsv'}
+JSON_EXTENSIONS = {'.json'}
+JSON_LINES_EXTENSIONS = {'.jsonl', '.ndjson'}
+DATA_SUMMARY_EXTENSIONS = TABULAR_EXTENSIONS | JSON_EXTENSIONS | JSON_LINES_EXTENSIONS
+
+# Project configuration that happens to be JSON is kept verbatim
+CONFIG_JSON_NAMES = {
+    'package.json', 'package-lock.json', 'tsconfig.json', 'jsconfig.json', 'composer.json',
+    'manifest.json', 'app.json', 'settings.json', 'launch.json', 'tasks.json', '.eslintrc.json',
+    '.prettierrc.json', 'babel.config.json', 'vercel.json', 'firebase.json', 'angular.json'
+}
+
+SAMPLE_ROWS = 3
+MAX_COLUMNS = 50
+MAX_VALUE_CHARS = 40
+MAX_SAMPLE_CHARS = 300
+READ_CHUNK_CHARS = 64 * 1024
+MAX_VALUE_CHARS_BUFFERED = 32 * 1024 * 1024  # Largest single JSON value decoded in memory
+MAX_STREAM_DEPTH = 2  # Containers nested deeper than this are decoded whole
+
+NULL_STRINGS = {'', 'na', 'n/a', 'nan', 'null', 'none', 'nil', '-'}
+_FLOAT_PATTERN = re.compile(r'^[+-]?(\d+\.\d*|\.\d+|\d+)([eE][+-]?\d+)?$')
+_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?)?$')
+
+
+def is_data_file(path: str) -> bool:
+    """Check whether a file should be summarized rather than included verbatim."""
+    name = PurePosixPath(path).name.lower()
+    return PurePosixPath(name).suffix in DATA_SUMMARY_EXTENSIONS and name not in CONFIG_JSON_NAMES
+
+
+def _clip(text: str, limit: int = MAX_VALUE_CHARS) -> str:
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+class ColumnStats:
+    """Running statistics for one column or field: null count, type and range."""
+
+    def __init__(self):
+        self.count = 0
+        self.nulls = 0
+        self.types: Dict[str, int] = {}
+        self.minimum: Any = None
+        self.maximum: Any = None
+
+    def add_text(self, value: str):
+        """Add a value read from a delimited file, inferring its type."""
+        stripped = value.strip()
+        lowered = stripped.lower()
+        if lowered in NULL_STRINGS:
+            self.nulls += 1
+            return
+        # Numbers and dates start with a digit or sign; everything else skips those checks
+        first = stripped[0]
+        if first.isdecimal() or first in '+-.':
+            digits = stripped[1:] if first in '+-' else stripped
+            if digits.isdecimal():
+                self._add('int', int(stripped))
+            elif _FLOAT_PATTERN.match(stripped):
+                self._add('float', float(stripped))
+            elif _DATE_PATTERN.match(stripped):
+                self._add('date', stripped)
+            else:
+                self._add('str', stripped)
+        elif lowered in ('true', 'false'):
+            self._add('bool', lowered)
+        else:
+            self._add('str', stripped)
+
+    def add_json(self, value: Any):
+        """Add a decoded JSON value."""
+        if value is None:
+            self.nulls += 1
+        elif isinstance(value, bool):
+            self._add('bool', str(value).lower())
+        elif isinstance(value, int):
+            self._add('int', value)
+        elif isinstance(value, float):
+            self._add('float', value)
+        elif isinstance(value, str):
+            self._add('date' if _DATE_PATTERN.match(value) else 'str', value)
+        elif isinstance(value, list):
+            self._add('array', len(value))
+        else:
+            self._add('object', None)
+
+    def missing(self, count: int = 1):
+        """Count records where the field is absent."""
+        self.nulls += count
+
+    @property
+    def dtype(self) -> str:
+        """Get the inferred type, widening int to float and naming mixed types."""
+        kinds = set(self.types)
+        if not kinds:
+            return 'null'
+        if kinds == {'int', 'float'}:
+            return 'float'
+        if len(kinds) == 1:
+            return kinds.pop()
+        return "mixed(" + ",".join(sorted(kinds, key=lambda kind: -self.types[kind])) + ")"
+
+    def describe(self) -> str:
+        """Render the statistics as a short phrase."""
+        parts = [self.dtype]
+        if self.minimum is not None and self.dtype in ('int', 'float', 'date', 'str'):
+            parts.append(f"min {_clip(str(self.minimum))}, max {_clip(str(self.maximum))}")
+        elif self.dtype == 'array' and self.minimum is not None:
+            parts.append(f"length {self.minimum}-{self.maximum}")
+        if self.nulls:
+            parts.append(f"{self.nulls} null")
+        return ", ".join(parts)
+
+    def _add(self, kind: str, value: Any):
+        self.count += 1
+        self.types[kind] = self.types.get(kind, 0) + 1
+        if value is None:
+            return
+        numeric = kind in ('int', 'float', 'array')
+        if self.minimum is not None and isinstance(self.minimum, (int, float)) != numeric:
+            return  # Keep the range of the first type seen
+        if isinstance(value, str):
+            value = value[:MAX_VALUE_CHARS]
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+
+class RecordStats:
+    """Statistics over a stream of records (CSV rows or JSON objects) plus head and tail samples."""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns: Dict[str, ColumnStats] = {}
+        self.columns_truncated = False
+        self.head: List[Any] = []
+        self.tail: Deque[Any] = deque(maxlen=SAMPLE_ROWS)  # Rendered only when described
+
+    def columns_for(self, names: List[str]) -> List[Optional[ColumnStats]]:
+        """Resolve column names once, for rows added with ``add_row``."""
+        return [self._column(name) for name in names]
+
+    def add_row(self, columns: List[Optional[ColumnStats]], row: List[str]):
+        """Add a delimited row whose values line up with ``columns``."""
+        for column, value in zip(columns, row):
+            if column is not None:
+                column.add_text(value)
+        for column in columns[len(row):]:
+            if column is not None:
+                column.missing()
+        self._sample(row)
+
+    def add_record(self, record: Any):
+        """Add a decoded JSON record, flattening nested objects into dotted field names."""
+        if isinstance(record, dict):
+            seen = set()
+            for name, value in self._flatten(record, ""):
+                column = self._column(name)
+                if column is not None:
+                    column.add_json(value)
+                    seen.add(name)
+            for name, column in self.columns.items():
+                if name not in seen:
+                    column.missing()
+        else:
+            column = self._column("(value)")
+            if column is not None:
+                column.add_json(record)
+        self._sample(record)
+
+    def describe(self, indent: str = "", render: Callable[[Any], str] = None) -> List[str]:
+        """Render the statistics as summary lines."""
+        lines = []
+        for name, column in self.columns.items():
+            lines.append(f"{indent}  {name}: {column.describe()}")
+        if self.columns_truncated:
+            lines.append(f"{indent}  ... more fields not shown (limit {MAX_COLUMNS})")
+        render = render or (lambda record: json.dumps(record, ensure_ascii=False, default=str))
+        if self.head:
+            lines.append(f"{indent}first {len(self.head)}:")
+            lines.extend(f"{indent}  {_clip(render(row), MAX_SAMPLE_CHARS)}" for row in self.head)
+        if self.rows > SAMPLE_ROWS:
+            tail = list(self.tail)[-min(SAMPLE_ROWS, self.rows - SAMPLE_ROWS):]
+            lines.append(f"{indent}last {len(tail)}:")
+            lines.extend(f"{indent}  {_clip(render(row), MAX_SAMPLE_CHARS)}" for row in tail)
+        return lines
+
+    def _column(self, name: str) -> Optional[ColumnStats]:
+        column = self.columns.get(name)
+        if column is None:
+            if len(self.columns) >= MAX_COLUMNS:
+                self.columns_truncated = True
+                return None
+            column = self.columns[name] = ColumnStats()
+            column.missing(self.rows)  # Absent from every earlier record
+        return column
+
+    def _sample(self, record: Any):
+        self.rows += 1
+        if len(self.head) < SAMPLE_ROWS:
+            self.head.append(record)
+        else:
+            self.tail.append(record)
+
+    def _flatten(self, record: Dict[str, Any], prefix: str) -> Iterator[Tuple[str, Any]]:
+        for key, value in record.items():
+            name = f"{prefix}{key}"
+            if isinstance(value, dict) and value and name.count('.') < 2:
+                yield from self._flatten(value, f"{name}.")
+            else:
+                yield name, value
+
+
+def summarize_tabular(path: Path, encoding: Optional[str]) -> str:
+    """Summarize a CSV/TSV file in one streaming pass."""
+    with open(path, 'r', encoding=encoding or 'utf-8', errors='replace', newline='') as f:
+        sample = f.read(READ_CHUNK_CHARS)
+        f.seek(0)
+        if path.suffix.lower() == '.tsv':
+            dialect = csv.excel_tab
+        else:
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+            except csv.Error:
+                dialect = csv.excel
+        try:
+            has_header = csv.Sniffer().has_header(sample)
+        except csv.Error:
+            has_header = True
+
+        reader = csv.reader(f, dialect)
+        first = next(reader, None)
+        if first is None:
+            return "empty file"
+        names = first if has_header else [f"column_{i + 1}" for i in range(len(first))]
+        names = [name.strip() or f"column_{i + 1}" for i, name in enumerate(names)]
+
+        stats = RecordStats()
+        columns = stats.columns_for(names)
+        delimiter = dialect.delimiter
+        if not has_header:
+            stats.add_row(columns, first)
+        for row in reader:
+            if row:
+                stats.add_row(columns, row)
+
+    delimiter_name = {'\t': 'tab', ',': 'comma'}.get(delimiter, repr(delimiter))
+    lines = [f"table: {stats.rows} rows x {len(names)} columns ({delimiter_name}-delimited"
+             f"{', header row' if has_header else ', no header'})", "columns:"]
+    lines.extend(stats.describe(render=delimiter.join))
+    return "\n".join(lines)
+
+
+class _JsonStream:
+    """Incremental JSON reader that decodes one value at a time from a buffered file."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def peek(self) -> str:
+        """Get the next non-whitespace character without consuming it ('' at end of input)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def take(self, expected: str):
+        """Consume the next non-whitespace character, which must be ``expected``."""
+        if self.peek() != expected:
+            raise ValueError(f"expected '{expected}' at offset {self.pos}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if len(self.buffer) - self.pos > MAX_VALUE_CHARS_BUFFERED:
+                    raise ValueError("JSON value too large to summarize")
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self.buffer[end - 1] not in '"]}el':
+                if self._fill():
+                    continue
+            self.pos = end
+            return value
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(READ_CHUNK_CHARS)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop consumed input so memory stays bounded by the largest single value
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+
+def _summarize_json_value(stream: _JsonStream, path: str, depth: int, lines: List[str]):
+    """Stream one JSON value, describing containers and streaming arrays record by record."""
+    start = stream.peek()
+    if start == '[' and depth <= MAX_STREAM_DEPTH:
+        stream.take('[')
+        stats = RecordStats()
+        kinds = set()
+        if stream.peek() != ']':
+            while True:
+                record = stream.value()
+                kinds.add(type(record).__name__)
+                stats.add_record(record)
+                if stream.peek() == ',':
+                    stream.take(',')
+                    continue
+                break
+        stream.take(']')
+        kind = "objects" if kinds == {'dict'} else "values"
+        lines.append(f"{path}: array of {stats.rows} {kind}")
+        lines.extend(stats.describe("  "))
+    elif start == '{' and depth < MAX_STREAM_DEPTH:
+        stream.take('{')
+        keys = []
+        nested: List[str] = []
+        if stream.peek() != '}':
+            while True:
+                key = stream.value()
+                stream.take(':')
+                keys.append(str(key))
+                child = f"{path}.{key}"
+                if stream.peek() in '[{':
+                    _summarize_json_value(stream, child, depth + 1, nested)
+                else:
+                    column = ColumnStats()
+                    column.add_json(stream.value())
+                    nested.append(f"{child}: {column.describe()}")
+                if stream.peek() == ',':
+                    stream.take(',')
+                    continue
+                break
+        stream.take('}')
+        shown = ", ".join(_clip(key, 30) for key in keys[:MAX_COLUMNS])
+        more = f", ... {len(keys) - MAX_COLUMNS} more" if len(keys) > MAX_COLUMNS else ""
+        lines.append(f"{path}: object with {len(keys)} keys ({shown}{more})")
+        lines.extend(nested)
+    else:
+        value = stream.value()
+        if isinstance(value, (dict, list)):
+            lines.append(f"{path}: {type(value).__name__} {_clip(json.dumps(value, default=str), MAX_SAMPLE_CHARS)}")
+        else:
+            column = ColumnStats()
+            column.add_json(value)
+            lines.append(f"{path}: {column.describe()}")
+
+
+def summarize_json(path: Path, encoding: Optional[str]) -> str:
+    """Summarize a JSON document, streaming top-level containers and arrays of records."""
+    lines: List[str] = []
+    with open(path, 'r', encoding=encoding or 'utf-8', errors='replace') as f:
+        stream = _JsonStream(f)
+        _summarize_json_value(stream, "$", 0, lines)
+        if stream.peek():
+            lines.append("(trailing content after the JSON document)")
+    return "\n".join(lines)
+
+
+def summarize_json_lines(path: Path, encoding: Optional[str]) -> str:
+    """Summarize a JSON Lines file record by record."""
+    stats = RecordStats()
+    invalid = 0
+    with open(path, 'r', encoding=encoding or 'utf-8', errors='replace') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                stats.add_record(json.loads(line))
+            except ValueError:
+                invalid += 1
+    lines = [f"records: {stats.rows} JSON lines" + (f" ({invalid} invalid)" if invalid else ""), "fields:"]
+    lines.extend(stats.describe())
+    return "\n".join(lines)
+
+
+def summarize_data_file(path: Path) -> Optional[str]:
+    """Summarize a data file in one pass; returns None if it cannot be parsed."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    try:
+        encoding = sniff_file(path).encoding
+        if suffix in TABULAR_EXTENSIONS:
+            return summarize_tabular(path, encoding)
+        if suffix in JSON_LINES_EXTENSIONS:
+            return summarize_json_lines(path, encoding)
+        if suffix in JSON_EXTENSIONS:
+            return summarize_json(path, encoding)
+    except (OSError, ValueError, csv.Error, RecursionError):
+        return None
+    return None
@@ -0,0 +1,350 @@
+"""Local stand-ins for the Gemini API, for exercising Agent Code without network access.
+
+``FakeGeminiClient`` can be passed to ``GeminiClient`` instead of a real
+``genai.Client`` to exercise prompt caching. It answers
+``aio.models.generate_content`` / ``generate_content_stream`` with a canned
+reply and implements ``aio.caches`` in memory, reporting usage the way the
+API does: ``prompt_token_count`` counts the whole prompt, and
+``cached_content_token_count`` counts the tokens served from a cache, either
+the referenced cached content or (like implicit caching) the prefix shared
+with the previous request.
+
+``FakeGeminiServer`` serves the REST API over local HTTP, so the real SDK
+and its error handling are used (point ``GEMINI_BASE_URL`` at its ``url``).
+It answers from a ``MockScript``, streaming at the script's rate. It
+enforces a requests-per-minute limit (a token bucket refilling
+continuously up to one minute's worth) with 429 responses carrying retry
+hints, and can be scripted to fail the next requests. A fraction of
+requests can stall before answering, to simulate a latency tail.
+``FakeServerClient`` is a ``GeminiClient`` that owns such a server and
+stops it when closed.
+"""
+
+import asyncio
+import copy
+import itertools
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.genai import types
+
+from config.settings import Config
+from core.context_packer import CHARS_PER_TOKEN
+from core.gemini_client import GeminiClient
+from core.mock_backend import MockScript
+
+# Implicit caching only applies to shared prefixes of at least this many tokens
+IMPLICIT_MIN_TOKENS = 1024
+DEFAULT_REPLY = "<narration>Done.</narration>\n<command>[CMD:FINISH]</command><o>Done.</o>"
+
+
+def _tokens(chars: int) -> int:
+    return -(-chars // CHARS_PER_TOKEN)
+
+
+def _common_prefix(a: str, b: str) -> int:
+    """Length of the common prefix of two strings."""
+    low, high = 0, min(len(a), len(b))
+    while low < high:  # Binary search on slice equality, fast for long prompts
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class FakeCaches:
+    """In-memory ``aio.caches``."""
+
+    def __init__(self):
+        self.entries: Dict[str, Tuple[str, float]] = {}  # Name -> (system text, expiry)
+        self._ids = itertools.count(1)
+
+    async def create(self, model: str, config: types.CreateCachedContentConfig) -> types.CachedContent:
+        name = f"cachedContents/fake-{next(self._ids)}"
+        ttl = float(str(config.ttl or "3600s").rstrip('s'))
+        self.entries[name] = (str(config.system_instruction), time.monotonic() + ttl)
+        return types.CachedContent(name=name, model=model, display_name=config.display_name)
+
+    async def delete(self, name: str):
+        if self.entries.pop(name, None) is None:
+            raise RuntimeError(f"404 NOT_FOUND: cached content {name} not found")
+
+    def lookup(self, name: str) -> str:
+        entry = self.entries.get(name)
+        if entry is None or entry[1] < time.monotonic():
+            raise RuntimeError(f"404 NOT_FOUND: cached content {name} not found or expired")
+        return entry[0]
+
+
+class FakeModels:
+    """Canned ``aio.models`` that reports cache usage."""
+
+    def __init__(self, caches: FakeCaches, reply: Callable[[List[types.Content]], str],
+                 prefill_seconds_per_1k_tokens: float):
+        self.caches = caches
+        self.reply = reply
+        self.prefill_seconds_per_1k_tokens = prefill_seconds_per_1k_tokens
+        self.previous_prompt = ""
+        self.requests: List[Dict[str, Any]] = []
+
+    async def get(self, model: str) -> types.Model:
+        return types.Model(name=f"models/{model}")
+
+    async def generate_content(self, model: str, contents: List[types.Content],
+                               config: Optional[types.GenerateContentConfig] = None) -> types.GenerateContentResponse:
+        usage = await self._prefill(contents, config)
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(
+                content=types.Content(role='model', parts=[types.Part(text=self.reply(contents))]),
+                finish_reason=types.FinishReason.STOP
+            )],
+            usage_metadata=usage
+        )
+
+    async def generate_content_stream(self, model: str, contents: List[types.Content],
+                                      config: Optional[types.GenerateContentConfig] = None):
+        usage = await self._prefill(contents, config)
+        text = self.reply(contents)
+
+        async def chunks():
+            pieces = [text[i:i + 32] for i in range(0, len(text), 32)] or [""]
+            for i, piece in enumerate(pieces):
+                last = i == len(pieces) - 1
+                yield types.GenerateContentResponse(
+                    candidates=[types.Candidate(
+                        content=types.Content(role='model', parts=[types.Part(text=piece)]),
+                        finish_reason=types.FinishReason.STOP if last else None
+                    )],
+                    usage_metadata=usage if last else None
+                )
+                await asyncio.sleep(0)
+
+        return chunks()
+
+    async def _prefill(self, contents: List[types.Content],
+                       config: Optional[types.GenerateContentConfig]) -> types.GenerateContentResponseUsageMetadata:
+        """Serialize the prompt as the model sees it and work out which tokens were cached."""
+        system = ""
+        explicit_chars = 0
+        if config is not None and config.cached_content:
+            system = self.caches.lookup(config.cached_content)
+            explicit_chars = len(system)
+        elif config is not None and config.system_instruction:
+            system = str(config.system_instruction)
+        prompt = system + "".join(
+            f"\x1e{content.role}\x1f" + "".join(part.text or "" for part in content.parts or [])
+            for content in contents
+        )
+
+        implicit_chars = _common_prefix(prompt, self.previous_prompt)
+        if _tokens(implicit_chars) < IMPLICIT_MIN_TOKENS:
+            implicit_chars = 0
+        self.previous_prompt = prompt
+
+        prompt_tokens = _tokens(len(prompt))
+        cached_tokens = min(prompt_tokens, _tokens(max(explicit_chars, implicit_chars)))
+        self.requests.append({'prompt_tokens': prompt_tokens, 'cached_tokens': cached_tokens,
+                              'explicit': bool(explicit_chars)})
+        if self.prefill_seconds_per_1k_tokens:
+            await asyncio.sleep((prompt_tokens - cached_tokens) / 1000 * self.prefill_seconds_per_1k_tokens)
+        return types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            cached_content_token_count=cached_tokens or None,
+            candidates_token_count=_tokens(len(self.reply(contents)))
+        )
+
+
+class FakeAio:
+    def __init__(self, models: FakeModels, caches: FakeCaches):
+        self.models = models
+        self.caches = caches
+
+
+class FakeGeminiClient:
+    """Drop-in for ``genai.Client`` covering the calls GeminiClient makes."""
+
+    def __init__(self, reply: Callable[[List[types.Content]], str] = None, prefill_seconds_per_1k_tokens: float = 0.0):
+        """Initialize with an optional reply function and simulated prefill time for uncached tokens."""
+        self.caches = FakeCaches()
+        self.models = FakeModels(self.caches, reply or (lambda contents: DEFAULT_REPLY), prefill_seconds_per_1k_tokens)
+        self.aio = FakeAio(self.models, self.caches)
+
+
+class FakeGeminiServer:
+    """The generateContent, streamGenerateContent and models.get REST endpoints on a local port."""
+
+    def __init__(self, script: MockScript = None, requests_per_minute: int = 0,
+                 stall_probability: float = 0.0, stall_seconds: float = 0.0, seed: Optional[int] = None):
+        """Initialize with the script to answer from, a rate limit and how often and long requests stall."""
+        self.script = script or MockScript([DEFAULT_REPLY])
+        self.requests_per_minute = requests_per_minute
+        self.stall_probability = stall_probability
+        self.stall_seconds = stall_seconds
+        self._random = random.Random(seed)
+        self.status_counts: Dict[int, int] = {}
+        self._allowance = float(requests_per_minute)
+        self._updated = time.monotonic()
+        self._scripted: deque = deque()  # (status, retry delay) for the next requests
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> 'FakeGeminiServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-gemini", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeGeminiServer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def fail_next(self, status: int, count: int = 1, retry_delay: Optional[float] = None):
+        """Answer the next ``count`` generation requests with ``status`` (and a RetryInfo hint if given)."""
+        with self._lock:
+            self._scripted.extend([(status, retry_delay)] * count)
+
+    def _admit(self) -> Tuple[int, Optional[float]]:
+        """Decide the status of a generation request: a scripted failure, a rate limit 429 or 200."""
+        with self._lock:
+            if self._scripted:
+                return self._scripted.popleft()
+            if not self.requests_per_minute:
+                return 200, None
+            now = time.monotonic()
+            rate = self.requests_per_minute / 60
+            self._allowance = min(self._allowance + (now - self._updated) * rate, self.requests_per_minute)
+            self._updated = now
+            if self._allowance < 1:
+                return 429, (1 - self._allowance) / rate
+            self._allowance -= 1
+            return 200, None
+
+    def _stall(self) -> float:
+        """Decide how long a request waits before its first byte beyond the script's latency."""
+        with self._lock:
+            return self.stall_seconds if self._random.random() < self.stall_probability else 0.0
+
+    def _count(self, status: int):
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client gave up on the request, such as the slower of a hedged pair
+
+            def do_GET(self):
+                model = self.path.split('?')[0].rsplit('/', 1)[-1]
+                self._send_json(200, {'name': f"models/{model}", 'displayName': model})
+
+            def do_POST(self):
+                length = int(self.headers.get('content-length') or 0)
+                request = json.loads(self.rfile.read(length) or b'{}')
+                path = self.path.split('?')[0]
+                if not (path.endswith(':generateContent') or path.endswith(':streamGenerateContent')):
+                    self._send_json(404, {'error': {'code': 404, 'message': f"Unknown path {path}",
+                                                    'status': 'NOT_FOUND'}})
+                    return
+
+                status, retry_delay = server._admit()
+                server._count(status)
+                if status != 200:
+                    self._send_error(status, retry_delay)
+                    return
+
+                user_texts = [
+                    part.get('text', '') for content in request.get('contents', [])
+                    if content.get('role') == 'user' for part in content.get('parts', [])
+                ]
+                text = server.script.reply(user_texts[-1] if user_texts else "")
+                usage = {
+                    'promptTokenCount': _tokens(length),
+                    'candidatesTokenCount': _tokens(len(text)),
+                    'totalTokenCount': _tokens(length) + _tokens(len(text))
+                }
+                time.sleep(server.script.latency_seconds + server._stall())
+
+                if path.endswith(':streamGenerateContent'):
+                    self.send_response(200)
+                    self.send_header('content-type', 'text/event-stream')
+                    self.end_headers()
+                    chunks = server.script.chunks(text)
+                    for i, chunk in enumerate(chunks):
+                        time.sleep(server.script.chunk_seconds(chunk))
+                        event = {'candidates': [{'content': {'role': 'model', 'parts': [{'text': chunk}]}}]}
+                        if i == len(chunks) - 1:
+                            event['candidates'][0]['finishReason'] = 'STOP'
+                            event['usageMetadata'] = usage
+                        self.wfile.write(f"data: {json.dumps(event)}\r\n\r\n".encode())
+                        self.wfile.flush()
+                else:
+                    time.sleep(sum(map(server.script.chunk_seconds, server.script.chunks(text))))
+                    self._send_json(200, {
+                        'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}, 'finishReason': 'STOP'}],
+                        'usageMetadata': usage
+                    })
+
+            def _send_error(self, status: int, retry_delay: Optional[float]):
+                error = {'code': status, 'message': f"Fake error {status}", 'status': {
+                    429: 'RESOURCE_EXHAUSTED', 500: 'INTERNAL', 503: 'UNAVAILABLE'
+                }.get(status, 'UNKNOWN')}
+                if retry_delay is not None:
+                    error['message'] = f"Quota exceeded. Please retry in {retry_delay:.1f}s."
+                    error['details'] = [{'@type': 'type.googleapis.com/google.rpc.RetryInfo',
+                                         'retryDelay': f"{retry_delay:.3f}s"}]
+                self._send_json(status, {'error': error})
+
+            def _send_json(self, status: int, payload: Dict[str, Any]):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('content-type', 'application/json')
+                self.send_header('content-length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+class FakeServerClient(GeminiClient):
+    """A ``GeminiClient`` talking to a ``FakeGeminiServer`` it owns, which is stopped when the client closes."""
+
+    def __init__(self, config: Config, server: FakeGeminiServer):
+        """Initialize a client pointed at a started server."""
+        config = copy.copy(config)
+        config.gemini_base_url = server.url
+        config.gemini_api_key = config.gemini_api_key or "mock"
+        super().__init__(config)
+        self.server = server
+
+    async def close(self):
+        """Close the client, then stop the server."""
+        try:
+            await super().close()
+        finally:
+            self.server.stop()
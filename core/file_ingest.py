@@ -0,0 +1,120 @@
+"""Bounded-concurrency file ingestion for the project context builder."""
+
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple
+
+from core.compaction import classify_content
+from core.context_cache import hash_content, write_blob
+from tools.content_sniffer import SNIFF_BLOCK_SIZE, sniff_bytes, decode_text
+
+
+def ingest_batch(paths: List[str], blob_dir: str) -> List[Dict[str, Any]]:
+    """Read, decode and hash a batch of files, storing decoded content in ``blob_dir``.
+
+    Each file's first block is sniffed before the rest is read, so binary
+    files cost a single block read. Only the hash and decoded length are
+    returned, along with the compaction category of the content, so content
+    never travels back to the caller. Module-level so it can run in either
+    a thread or a worker process.
+    """
+    results = []
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                head = f.read(SNIFF_BLOCK_SIZE)
+                sniff = sniff_bytes(head)
+                if sniff.is_binary:
+                    results.append({'binary': True})
+                    continue
+                data = head + f.read()
+            content = decode_text(data, sniff.encoding)
+            content_hash = hash_content(data)
+            write_blob(blob_dir, content_hash, content)
+            results.append({
+                'hash': content_hash,
+                'length': len(content),
+                'category': classify_content(content)
+            })
+        except Exception as e:
+            results.append({'error': str(e)})
+    return results
+
+
+class FileIngestor:
+    """Reads many files at once with a bound on in-flight executor jobs.
+
+    Files smaller than ``small_file_size`` are grouped into batches of up to
+    ``batch_bytes`` so a single executor job reads many of them, avoiding a
+    thread hop per file. When the job list reaches ``process_pool_threshold``
+    files, decoding and hashing move to a process pool.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 32,
+        small_file_size: int = 64 * 1024,
+        batch_bytes: int = 512 * 1024,
+        batch_max_files: int = 256,
+        process_pool_threshold: int = 20000
+    ):
+        """Initialize the ingestor with its concurrency limits."""
+        self.max_concurrency = max(1, max_concurrency)
+        self.small_file_size = small_file_size
+        self.batch_bytes = batch_bytes
+        self.batch_max_files = batch_max_files
+        self.process_pool_threshold = process_pool_threshold
+
+    async def ingest(self, jobs: List[Tuple[str, int]], blob_dir: str) -> List[Dict[str, Any]]:
+        """Ingest ``(absolute_path, size)`` jobs into a blob store, returning results in job order."""
+        if not jobs:
+            return []
+
+        batches = self._make_batches(jobs)
+        results: List[Dict[str, Any]] = [None] * len(jobs)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop = asyncio.get_running_loop()
+
+        with self._create_executor(len(jobs)) as executor:
+            async def run_batch(indices: List[int]):
+                async with semaphore:
+                    batch_results = await loop.run_in_executor(
+                        executor, ingest_batch, [jobs[i][0] for i in indices], blob_dir
+                    )
+                for index, result in zip(indices, batch_results):
+                    results[index] = result
+
+            await asyncio.gather(*(run_batch(indices) for indices in batches))
+
+        return results
+
+    def _create_executor(self, job_count: int) -> Executor:
+        """Pick a process pool for very large trees and a thread pool otherwise."""
+        if job_count >= self.process_pool_threshold and (os.cpu_count() or 1) > 1:
+            return ProcessPoolExecutor(max_workers=min(self.max_concurrency, os.cpu_count()))
+        return ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="ingest")
+
+    def _make_batches(self, jobs: List[Tuple[str, int]]) -> List[List[int]]:
+        """Group job indices so small files share an executor job."""
+        batches = []
+        current: List[int] = []
+        current_bytes = 0
+
+        for index, (_, size) in enumerate(jobs):
+            if size >= self.small_file_size:
+                batches.append([index])
+                continue
+
+            if current and (current_bytes + size > self.batch_bytes or len(current) >= self.batch_max_files):
+                batches.append(current)
+                current = []
+                current_bytes = 0
+
+            current.append(index)
+            current_bytes += size
+
+        if current:
+            batches.append(current)
+
+        return batches
@@ -1,30 +1,84 @@
 """Gemini API client wrapper for Agent Code."""
 
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Any, Optional, Tuple
 import google.genai as genai
 from google.genai import types
 
 from rich.console import Console
 from config.settings import Config
-from ui.display import display_error, display_info
+from core.context_document import ContextDocument
+from core.hedging import Hedger
+from core.prompt_cache import PromptCache, PromptCacheStats
+from core.retry_policy import RetryPolicy, describe_error, shared_bucket, status_code
+from core.token_accounting import TokenUsage, check_request_size, estimate_tokens
+from ui.display import display_error, display_info, display_warning
 
 console = Console()
 
+# Agent responses: a low temperature for consistent commands, and dynamic thinking
+RESPONSE_TEMPERATURE = 0.1
+RESPONSE_MAX_OUTPUT_TOKENS = 65535
+RESPONSE_THINKING_BUDGET = -1
+
+# File summaries are short and mechanical, so they get a small thinking budget
+SUMMARY_THINKING_BUDGET = 256
+SUMMARY_MAX_OUTPUT_TOKENS = 1024
+SUMMARY_MAX_INPUT_CHARS = 200000
+# The startup health check only fetches model metadata, and gives up quickly
+HEALTH_CHECK_TIMEOUT_SECONDS = 10
+SUMMARY_PROMPT = (
+    "Summarize the file below for a developer who cannot see it, in at most 5 short lines: "
+    "its purpose, its main classes/functions/exports (with names), and anything notable "
+    "such as external dependencies or side effects. Reply with the summary only.\n\n"
+    "File: {path}\n```\n{content}\n```"
+)
+
+
+async def _prepend(first: Any, stream: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    """Iterate over a stream whose first item was already taken."""
+    if first is None:
+        return
+    yield first
+    async for item in stream:
+        yield item
+
 
 class GeminiClient:
-    """Async wrapper for Google Gemini API client."""
+    """Async wrapper for Google Gemini API client, the production ``LLMBackend``."""
     
-    def __init__(self, config: Config):
-        """Initialize the Gemini client."""
+    def __init__(self, config: Config, client: Any = None):
+        """Initialize the Gemini client.
+        
+        ``client`` replaces the ``genai.Client`` created on initialization,
+        for example with a ``FakeGeminiClient``.
+        """
         self.config = config
-        self.client = None
+        self.client = client
         self.model_name = "gemini-2.5-flash"
+        self.cache_stats = PromptCacheStats()
+        self.prompt_cache = PromptCache(self.cache_stats, config.gemini_prompt_cache_ttl) if config.gemini_prompt_cache else None
+        self.retry_policy = RetryPolicy(
+            max_attempts=max(1, config.gemini_max_attempts),
+            base_delay=config.gemini_retry_base_delay,
+            max_delay=config.gemini_retry_max_delay
+        )
+        # Shared by every client in the process, so concurrent sessions queue on the same limits
+        self.rate_limiter = shared_bucket(
+            self.model_name, config.gemini_requests_per_minute, config.gemini_tokens_per_minute
+        )
+        self.hedger = Hedger(config.gemini_hedge_max_rate) if config.gemini_hedging else None
         
     async def initialize(self):
-        """Initialize the async Gemini client."""
+        """Initialize the async Gemini client without contacting the API; errors surface on the first request."""
+        if self.client is not None:
+            return True
         try:
-            self.client = genai.Client(api_key=self.config.gemini_api_key)
+            # Building the client sets up its HTTP transports, so it runs off the event loop
+            http_options = types.HttpOptions(base_url=self.config.gemini_base_url) if self.config.gemini_base_url else None
+            self.client = await asyncio.to_thread(
+                genai.Client, api_key=self.config.gemini_api_key, http_options=http_options
+            )
             display_info("Gemini client initialized successfully")
             return True
         except Exception as e:
@@ -43,20 +97,18 @@ class GeminiClient:
             
             # Prepare the conversation for Gemini
             contents = self._prepare_contents(conversation_history)
+            system_text = self._system_text(conversation_history)
             
-            # Generate response with thinking enabled
-            response = await self.client.aio.models.generate_content(
-                model=self.model_name,
-                contents=contents,
-                config=types.GenerateContentConfig(
-                    temperature=0.1,  # Lower temperature for more consistent responses
-                    max_output_tokens=65535,
-                    thinking_config=types.ThinkingConfig(
-                        include_thoughts=True,
-                        thinking_budget=-1
-                    )
-                )
-            )
+            async def attempt(cached_content: Optional[str]):
+                # Generate response with thinking enabled
+                response = await self._hedged("response", lambda: self.client.aio.models.generate_content(
+                    model=self.model_name,
+                    contents=contents,
+                    config=self._generation_config(system_text, cached_content)
+                ), system_text, contents)
+                return response, response.usage_metadata
+            
+            response, usage = await self._request("Request", attempt, system_text, contents)
             
             # Extract response data
             if response.candidates and len(response.candidates) > 0:
@@ -69,60 +121,287 @@ class GeminiClient:
                     'thoughts': thoughts,
                     'final_text': final_text,
                     'finish_reason': candidate.finish_reason,
-                    'safety_ratings': candidate.safety_ratings
+                    'safety_ratings': candidate.safety_ratings,
+                    'usage': usage
                 }
             else:
                 display_error("No response candidates received from Gemini")
                 return None
                 
         except Exception as e:
-            error_str = str(e)
-            display_error(f"Error generating response: {error_str}")
-            
-            # Check for specific error types
-            if "500" in error_str and "INTERNAL" in error_str:
-                display_error("Gemini API is experiencing internal issues. Retrying in 5 seconds...")
-                await asyncio.sleep(5)
-                # Attempt one retry for 500 errors
-                try:
-                    response = await self.client.aio.models.generate_content(
+            display_error(f"Error generating response: {e}")
+            return None
+    
+    async def generate_response_stream(
+        self,
+        conversation_history: List[Dict[str, Any]],
+        on_text: Optional[Callable[[str], None]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Generate a response with the streaming API, passing each new piece of final text to ``on_text``.
+        
+        A failed stream is retried only if none of its text was passed on yet.
+        """
+        try:
+            if not self.client:
+                await self.initialize()
+            
+            contents = self._prepare_contents(conversation_history)
+            system_text = self._system_text(conversation_history)
+            emitted = False
+            
+            async def attempt(cached_content: Optional[str]):
+                nonlocal emitted
+                
+                async def open_stream():
+                    stream = await self.client.aio.models.generate_content_stream(
                         model=self.model_name,
                         contents=contents,
-                        config=types.GenerateContentConfig(
-                            temperature=0.1,
-                            max_output_tokens=4096,
-                            thinking_config=types.ThinkingConfig(
-                                include_thoughts=True,
-                                thinking_budget=-1
-                            )
-                        )
+                        config=self._generation_config(system_text, cached_content)
                     )
+                    try:
+                        return await anext(stream, None), stream
+                    except BaseException:
+                        await stream.aclose()  # Also when cancelled as the slower of a hedged pair
+                        raise
+                
+                async def close_stream(opened):
+                    await opened[1].aclose()
+                
+                # Only the wait for the first chunk is hedged; once text arrives the stream is kept
+                first_chunk, stream = await self._hedged(
+                    "first chunk", open_stream, system_text, contents, discard=close_stream
+                )
+                
+                thoughts = []
+                final_text = []
+                finish_reason = None
+                safety_ratings = None
+                usage_metadata = None
+                async for chunk in _prepend(first_chunk, stream):
+                    usage_metadata = chunk.usage_metadata or usage_metadata
+                    if not chunk.candidates:
+                        continue
+                    candidate = chunk.candidates[0]
+                    finish_reason = candidate.finish_reason or finish_reason
+                    safety_ratings = candidate.safety_ratings or safety_ratings
+                    if not candidate.content or not candidate.content.parts:
+                        continue
                     
-                    if response.candidates and len(response.candidates) > 0:
-                        candidate = response.candidates[0]
-                        thoughts, final_text = self._extract_thoughts_and_text(candidate.content)
-                        return {
-                            'thoughts': thoughts,
-                            'final_text': final_text,
-                            'finish_reason': candidate.finish_reason,
-                            'safety_ratings': candidate.safety_ratings
-                        }
-                except Exception as retry_error:
-                    display_error(f"Retry also failed: {retry_error}")
+                    # Pieces split text at arbitrary points, so they are joined without separators
+                    for part in candidate.content.parts:
+                        if not part.text:
+                            continue
+                        if part.thought:
+                            thoughts.append(part.text)
+                        else:
+                            final_text.append(part.text)
+                            if on_text:
+                                emitted = True
+                                on_text(part.text)
+                
+                return (thoughts, final_text, finish_reason, safety_ratings), usage_metadata
+            
+            (thoughts, final_text, finish_reason, safety_ratings), usage = await self._request(
+                "Streaming request", attempt, system_text, contents, can_retry=lambda: not emitted
+            )
+            
+            if not thoughts and not final_text:
+                display_error("No response candidates received from Gemini")
+                return None
+            
+            thoughts_text = "".join(thoughts).strip()
+            final = "".join(final_text).strip()
+            return {
+                'thoughts': thoughts_text or ("[No separate thinking provided]" if final else ""),
+                'final_text': final,
+                'finish_reason': finish_reason,
+                'safety_ratings': safety_ratings,
+                'usage': usage
+            }
+            
+        except Exception as e:
+            display_error(f"Error streaming response: {e}")
+            return None
+    
+    async def summarize_file(self, rel_path: str, content: str) -> Optional[str]:
+        """Write a short summary of a file, or None if the request fails."""
+        try:
+            if not self.client:
+                await self.initialize()
+            
+            if len(content) > SUMMARY_MAX_INPUT_CHARS:
+                content = content[:SUMMARY_MAX_INPUT_CHARS] + "\n... (truncated)"
+            contents = [types.Content(
+                role='user',
+                parts=[types.Part(text=SUMMARY_PROMPT.format(path=rel_path, content=content))]
+            )]
             
+            async def attempt(cached_content: Optional[str]):
+                response = await self.client.aio.models.generate_content(
+                    model=self.model_name,
+                    contents=contents,
+                    config=types.GenerateContentConfig(
+                        temperature=0.1,
+                        max_output_tokens=SUMMARY_MAX_OUTPUT_TOKENS,
+                        thinking_config=types.ThinkingConfig(thinking_budget=SUMMARY_THINKING_BUDGET)
+                    )
+                )
+                return response, response.usage_metadata
+            
+            response, _ = await self._request(f"Summary of {rel_path}", attempt, "", contents)
+            
+            if response.candidates and response.candidates[0].content and response.candidates[0].content.parts:
+                _, summary = self._extract_thoughts_and_text(response.candidates[0].content)
+                return summary or None
             return None
+            
+        except Exception as e:
+            display_warning(f"Failed to summarize {rel_path}: {e}")
+            return None
+    
+    async def _request(
+        self,
+        label: str,
+        attempt: Callable[[Optional[str]], Awaitable[Tuple[Any, Any]]],
+        system_text: str,
+        contents: List[types.Content],
+        can_retry: Optional[Callable[[], bool]] = None
+    ) -> Tuple[Any, Optional[TokenUsage]]:
+        """Make a request through the rate limiter, retrying transient failures.
+        
+        ``attempt(cached_content)`` makes one try and returns its result with
+        the response's usage metadata. After a 429 every request sharing the
+        rate limiter waits out the server's hint, not just this one. A request
+        estimated to exceed the model's input limit is refused unsent.
+        Returns the result with the token usage the API reported.
+        """
+        estimated_tokens = self._estimate_tokens(system_text, contents)
+        check_request_size(estimated_tokens, self.config.gemini_max_input_tokens)
+        
+        for attempt_number in range(1, self.retry_policy.max_attempts + 1):
+            await self.rate_limiter.acquire(estimated_tokens)
+            try:
+                cached_content, (result, usage_metadata) = await self._attempt_with_prefix(attempt, system_text)
+            except Exception as e:
+                if (
+                    attempt_number == self.retry_policy.max_attempts
+                    or not self.retry_policy.is_retryable(e)
+                    or (can_retry is not None and not can_retry())
+                ):
+                    raise
+                delay = self.retry_policy.delay(attempt_number, e)
+                if status_code(e) == 429:
+                    self.rate_limiter.pause(delay)
+                display_warning(
+                    f"{label} failed ({describe_error(e)}); retrying in {delay:.1f}s "
+                    f"(attempt {attempt_number + 1} of {self.retry_policy.max_attempts})"
+                )
+                await asyncio.sleep(delay)
+                continue
+            
+            self.cache_stats.record(usage_metadata, explicit=cached_content is not None)
+            self.rate_limiter.settle(estimated_tokens, usage_metadata.prompt_token_count if usage_metadata else None)
+            return result, TokenUsage.from_metadata(usage_metadata)
+    
+    async def _hedged(
+        self,
+        kind: str,
+        call: Callable[[], Awaitable[Any]],
+        system_text: str,
+        contents: List[types.Content],
+        discard: Optional[Callable[[Any], Awaitable[Any]]] = None
+    ) -> Any:
+        """Make one API call, sending a duplicate if it is slower than usual and hedging is enabled.
+        
+        A duplicate is only sent if the rate limiter has budget for it right away.
+        ``discard`` releases the result of a call that finished but lost the race.
+        """
+        if self.hedger is None:
+            return await call()
+        estimated_tokens = self._estimate_tokens(system_text, contents)
+        return await self.hedger.run(
+            kind, call, lambda: self.rate_limiter.try_acquire(estimated_tokens), discard
+        )
+    
+    @staticmethod
+    def _estimate_tokens(system_text: str, contents: List[types.Content]) -> int:
+        return estimate_tokens(system_text) + sum(
+            estimate_tokens(part.text) for content in contents for part in content.parts or []
+        )
+    
+    async def _attempt_with_prefix(
+        self,
+        attempt: Callable[[Optional[str]], Awaitable[Tuple[Any, Any]]],
+        system_text: str
+    ) -> Tuple[Optional[str], Tuple[Any, Any]]:
+        """Make one try referencing the cached prefix, falling back to sending it inline if the cache is gone."""
+        cached_content = await self._cached_prefix(system_text)
+        try:
+            return cached_content, await attempt(cached_content)
+        except Exception as e:
+            # Only these mean the cached prefix is gone; timeouts, 429s and 5xx leave it usable
+            if cached_content is None or status_code(e) not in (400, 403, 404):
+                raise
+            self.prompt_cache.invalidate()
+            return None, await attempt(None)
+    
+    async def close(self):
+        """Delete the registered prompt prefix instead of leaving it to expire, and report hedging."""
+        if self.prompt_cache:
+            await self.prompt_cache.release(self.client)
+        if self.hedger and self.hedger.stats.requests:
+            display_info(self.hedger.stats.describe())
+    
+    async def _cached_prefix(self, system_text: str) -> Optional[str]:
+        """Get the cached content holding the system prefix, if prompt caching is enabled."""
+        if not self.prompt_cache or not system_text:
+            return None
+        return await self.prompt_cache.get(self.client, self.model_name, system_text)
+    
+    def generation_settings(self) -> Dict[str, Any]:
+        """Get the model and sampling settings every response request uses."""
+        return {
+            'model': self.model_name,
+            'temperature': RESPONSE_TEMPERATURE,
+            'max_output_tokens': RESPONSE_MAX_OUTPUT_TOKENS,
+            'thinking_budget': RESPONSE_THINKING_BUDGET
+        }
+    
+    def _generation_config(self, system_text: str, cached_content: Optional[str]) -> types.GenerateContentConfig:
+        """Build the request config, referencing the cached prefix or sending it as the system instruction."""
+        return types.GenerateContentConfig(
+            temperature=RESPONSE_TEMPERATURE,
+            max_output_tokens=RESPONSE_MAX_OUTPUT_TOKENS,
+            system_instruction=None if cached_content else (system_text or None),
+            cached_content=cached_content,
+            thinking_config=types.ThinkingConfig(
+                include_thoughts=True,
+                thinking_budget=RESPONSE_THINKING_BUDGET
+            )
+        )
+    
+    def _system_text(self, conversation_history: List[Dict[str, Any]]) -> str:
+        """Get the system messages' text, the stable prefix of every request."""
+        parts = []
+        for message in conversation_history:
+            if message.get('role') == 'system':
+                text = message.get('content', '')
+                if isinstance(text, ContextDocument):
+                    text = text.materialize()  # Load blob-backed context only for the request
+                parts.append(text)
+        return "\n\n".join(parts)
     
     def _prepare_contents(self, conversation_history: List[Dict[str, Any]]) -> List[types.Content]:
-        """Convert conversation history to Gemini Content format."""
+        """Convert the non-system conversation history to Gemini Content format."""
         contents = []
         
         for message in conversation_history:
             role = message.get('role', 'user')
             text = message.get('content', '')
             
-            # Map roles to Gemini format
+            # Map roles to Gemini format; system messages are sent as the system instruction
             if role == 'system':
-                role = 'user'  # Gemini treats system messages as user messages
+                continue
             elif role == 'assistant':
                 role = 'model'
             
@@ -151,30 +430,16 @@ class GeminiClient:
         
         return thoughts.strip(), final_text.strip()
     
-    async def test_connection(self) -> bool:
-        """Test the connection to Gemini API."""
+    async def health_check(self) -> bool:
+        """Check the API key and model with a metadata request instead of a generation round trip."""
         try:
             if not self.client:
                 await self.initialize()
             
-            # Simple test request
-            response = await self.client.aio.models.generate_content(
-                model=self.model_name,
-                contents=[types.Content(
-                    role='user',
-                    parts=[types.Part(text="Hello, respond with 'Connection successful'")]
-                )]
-            )
-            
-            if response.candidates and len(response.candidates) > 0:
-                text = response.candidates[0].content.parts[0].text
-                if "Connection successful" in text:
-                    display_info("✓ Gemini API connection test successful")
-                    return True
-            
-            display_error("Gemini API connection test failed")
-            return False
+            await asyncio.wait_for(self.client.aio.models.get(model=self.model_name), HEALTH_CHECK_TIMEOUT_SECONDS)
+            display_info("✓ Gemini API reachable")
+            return True
             
         except Exception as e:
-            display_error(f"Gemini API connection test failed: {e}")
+            display_warning(f"Gemini API health check failed, requests may fail: {e}")
             return False
@@ -0,0 +1,130 @@
+"""Hedged model requests: a duplicate for calls slower than the recent p95."""
+
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+# Latencies of this many recent calls of each kind set the hedging delay
+LATENCY_WINDOW = 200
+# No duplicates are sent until a kind of call has this many latencies recorded
+HEDGE_MIN_SAMPLES = 20
+HEDGE_PERCENTILE = 0.95
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies.
+
+    A call cut short by its duplicate is recorded with its elapsed time, a
+    lower bound, so the percentile does not drift down as slow calls stop
+    completing; only calls that completed are used to estimate savings.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        """Initialize with the number of latencies to keep."""
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.completed: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float, completed: bool = True):
+        """Add the latency of a call, or its elapsed time when it was cancelled."""
+        self.samples.append(seconds)
+        if completed:
+            self.completed.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Get the latency ``fraction`` of recent calls finished within, or None with too few samples."""
+        if len(self.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+
+    def expected_remaining(self, elapsed: float) -> float:
+        """Estimate how much longer a call still running after ``elapsed`` seconds would take."""
+        slower = [seconds - elapsed for seconds in self.completed if seconds > elapsed]
+        return sum(slower) / len(slower) if slower else 0.0
+
+
+@dataclass
+class HedgeStats:
+    """Requests hedged and the tail latency that saved."""
+
+    requests: int = 0
+    hedged: int = 0  # Duplicates sent
+    won: int = 0  # Requests answered by the duplicate
+    saved_seconds: float = 0.0  # Estimated from the latencies of calls that were not cut short
+
+    def describe(self) -> str:
+        """Describe the stats in one line."""
+        rate = self.hedged / self.requests if self.requests else 0.0
+        return (
+            f"Hedging: {self.hedged} of {self.requests} requests duplicated ({rate:.1%}), "
+            f"{self.won} answered by the duplicate, about {self.saved_seconds:.1f}s of tail latency saved"
+        )
+
+
+class Hedger:
+    """Sends a duplicate of a call still running after the recent p95 latency and keeps the first result.
+
+    Each kind of call (a full response, or the first chunk of a stream)
+    has its own latency window. Duplicates are capped at ``max_rate`` of
+    all requests and need ``admit()`` to agree, so they stay within the
+    rate limits. The slower call is cancelled, or if it finished too, its
+    result is passed to ``discard`` to release it (such as an open stream).
+    """
+
+    def __init__(self, max_rate: float):
+        """Initialize with the largest fraction of requests that may be duplicated."""
+        self.max_rate = max_rate
+        self.trackers: Dict[str, LatencyTracker] = {}
+        self.stats = HedgeStats()
+
+    async def run(self, kind: str, call: Callable[[], Awaitable[Any]],
+                  admit: Callable[[], bool] = lambda: True,
+                  discard: Optional[Callable[[Any], Awaitable[Any]]] = None) -> Any:
+        """Await ``call()``, racing a duplicate against it if it runs past the p95 latency."""
+        tracker = self.trackers.setdefault(kind, LatencyTracker())
+        delay = tracker.percentile(HEDGE_PERCENTILE)
+        self.stats.requests += 1
+        start = time.monotonic()
+        tasks = [asyncio.ensure_future(call())]
+        winner = None
+        try:
+            if delay is not None:
+                await asyncio.wait(tasks, timeout=delay)
+                if not tasks[0].done() and self.stats.hedged < self.max_rate * self.stats.requests and admit():
+                    self.stats.hedged += 1
+                    tasks.append(asyncio.ensure_future(call()))
+            winner = await self._first_success(tasks)
+        finally:
+            losers = [task for task in tasks if not task.done()]
+            for task in losers:
+                task.cancel()
+            await asyncio.gather(*losers, return_exceptions=True)
+            if discard is not None:
+                finished = [
+                    task for task in tasks
+                    if task.done() and not task.cancelled() and task.exception() is None and task is not winner
+                ]
+                await asyncio.gather(*(discard(task.result()) for task in finished), return_exceptions=True)
+
+        elapsed = time.monotonic() - start
+        if winner.exception() is None:
+            if winner is not tasks[0]:
+                self.stats.won += 1
+                self.stats.saved_seconds += tracker.expected_remaining(elapsed)
+            tracker.record(elapsed, completed=winner is tasks[0])
+        return winner.result()
+
+    @staticmethod
+    async def _first_success(tasks: List[asyncio.Future]) -> asyncio.Future:
+        """Wait for the first task to succeed, or for all to fail (raising the first failure)."""
+        pending = set(tasks)
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=tasks.index):
+                if task.exception() is None:
+                    return task
+            if not pending:
+                return next(task for task in tasks if task.exception() is not None)
@@ -1,17 +1,28 @@
 """Conversation history manager for Agent Code."""
 
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 from datetime import datetime
 import json
 
 from rich.console import Console
+from core.token_accounting import estimate_tokens
 from ui.display import display_info, display_error
 
 console = Console()
 
 
+# Pruning removes enough messages to get this far under a limit, so the start of the
+# conversation (and with it the prompt prefix the API can cache) changes only now and then
+PRUNE_TARGET = 0.75
+
+
 class ConversationHistory:
-    """Manages conversation history with context limits and pruning."""
+    """Manages conversation history with context limits and pruning.
+    
+    System messages (the meta-prompt and project context, sized by the
+    context budget) are not counted against ``max_total_chars``. Pruning
+    drops the oldest other messages and always keeps the latest one.
+    """
     
     def __init__(self, max_messages: int = 50, max_total_chars: int = 100000):
         """Initialize conversation history manager."""
@@ -24,7 +35,7 @@ class ConversationHistory:
         # Clear any existing system messages
         self.messages = [msg for msg in self.messages if msg.get('role') != 'system']
         
-        # Add new system message at the beginning
+        # Add new system message at the beginning, where it forms the stable prompt prefix
         system_content = meta_prompt if meta_prompt else content
         self.messages.insert(0, {
             'role': 'system',
@@ -95,6 +106,26 @@ class ConversationHistory:
                 total += len(message['thoughts'])
         return total
     
+    def estimate_tokens_by_type(self) -> Dict[str, int]:
+        """Estimate the tokens sent for each message type (only message content is sent)."""
+        tokens = {}
+        for message in self.messages:
+            msg_type = message.get('type', 'unknown')
+            tokens[msg_type] = tokens.get(msg_type, 0) + estimate_tokens(message.get('content', ''))
+        return tokens
+    
+    def trim_to_tokens(self, max_tokens: int) -> int:
+        """Drop the oldest messages until the conversation is estimated to fit in ``max_tokens``.
+        
+        Unlike the char budget this counts system messages, as the model's
+        input limit covers the whole request. Returns the number of messages
+        dropped.
+        """
+        system_tokens = sum(
+            estimate_tokens(msg.get('content', '')) for msg in self.messages if msg.get('role') == 'system'
+        )
+        return self._drop_oldest(lambda msg: estimate_tokens(msg.get('content', '')), max_tokens, system_tokens)
+    
     def _prune_if_needed(self):
         """Prune conversation if it exceeds limits."""
         # Check message count limit
@@ -102,37 +133,45 @@ class ConversationHistory:
             self._prune_by_message_count()
         
         # Check character count limit
-        if self.get_total_char_count() > self.max_total_chars:
+        if self._conversation_char_count() > self.max_total_chars:
             self._prune_by_char_count()
     
+    def _conversation_char_count(self) -> int:
+        """Get the character count of all messages except system messages."""
+        return sum(self._message_chars(msg) for msg in self.messages if msg.get('role') != 'system')
+    
+    @staticmethod
+    def _message_chars(message: Dict[str, Any]) -> int:
+        return len(message.get('content', '')) + len(message.get('thoughts', ''))
+    
     def _prune_by_message_count(self):
         """Prune by removing oldest non-system messages."""
-        # Keep system message and recent messages
-        system_messages = [msg for msg in self.messages if msg.get('role') == 'system']
-        other_messages = [msg for msg in self.messages if msg.get('role') != 'system']
-        
-        # Keep only the most recent messages
-        keep_count = self.max_messages - len(system_messages)
-        if keep_count > 0:
-            other_messages = other_messages[-keep_count:]
-        else:
-            other_messages = []
-        
-        self.messages = system_messages + other_messages
+        system_count = sum(1 for msg in self.messages if msg.get('role') == 'system')
+        self._drop_oldest(lambda msg: 1, self.max_messages, system_count)
         # display_info(f"Pruned conversation by message count to {len(self.messages)} messages")
     
     def _prune_by_char_count(self):
-        """Prune by removing messages until under character limit."""
-        # Always keep system messages
+        """Prune by removing messages until under character limit (system messages are not counted)."""
+        self._drop_oldest(self._message_chars, self.max_total_chars)
+        # display_info(f"Pruned conversation by character count to {self.get_total_char_count()} chars")
+    
+    def _drop_oldest(self, size: Callable[[Dict[str, Any]], int], limit: int, fixed: int = 0) -> int:
+        """Drop the oldest messages until ``fixed`` plus their total ``size`` is well under ``limit``.
+        
+        The one pruning policy behind every limit: system messages and the
+        latest message are always kept. Returns the number of messages dropped.
+        """
         system_messages = [msg for msg in self.messages if msg.get('role') == 'system']
         other_messages = [msg for msg in self.messages if msg.get('role') != 'system']
         
-        # Remove oldest messages until under limit
-        while other_messages and self.get_total_char_count() > self.max_total_chars:
-            other_messages.pop(0)
+        total = fixed + sum(size(msg) for msg in other_messages)
+        dropped = 0
+        while len(other_messages) > 1 and total > limit * PRUNE_TARGET:
+            total -= size(other_messages.pop(0))
+            dropped += 1
         
         self.messages = system_messages + other_messages
-        # display_info(f"Pruned conversation by character count to {self.get_total_char_count()} chars")
+        return dropped
     
     def get_summary(self) -> Dict[str, Any]:
         """Get a summary of the conversation history."""
@@ -0,0 +1,86 @@
+"""Language model backend interface and backend selection."""
+
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Protocol, runtime_checkable
+
+from config.settings import Config
+from core.prompt_cache import PromptCacheStats
+
+
+@runtime_checkable
+class LLMBackend(Protocol):
+    """What the agent needs from a language model backend.
+
+    Responses are dicts with ``thoughts``, ``final_text``, ``finish_reason``,
+    ``safety_ratings`` and ``usage`` (a ``TokenUsage``, or None if nothing
+    was reported); a failed request returns None after reporting the error. ``GeminiClient`` is the production implementation and
+    ``MockBackend`` a scriptable offline one.
+    """
+
+    cache_stats: PromptCacheStats
+
+    async def initialize(self) -> bool:
+        """Prepare the backend without waiting on the model; False if it cannot be used."""
+        ...
+
+    async def health_check(self) -> bool:
+        """Cheaply check that the model is reachable."""
+        ...
+
+    async def generate_response(self, conversation_history: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Generate the next response to a conversation."""
+        ...
+
+    async def generate_response_stream(
+        self,
+        conversation_history: List[Dict[str, Any]],
+        on_text: Optional[Callable[[str], None]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Generate the next response, passing each new piece of final text to ``on_text``."""
+        ...
+
+    async def summarize_file(self, rel_path: str, content: str) -> Optional[str]:
+        """Write a short summary of a file."""
+        ...
+
+    async def close(self):
+        """Release server-side resources such as cached prompt prefixes."""
+        ...
+
+    def generation_settings(self) -> Dict[str, Any]:
+        """Get the model and sampling settings that, with the conversation, determine a response."""
+        ...
+
+
+def create_backend(config: Config, workspace: Optional[Path] = None) -> LLMBackend:
+    """Create the backend selected by ``config.llm_backend``, behind the response cache if enabled.
+
+    ``workspace`` is left out of response cache keys, so recordings replay from another checkout.
+    """
+    backend = _create_model_backend(config)
+    if config.response_cache == "off":
+        return backend
+
+    from core.context_cache import default_cache_root
+    from core.response_cache import CachingBackend, ResponseStore
+
+    directory = Path(config.response_cache_dir) if config.response_cache_dir else default_cache_root() / "responses"
+    store = ResponseStore(directory, config.response_cache_max_mb * 1024 * 1024)
+    return CachingBackend(backend, store, config.response_cache, workspace)
+
+
+def _create_model_backend(config: Config) -> LLMBackend:
+    if config.llm_backend in ("mock", "mock-http"):
+        from core.mock_backend import MockBackend, MockScript
+
+        script = MockScript.from_config(config)
+        if config.llm_backend == "mock":
+            return MockBackend(script)
+
+        # The real client and SDK, talking to a local stand-in for the REST API that stops with it
+        from core.fake_gemini import FakeGeminiServer, FakeServerClient
+        return FakeServerClient(config, FakeGeminiServer(script=script).start())
+
+    # Imported here so the mock backends start without loading the SDK
+    from core.gemini_client import GeminiClient
+    return GeminiClient(config)
@@ -0,0 +1,147 @@
+"""Scriptable offline language model backend for load tests and benchmarks."""
+
+import asyncio
+import itertools
+import json
+import re
+from pathlib import Path
+from string import Template
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from config.settings import Config
+from core.context_packer import CHARS_PER_TOKEN
+from core.prompt_cache import PromptCacheStats
+from core.token_accounting import TokenUsage, estimate_tokens
+
+# Streamed replies are split into pieces of about this many tokens
+STREAM_CHUNK_TOKENS = 4
+DEFAULT_RESPONSES = [
+    "<narration>Working on: $request</narration>\n<command>[CMD:FINISH]</command>"
+    "<o>Mock response $turn to: $request</o>"
+]
+
+Response = Union[str, Callable[[str, int], str]]
+
+
+class MockScript:
+    """Canned or templated replies with a simulated latency and generation rate.
+
+    Replies are used in order and the list repeats once exhausted. Strings
+    are ``string.Template`` templates: ``$request`` is the first line of the
+    latest user message (observations included) and ``$turn`` the 1-based
+    reply number. A callable is given the same two values. Each reply takes
+    ``latency_seconds`` before its first token, then streams at
+    ``tokens_per_second`` (0 for instant).
+    """
+
+    def __init__(self, responses: List[Response] = None, latency_seconds: float = 0.0,
+                 tokens_per_second: float = 0.0):
+        """Initialize with the replies, the time to first token and the generation rate."""
+        self.responses = list(responses or DEFAULT_RESPONSES)
+        self.latency_seconds = latency_seconds
+        self.tokens_per_second = tokens_per_second
+        self.turns = itertools.count(1)
+
+    @classmethod
+    def from_config(cls, config: Config) -> 'MockScript':
+        """Build the script described by the MOCK_* settings."""
+        responses = None
+        if config.mock_script:
+            # A JSON list of reply templates
+            responses = json.loads(Path(config.mock_script).read_text(encoding='utf-8'))
+        return cls(responses, config.mock_latency_ms / 1000, config.mock_tokens_per_second)
+
+    def reply(self, request: str) -> str:
+        """Render the next reply to a request."""
+        turn = next(self.turns)
+        response = self.responses[(turn - 1) % len(self.responses)]
+        # Observations lead with a fixed header; template the line that describes them instead
+        request = re.sub(r'^SYSTEM OBSERVATIONS:\s*', '', request.strip())
+        request = request.splitlines()[0] if request else ""
+        if callable(response):
+            return response(request, turn)
+        return Template(response).safe_substitute(request=request, turn=turn)
+
+    def chunks(self, text: str) -> List[str]:
+        """Split a reply into the pieces it is streamed in."""
+        size = STREAM_CHUNK_TOKENS * CHARS_PER_TOKEN
+        return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+    def chunk_seconds(self, chunk: str) -> float:
+        """Time to generate one streamed piece."""
+        if not self.tokens_per_second:
+            return 0.0
+        return len(chunk) / CHARS_PER_TOKEN / self.tokens_per_second
+
+
+class MockBackend:
+    """In-process backend answering from a ``MockScript``, with no network or SDK involved."""
+
+    def __init__(self, script: MockScript = None):
+        """Initialize with the script to answer from."""
+        self.script = script or MockScript()
+        self.cache_stats = PromptCacheStats()
+        self.requests: List[Dict[str, Any]] = []
+
+    async def initialize(self) -> bool:
+        return True
+
+    async def health_check(self) -> bool:
+        return True
+
+    async def generate_response(self, conversation_history: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Produce the next scripted reply after its full generation time."""
+        text, usage = self._next_reply(conversation_history)
+        await asyncio.sleep(self.script.latency_seconds + sum(map(self.script.chunk_seconds, self.script.chunks(text))))
+        return self._response(text, usage)
+
+    async def generate_response_stream(
+        self,
+        conversation_history: List[Dict[str, Any]],
+        on_text: Optional[Callable[[str], None]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Produce the next scripted reply, passing its pieces to ``on_text`` at the scripted rate."""
+        text, usage = self._next_reply(conversation_history)
+        await asyncio.sleep(self.script.latency_seconds)
+        for chunk in self.script.chunks(text):
+            await asyncio.sleep(self.script.chunk_seconds(chunk))
+            if on_text and chunk:
+                on_text(chunk)
+        return self._response(text, usage)
+
+    async def summarize_file(self, rel_path: str, content: str) -> Optional[str]:
+        await asyncio.sleep(self.script.latency_seconds)
+        return f"Mock summary of {rel_path} ({len(content)} characters)."
+
+    async def close(self):
+        pass
+
+    def generation_settings(self) -> Dict[str, Any]:
+        return {'backend': 'mock', 'responses': [str(response) for response in self.script.responses]}
+
+    def _next_reply(self, conversation_history: List[Dict[str, Any]]) -> Tuple[str, TokenUsage]:
+        """Render the reply to the latest user message and record the request's size."""
+        request = next(
+            (str(message['content']) for message in reversed(conversation_history) if message.get('role') == 'user'),
+            ""
+        )
+        prompt_chars = sum(len(message.get('content', '')) for message in conversation_history)
+        self.requests.append({'messages': len(conversation_history), 'prompt_chars': prompt_chars})
+        prompt_tokens = sum(estimate_tokens(message.get('content', '')) for message in conversation_history)
+        self.cache_stats.record(SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            cached_content_token_count=None
+        ), explicit=False)
+        text = self.script.reply(request)
+        return text, TokenUsage(prompt_tokens=prompt_tokens, output_tokens=estimate_tokens(text))
+
+    @staticmethod
+    def _response(text: str, usage: TokenUsage) -> Dict[str, Any]:
+        return {
+            'thoughts': "[No separate thinking provided]",
+            'final_text': text,
+            'finish_reason': 'STOP',
+            'safety_ratings': None,
+            'usage': usage
+        }
@@ -0,0 +1,117 @@
+"""Explicit caching of the stable prompt prefix, with prompt cache metrics."""
+
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Any, Optional, Set
+
+from ui.display import display_warning
+
+# Explicit caches below the model's minimum prompt size are rejected (1024 tokens for 2.5 Flash)
+MIN_CACHE_CHARS = 4096
+# A cache this close to expiring is replaced instead of referenced
+EXPIRY_MARGIN_SECONDS = 60
+
+
+@dataclass
+class PromptCacheStats:
+    """Prompt tokens sent and how many of them were served from a cache."""
+
+    requests: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0  # From explicit and implicit caching
+    explicit_requests: int = 0  # Requests that referenced a registered prefix
+    caches_created: int = 0
+
+    def record(self, usage_metadata: Any, explicit: bool):
+        """Add the usage reported for one response."""
+        self.requests += 1
+        if explicit:
+            self.explicit_requests += 1
+        if usage_metadata is None:
+            return
+        self.prompt_tokens += usage_metadata.prompt_token_count or 0
+        self.cached_tokens += usage_metadata.cached_content_token_count or 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of prompt tokens served from a cache."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def describe(self) -> str:
+        """Describe the metrics in one line."""
+        return (
+            f"Prompt cache: {self.cached_tokens:,} of {self.prompt_tokens:,} prompt tokens cached "
+            f"({self.hit_rate:.0%}) over {self.requests} requests; {self.explicit_requests} referenced "
+            f"the registered prefix, {self.caches_created} prefixes registered"
+        )
+
+
+class PromptCache:
+    """Registers the system prefix as cached content once and reuses it while unchanged.
+
+    The prefix is identified by a hash of its text. When it changes (the
+    project context was refreshed) or its cache is about to expire, a new
+    cache is created and the previous one deleted. A prefix the API refuses
+    to cache is remembered and sent inline from then on.
+    """
+
+    def __init__(self, stats: PromptCacheStats, ttl_seconds: int = 3600):
+        """Initialize with the stats to update and the lifetime of each cache."""
+        self.stats = stats
+        self.ttl_seconds = ttl_seconds
+        self.name: Optional[str] = None
+        self.key: Optional[str] = None
+        self.expires_at = 0.0
+        self.refused: Set[str] = set()
+        self.lock = asyncio.Lock()
+
+    async def get(self, client: Any, model_name: str, system_text: str) -> Optional[str]:
+        """Get the name of the cached content holding ``system_text``, or None to send it inline."""
+        if len(system_text) < MIN_CACHE_CHARS:
+            return None
+        key = hashlib.sha256(system_text.encode('utf-8', 'surrogateescape')).hexdigest()
+        if key in self.refused:
+            return None
+
+        async with self.lock:
+            if key == self.key and time.monotonic() < self.expires_at - EXPIRY_MARGIN_SECONDS:
+                return self.name
+
+            await self.release(client)
+            from google.genai import types  # Imported here so backends without the SDK can use the stats
+            try:
+                cache = await client.aio.caches.create(
+                    model=model_name,
+                    config=types.CreateCachedContentConfig(
+                        system_instruction=system_text,
+                        ttl=f"{self.ttl_seconds}s",
+                        display_name="agent-code system prompt"
+                    )
+                )
+            except Exception as e:
+                display_warning(f"Prompt prefix could not be cached, sending it inline: {e}")
+                self.refused.add(key)
+                return None
+
+            self.name = cache.name
+            self.key = key
+            self.expires_at = time.monotonic() + self.ttl_seconds
+            self.stats.caches_created += 1
+            return self.name
+
+    def invalidate(self):
+        """Forget the current cache, for example after a request referencing it failed."""
+        self.name = None
+        self.key = None
+
+    async def release(self, client: Any):
+        """Delete the current cache, if any; it would otherwise live until its TTL."""
+        name, self.name, self.key = self.name, None, None
+        if name is None or client is None:
+            return
+        try:
+            await client.aio.caches.delete(name=name)
+        except Exception:
+            pass  # It expires on its own
@@ -0,0 +1,340 @@
+"""Ranked symbol outline ("repo map") of a workspace for the compact context mode."""
+
+import ast
+import re
+from dataclasses import dataclass, field
+from pathlib import PurePosixPath
+from typing import Callable, Dict, List, Set, Tuple
+
+import numpy as np
+
+
+PYTHON_EXTENSIONS = {'.py', '.pyi'}
+SCRIPT_EXTENSIONS = {'.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx'}
+STYLE_EXTENSIONS = {'.css', '.scss'}
+MARKUP_EXTENSIONS = {'.html', '.htm'}
+MAP_EXTENSIONS = PYTHON_EXTENSIONS | SCRIPT_EXTENSIONS | STYLE_EXTENSIONS | MARKUP_EXTENSIONS
+
+MAX_SIGNATURE_CHARS = 120
+
+_IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_$][\w$]*')
+_JS_DEFINITION_PATTERNS = [
+    ('class', re.compile(r'^\s*(?:export\s+(?:default\s+)?)?class\s+([A-Za-z_$][\w$]*)([^{]*)', re.MULTILINE)),
+    ('function', re.compile(
+        r'^\s*(?:export\s+(?:default\s+)?)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)\s*(\([^)]*\))', re.MULTILINE
+    )),
+    ('function', re.compile(
+        r'^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s+)?'
+        r'(\([^)]*\)|[A-Za-z_$][\w$]*)\s*=>', re.MULTILINE
+    )),
+    ('method', re.compile(
+        r'^\s+(?:static\s+)?(?:async\s+)?(?!if\b|for\b|while\b|switch\b|catch\b|return\b|function\b)'
+        r'([A-Za-z_$][\w$]*)\s*(\([^)]*\))\s*\{', re.MULTILINE
+    )),
+]
+_CSS_RULE_PATTERN = re.compile(r'^([^\s{}@/][^{}]*?)\s*\{', re.MULTILINE)
+_CSS_NAME_PATTERN = re.compile(r'[.#]([A-Za-z_][\w-]*)')
+_HTML_ID_PATTERN = re.compile(r'\bid\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+_HTML_CLASS_PATTERN = re.compile(r'\bclass\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+_HTML_LINK_PATTERN = re.compile(r'\b(?:src|href)\s*=\s*["\']([^"\':]+)["\']', re.IGNORECASE)
+
+
+@dataclass
+class Symbol:
+    """A definition found in a file."""
+
+    name: str
+    kind: str
+    signature: str
+    line: int
+    depth: int = 0  # Nesting level, for indenting methods under their class
+
+
+@dataclass
+class FileSymbols:
+    """Definitions in a file and the names it refers to (with occurrence counts)."""
+
+    definitions: List[Symbol] = field(default_factory=list)
+    references: Dict[str, int] = field(default_factory=dict)
+
+
+def _shorten(signature: str) -> str:
+    signature = " ".join(signature.split())
+    return signature if len(signature) <= MAX_SIGNATURE_CHARS else signature[:MAX_SIGNATURE_CHARS - 3] + "..."
+
+
+def _count_identifiers(text: str) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for name in _IDENTIFIER_PATTERN.findall(text):
+        counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def extract_python(text: str) -> FileSymbols:
+    """Extract classes, functions and methods with their signatures using ``ast``."""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return FileSymbols(references=_count_identifiers(text))
+
+    symbols = FileSymbols()
+
+    def visit(body, depth: int):
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                bases = ", ".join(ast.unparse(base) for base in node.bases)
+                symbols.definitions.append(Symbol(
+                    node.name, 'class', _shorten(f"class {node.name}({bases})" if bases else f"class {node.name}"),
+                    node.lineno, depth
+                ))
+                visit(node.body, depth + 1)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+                returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+                symbols.definitions.append(Symbol(
+                    node.name, 'method' if depth else 'function',
+                    _shorten(f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"), node.lineno, depth
+                ))
+            elif depth == 0 and isinstance(node, (ast.Assign, ast.AnnAssign)):
+                # Module-level constants are often shared across files
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    if isinstance(target, ast.Name) and target.id.isupper():
+                        symbols.definitions.append(Symbol(target.id, 'constant', target.id, node.lineno, depth))
+
+    visit(tree.body, 0)
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            name = node.id
+        elif isinstance(node, ast.Attribute):
+            name = node.attr
+        elif isinstance(node, ast.alias):
+            name = node.name.rsplit('.', 1)[-1]
+        else:
+            continue
+        symbols.references[name] = symbols.references.get(name, 0) + 1
+    return symbols
+
+
+def _line_number(text: str, offset: int) -> int:
+    return text.count('\n', 0, offset) + 1
+
+
+def extract_script(text: str) -> FileSymbols:
+    """Extract classes, functions and methods from JavaScript/TypeScript with regexes."""
+    symbols = FileSymbols(references=_count_identifiers(text))
+    seen = set()
+    for kind, pattern in _JS_DEFINITION_PATTERNS:
+        for match in pattern.finditer(text):
+            name = match.group(1)
+            line = _line_number(text, match.start(1))
+            if (name, line) in seen:
+                continue
+            seen.add((name, line))
+            if kind == 'class':
+                signature = f"class {name}{match.group(2).rstrip()}"
+            elif kind == 'function' and match.group(2).startswith('('):
+                signature = f"function {name}{match.group(2)}"
+            elif kind == 'function':
+                signature = f"function {name}({match.group(2)})"
+            else:
+                signature = f"{name}{match.group(2)}"
+            symbols.definitions.append(Symbol(name, kind, _shorten(signature), line, 1 if kind == 'method' else 0))
+    symbols.definitions.sort(key=lambda symbol: symbol.line)
+    return symbols
+
+
+def extract_style(text: str) -> FileSymbols:
+    """Extract rule selectors from CSS; class and id names become definitions."""
+    symbols = FileSymbols()
+    text = re.sub(r'/\*.*?\*/', lambda m: '\n' * m.group(0).count('\n'), text, flags=re.DOTALL)
+    for match in _CSS_RULE_PATTERN.finditer(text):
+        selector = match.group(1).strip()
+        names = _CSS_NAME_PATTERN.findall(selector)
+        line = _line_number(text, match.start(1))
+        for name in dict.fromkeys(names):
+            symbols.definitions.append(Symbol(name, 'selector', _shorten(selector), line))
+    return symbols
+
+
+def extract_markup(text: str) -> FileSymbols:
+    """Extract element ids from HTML, referencing classes, ids and linked files."""
+    symbols = FileSymbols()
+    for match in _HTML_ID_PATTERN.finditer(text):
+        symbols.definitions.append(Symbol(match.group(1), 'id', f"#{match.group(1)}", _line_number(text, match.start())))
+    for match in _HTML_CLASS_PATTERN.finditer(text):
+        for name in match.group(1).split():
+            symbols.references[name] = symbols.references.get(name, 0) + 1
+    for symbol in symbols.definitions:
+        symbols.references[symbol.name] = symbols.references.get(symbol.name, 0) + 1
+    for match in _HTML_LINK_PATTERN.finditer(text):
+        target = PurePosixPath(match.group(1)).name
+        symbols.references[target] = symbols.references.get(target, 0) + 1
+    return symbols
+
+
+def extract_symbols(path: str, text: str) -> FileSymbols:
+    """Extract definitions and references from a file based on its extension."""
+    suffix = PurePosixPath(path).suffix.lower()
+    if suffix in PYTHON_EXTENSIONS:
+        return extract_python(text)
+    if suffix in SCRIPT_EXTENSIONS:
+        return extract_script(text)
+    if suffix in STYLE_EXTENSIONS:
+        return extract_style(text)
+    if suffix in MARKUP_EXTENSIONS:
+        return extract_markup(text)
+    return FileSymbols()
+
+
+def _name_weight(name: str) -> float:
+    """Weight references by how distinctive a name is, in the spirit of tf-idf for identifiers."""
+    if name.startswith('__') and name.endswith('__'):
+        return 0.0  # Protocol methods say nothing about which file is used
+    weight = 1.0
+    if name.startswith('_'):
+        weight *= 0.1
+    if len(name) >= 8 and ('_' in name.strip('_') or name != name.lower() and name != name.upper()):
+        weight *= 10.0  # Long compound identifiers rarely collide by accident
+    return weight
+
+
+def pagerank(sources: np.ndarray, targets: np.ndarray, weights: np.ndarray, node_count: int,
+             damping: float = 0.85, iterations: int = 50, tolerance: float = 1e-9) -> np.ndarray:
+    """Compute PageRank over a weighted edge list by power iteration.
+
+    The edge arrays are the graph's sparse (COO) adjacency matrix; each
+    iteration is one sparse matrix-vector product done with ``bincount``.
+    Rank held by nodes without outgoing edges is spread uniformly.
+    """
+    if node_count == 0:
+        return np.zeros(0)
+    out_weight = np.bincount(sources, weights=weights, minlength=node_count)
+    transition = weights / np.where(out_weight[sources] > 0, out_weight[sources], 1)
+    dangling = out_weight == 0
+
+    rank = np.full(node_count, 1.0 / node_count)
+    for _ in range(iterations):
+        spread = np.bincount(targets, weights=rank[sources] * transition, minlength=node_count)
+        updated = (1 - damping) / node_count + damping * (spread + rank[dangling].sum() / node_count)
+        if np.abs(updated - rank).sum() < tolerance:
+            return updated
+        rank = updated
+    return rank
+
+
+class RepoMap:
+    """Builds a token-budgeted outline of the workspace's most referenced symbols.
+
+    Files are graph nodes; a file that refers to a name defined in another
+    file gets an edge to it, weighted by how often it uses the name and
+    shared among the files defining it. PageRank over this graph ranks
+    files, and each file's rank is split among its symbols by how much they
+    are referenced. Extraction results are kept per content hash, so only
+    changed files are parsed again.
+    """
+
+    def __init__(self, load_text: Callable[[str], str]):
+        """Initialize with a function returning the decoded text for a content hash."""
+        self.load_text = load_text
+        self.parsed: Dict[str, Tuple[str, FileSymbols]] = {}  # path -> (content hash, symbols)
+
+    @staticmethod
+    def supports(path: str) -> bool:
+        """Check whether symbols can be extracted from a file."""
+        return PurePosixPath(path).suffix.lower() in MAP_EXTENSIONS
+
+    def update(self, files: List[Tuple[str, str]]):
+        """Parse new or changed files given as ``(path, content_hash)`` and forget removed ones."""
+        current = dict(files)
+        for path in [path for path in self.parsed if path not in current]:
+            del self.parsed[path]
+        for path, content_hash in current.items():
+            known = self.parsed.get(path)
+            if known and known[0] == content_hash:
+                continue
+            self.parsed[path] = (content_hash, extract_symbols(path, self.load_text(content_hash)))
+
+    def rank(self) -> List[Tuple[str, Symbol, float]]:
+        """Get every symbol with its score, highest first."""
+        paths = sorted(self.parsed)
+        if not paths:
+            return []
+        node = {path: i for i, path in enumerate(paths)}
+
+        definers: Dict[str, Set[int]] = {}
+        for path in paths:
+            # File names are definitions too, so <script src> and <link href> become edges
+            definers.setdefault(PurePosixPath(path).name, set()).add(node[path])
+            for symbol in self.parsed[path][1].definitions:
+                definers.setdefault(symbol.name, set()).add(node[path])
+
+        sources, targets, weights = [], [], []
+        name_weight: Dict[Tuple[int, str], float] = {}  # (defining file, name) -> incoming reference weight
+        for path in paths:
+            source = node[path]
+            for name, count in self.parsed[path][1].references.items():
+                defining = definers.get(name)
+                if not defining:
+                    continue
+                # Frequent references count sublinearly; a name defined in many files is ambiguous
+                weight = _name_weight(name) * np.sqrt(count) / len(defining)
+                if weight == 0:
+                    continue
+                for target in defining:
+                    if target == source:
+                        continue
+                    sources.append(source)
+                    targets.append(target)
+                    weights.append(weight)
+                    name_weight[(target, name)] = name_weight.get((target, name), 0.0) + weight
+
+        file_rank = pagerank(
+            np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64),
+            np.array(weights, dtype=np.float64), len(paths)
+        )
+
+        ranked = []
+        for path in paths:
+            index = node[path]
+            definitions = self.parsed[path][1].definitions
+            if not definitions:
+                continue
+            # Every symbol keeps a share of its file's rank; referenced ones get more
+            shares = np.array([1.0 + name_weight.get((index, symbol.name), 0.0) for symbol in definitions])
+            shares /= shares.sum()
+            for symbol, share in zip(definitions, shares):
+                ranked.append((path, symbol, float(file_rank[index] * share)))
+
+        ranked.sort(key=lambda item: (-item[2], item[0], item[1].line))
+        return ranked
+
+    def render(self, max_chars: int) -> Tuple[str, int, int]:
+        """Render the highest-ranked symbols that fit ``max_chars``, grouped by file.
+
+        Returns the outline plus the number of symbols shown and in total.
+        """
+        ranked = self.rank()
+        chosen: Dict[str, List[Symbol]] = {}
+        file_order: Dict[str, float] = {}
+        used = 0
+
+        for path, symbol, score in ranked:
+            cost = len(symbol.signature) + 2 * symbol.depth + 10
+            if path not in chosen:
+                cost += len(path) + 2
+            if used + cost > max_chars:
+                continue
+            chosen.setdefault(path, []).append(symbol)
+            file_order.setdefault(path, score)
+            used += cost
+
+        lines = []
+        for path in sorted(chosen, key=lambda p: -file_order[p]):
+            lines.append(f"{path}:")
+            for symbol in sorted(chosen[path], key=lambda s: s.line):
+                lines.append(f"{symbol.line:>5}: {'  ' * symbol.depth}{symbol.signature}")
+
+        shown = sum(len(symbols) for symbols in chosen.values())
+        return "\n".join(lines), shown, len(ranked)
@@ -0,0 +1,217 @@
+"""Record/replay cache of model responses keyed by a hash of the request."""
+
+import asyncio
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from core.context_cache import blob_path, write_blob
+from core.context_document import ContextDocument
+from core.llm_backend import LLMBackend
+from ui.display import display_error, display_info
+
+# Eviction removes least recently used responses until the store is this far under its limit
+EVICTION_TARGET = 0.9
+# Stands in for the workspace's absolute path, so recordings replay from any checkout
+WORKSPACE_PLACEHOLDER = "<workspace>"
+
+
+def _normalize(text: Any, workspace: Optional[str] = None) -> str:
+    """Normalize message text so requests differing only in line endings, trailing spaces or workspace location match.
+
+    Volatile parts of the project context (model-written file summaries)
+    are left out, as they depend on what was summarized on this machine.
+    """
+    if isinstance(text, ContextDocument):
+        text = text.stable_text()
+    text = str(text)
+    if workspace:
+        text = text.replace(workspace, WORKSPACE_PLACEHOLDER)
+    lines = [line.rstrip() for line in text.replace('\r\n', '\n').split('\n')]
+    if workspace:
+        # The directory tree starts with the workspace's own name
+        root_line = f"{Path(workspace).name}/"
+        lines = [f"{WORKSPACE_PLACEHOLDER}/" if line == root_line else line for line in lines]
+    return '\n'.join(lines).strip()
+
+
+def request_key(
+    conversation_history: List[Dict[str, Any]],
+    settings: Dict[str, Any],
+    workspace: Optional[Path] = None
+) -> str:
+    """Hash the normalized conversation (system prompt and project context included) with the generation settings."""
+    root = str(Path(workspace).resolve()) if workspace else None
+    payload = json.dumps({
+        'settings': settings,
+        'messages': [[message.get('role', 'user'), _normalize(message.get('content', ''), root)]
+                     for message in conversation_history]
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8', 'surrogateescape')).hexdigest()
+
+
+class ResponseStore:
+    """Content-addressed response files with least-recently-used eviction by total size.
+
+    Each response is a JSON file under its request hash. Reading one
+    refreshes its modification time, which orders eviction; once the store
+    grows past ``max_bytes`` the least recently used files are removed.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        """Initialize the store in ``directory`` with a size limit."""
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self._total_bytes: Optional[int] = None  # Measured on the first write
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Load the response recorded for a request hash."""
+        path = blob_path(self.directory, key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                response = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return response
+
+    def put(self, key: str, response: Dict[str, Any]):
+        """Record a response, replacing an earlier one for the same request."""
+        text = json.dumps({
+            'thoughts': response.get('thoughts', ''),
+            'final_text': response.get('final_text', ''),
+            'finish_reason': getattr(response.get('finish_reason'), 'name', response.get('finish_reason'))
+        }, ensure_ascii=False)
+        path = blob_path(self.directory, key)
+        try:
+            total = self._measure()
+            if path.exists():
+                total -= path.stat().st_size
+                path.unlink()
+            write_blob(self.directory, key, text)
+            self._total_bytes = total + path.stat().st_size
+        except OSError:
+            return
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _entries(self) -> List[os.DirEntry]:
+        entries = []
+        try:
+            for shard in os.scandir(self.directory):
+                if shard.is_dir():
+                    entries.extend(entry for entry in os.scandir(shard.path) if entry.is_file())
+        except OSError:
+            pass
+        return entries
+
+    def _measure(self) -> int:
+        if self._total_bytes is None:
+            self._total_bytes = sum(entry.stat().st_size for entry in self._entries())
+        return self._total_bytes
+
+    def _evict(self):
+        """Remove least recently used responses until well under the size limit."""
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime_ns)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes * EVICTION_TARGET:
+                break
+            try:
+                size = entry.stat().st_size
+                os.unlink(entry.path)
+                total -= size
+            except OSError:
+                pass
+        self._total_bytes = total
+
+
+class CachingBackend:
+    """Serves responses from a ResponseStore in front of another backend.
+
+    Modes: ``record`` always asks the backend and stores what it returns,
+    ``replay`` only serves recorded responses (a miss is a failed request),
+    and ``read-through`` serves recorded responses and asks the backend for
+    the rest, storing them. Requests are identified by ``request_key``, so
+    an identical task on an identical workspace replays without any API
+    call. Everything else passes straight through, except that replay
+    never contacts the model at all.
+    """
+
+    def __init__(self, backend: LLMBackend, store: ResponseStore, mode: str, workspace: Optional[Path] = None):
+        """Initialize with the backend to put the cache in front of and the workspace it serves."""
+        self.backend = backend
+        self.store = store
+        self.mode = mode
+        self.workspace = workspace
+        self.cache_stats = backend.cache_stats
+        self.hits = 0
+        self.misses = 0
+
+    async def initialize(self) -> bool:
+        if self.mode == "replay":
+            return True  # No client is needed, nor an API key
+        return await self.backend.initialize()
+
+    async def health_check(self) -> bool:
+        if self.mode == "replay":
+            return True
+        return await self.backend.health_check()
+
+    async def generate_response(self, conversation_history: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        return await self._cached(conversation_history, lambda: self.backend.generate_response(conversation_history))
+
+    async def generate_response_stream(
+        self,
+        conversation_history: List[Dict[str, Any]],
+        on_text: Optional[Callable[[str], None]] = None
+    ) -> Optional[Dict[str, Any]]:
+        return await self._cached(
+            conversation_history,
+            lambda: self.backend.generate_response_stream(conversation_history, on_text=on_text),
+            on_text
+        )
+
+    async def summarize_file(self, rel_path: str, content: str) -> Optional[str]:
+        if self.mode == "replay":
+            return None  # Summaries are cached by content hash already; replay makes no API calls
+        return await self.backend.summarize_file(rel_path, content)
+
+    async def close(self):
+        await self.backend.close()
+
+    def generation_settings(self) -> Dict[str, Any]:
+        return self.backend.generation_settings()
+
+    async def _cached(
+        self,
+        conversation_history: List[Dict[str, Any]],
+        generate: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+        on_text: Optional[Callable[[str], None]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Serve a request from the store or the backend, according to the mode."""
+        # Materializing and hashing the whole context is slow on large workspaces
+        key = await asyncio.to_thread(
+            request_key, list(conversation_history), self.backend.generation_settings(), self.workspace
+        )
+        if self.mode in ("replay", "read-through"):
+            response = self.store.get(key)
+            if response is not None:
+                self.hits += 1
+                display_info(f"Replayed recorded response {key[:12]}")
+                if on_text and response['final_text']:
+                    on_text(response['final_text'])
+                response['safety_ratings'] = None
+                response['usage'] = None  # Nothing was sent
+                return response
+            self.misses += 1
+            if self.mode == "replay":
+                display_error(f"No recorded response for this request ({key[:12]}) in replay mode")
+                return None
+
+        response = await generate()
+        if response is not None:
+            self.store.put(key, response)
+        return response
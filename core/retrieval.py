@@ -0,0 +1,191 @@
+"""Per-request retrieval of relevant file chunks with a hashed TF-IDF index."""
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tools.content_sniffer import SNIFF_BLOCK_SIZE, sniff_bytes, decode_text
+from tools.workspace_walker import WalkEntry
+
+
+CHUNK_LINES = 60
+HASH_BUCKETS = 1 << 20
+
+_WORD_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*|\d+')
+_SUBWORD_PATTERN = re.compile(r'[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+')
+
+
+@lru_cache(maxsize=1 << 16)
+def _word_tokens(word: str) -> Tuple[str, ...]:
+    """Get the lowercased tokens for one identifier: itself plus its snake_case/camelCase parts."""
+    tokens = [word.lower()] if len(word) > 1 else []
+    parts = _SUBWORD_PATTERN.findall(word)
+    if len(parts) > 1:
+        tokens.extend(part.lower() for part in parts if len(part) > 1)
+    return tuple(tokens)
+
+
+def tokenize(text: str) -> Counter:
+    """Count the tokens of a text, splitting identifiers into their parts."""
+    counts: Counter = Counter()
+    for word, occurrences in Counter(_WORD_PATTERN.findall(text)).items():
+        for token in _word_tokens(word):
+            counts[token] += occurrences
+    return counts
+
+
+def hash_terms(counts: Counter) -> Tuple[np.ndarray, np.ndarray]:
+    """Hash token counts into buckets, returning the distinct buckets and their summed counts."""
+    if not counts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    hashed = np.fromiter((hash(token) for token in counts), dtype=np.int64, count=len(counts))
+    buckets, inverse = np.unique(hashed & (HASH_BUCKETS - 1), return_inverse=True)
+    totals = np.bincount(inverse, weights=np.fromiter(counts.values(), dtype=np.int64, count=len(counts)))
+    return buckets, totals.astype(np.int64)
+
+
+@dataclass
+class Chunk:
+    """A run of lines from one file."""
+
+    path: str
+    start_line: int  # 1-based, inclusive
+    end_line: int
+
+
+class RetrievalIndex:
+    """Hashed bag-of-words TF-IDF index over fixed-size chunks of workspace files.
+
+    Each chunk is stored as its distinct term buckets and sublinear term
+    frequencies; document frequencies are kept per bucket. Like the search
+    index, ``update`` only re-reads files whose size or mtime changed, so
+    the index is built once and then patched. Queries score every chunk
+    with a few vectorized passes over the flattened postings.
+    """
+
+    def __init__(self, root_directory: Path, max_file_size: int = 1024 * 1024, chunk_lines: int = CHUNK_LINES):
+        """Initialize an empty index for a workspace root."""
+        self.root_directory = Path(root_directory).resolve()
+        self.max_file_size = max_file_size
+        self.chunk_lines = chunk_lines
+
+        self.files: Dict[str, Tuple[int, int, List[int]]] = {}  # path -> (size, mtime_ns, chunk ids)
+        self.chunks: Dict[int, Chunk] = {}
+        self.terms: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}  # chunk id -> (buckets, tf weights)
+        self.document_frequency = np.zeros(HASH_BUCKETS, dtype=np.int32)
+        self.next_chunk_id = 0
+
+        # Flattened postings, rebuilt lazily after updates
+        self._flat: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def update(self, entries: List[WalkEntry]) -> int:
+        """Bring the index in line with a walk's file list. Returns the number of files (re)indexed."""
+        current = {
+            entry.path: entry for entry in entries
+            if not entry.binary and entry.size <= self.max_file_size
+        }
+
+        for path in [path for path in self.files if path not in current]:
+            self._remove(path)
+
+        indexed = 0
+        for path, entry in current.items():
+            known = self.files.get(path)
+            if known and known[0] == entry.size and known[1] == entry.mtime_ns:
+                continue
+            if known:
+                self._remove(path)
+            self._add(entry)
+            indexed += 1
+
+        if indexed:
+            self._flat = None
+        return indexed
+
+    def query(self, text: str, top_k: int) -> List[Tuple[Chunk, float]]:
+        """Get up to ``top_k`` chunks ranked by cosine similarity to the query text."""
+        query_buckets, query_counts = hash_terms(tokenize(text))
+        if not len(query_buckets) or not self.chunks:
+            return []
+
+        chunk_ids, rows, buckets, weights = self._flattened()
+        idf = np.log((1 + len(chunk_ids)) / (1 + self.document_frequency.astype(np.float32))) + 1
+
+        query_vector = np.zeros(HASH_BUCKETS, dtype=np.float32)
+        query_weights = (1 + np.log(query_counts)) * idf[query_buckets]
+        query_vector[query_buckets] = query_weights / np.linalg.norm(query_weights)
+
+        weighted = weights * idf[buckets]
+        norms = np.sqrt(np.bincount(rows, weights=weighted * weighted, minlength=len(chunk_ids)))
+        scores = np.bincount(rows, weights=weighted * query_vector[buckets], minlength=len(chunk_ids))
+        scores /= np.maximum(norms, 1e-9)
+
+        top_k = min(top_k, int(np.count_nonzero(scores)))
+        if top_k <= 0:
+            return []
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [(self.chunks[int(chunk_ids[row])], float(scores[row])) for row in best]
+
+    def read_lines(self, chunk: Chunk) -> str:
+        """Read a chunk's lines from disk."""
+        text = self._read_text(chunk.path)
+        if text is None:
+            return ""
+        return "\n".join(text.splitlines()[chunk.start_line - 1:chunk.end_line])
+
+    def _add(self, entry: WalkEntry):
+        text = self._read_text(entry.path)
+        lines = text.splitlines() if text is not None else []
+        path_tokens = tokenize(entry.path)
+        chunk_ids = []
+        for start in range(0, len(lines), self.chunk_lines):
+            chunk_text = "\n".join(lines[start:start + self.chunk_lines])
+            buckets, counts = hash_terms(path_tokens + tokenize(chunk_text))
+            if not len(buckets):
+                continue
+
+            chunk_id = self.next_chunk_id
+            self.next_chunk_id += 1
+            self.chunks[chunk_id] = Chunk(entry.path, start + 1, min(start + self.chunk_lines, len(lines)))
+            self.terms[chunk_id] = (buckets, (1 + np.log(counts)).astype(np.float32))
+            self.document_frequency[buckets] += 1
+            chunk_ids.append(chunk_id)
+
+        self.files[entry.path] = (entry.size, entry.mtime_ns, chunk_ids)
+
+    def _remove(self, path: str):
+        _, _, chunk_ids = self.files.pop(path)
+        for chunk_id in chunk_ids:
+            buckets, _ = self.terms.pop(chunk_id)
+            self.document_frequency[buckets] -= 1
+            del self.chunks[chunk_id]
+        self._flat = None
+
+    def _flattened(self):
+        """Concatenate per-chunk postings into (chunk ids, row per posting, buckets, weights)."""
+        if self._flat is None:
+            chunk_ids = np.fromiter(self.terms.keys(), dtype=np.int64, count=len(self.terms))
+            postings = list(self.terms.values())
+            lengths = np.fromiter((len(buckets) for buckets, _ in postings), dtype=np.int64, count=len(postings))
+            rows = np.repeat(np.arange(len(postings)), lengths)
+            buckets = np.concatenate([buckets for buckets, _ in postings])
+            weights = np.concatenate([weights for _, weights in postings])
+            self._flat = (chunk_ids, rows, buckets, weights)
+        return self._flat
+
+    def _read_text(self, rel_path: str) -> Optional[str]:
+        try:
+            with open(self.root_directory / rel_path, 'rb') as f:
+                data = f.read(self.max_file_size + 1)
+        except OSError:
+            return None
+        sniff = sniff_bytes(data[:SNIFF_BLOCK_SIZE])
+        if sniff.is_binary:
+            return None
+        return decode_text(data, sniff.encoding)
@@ -0,0 +1,194 @@
+"""Retry policy and client-side rate limiting for Gemini requests."""
+
+import asyncio
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from google.genai import errors
+
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+# "retryDelay": "23s" in RetryInfo details, or "Please retry in 23.4s." in the message
+_RETRY_HINT_PATTERN = re.compile(r"retry(?:Delay['\"]?\s*:\s*['\"]?|\s+in\s+)(\d+(?:\.\d+)?)s", re.IGNORECASE)
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """Get the HTTP status of an API error, or None for other errors."""
+    if isinstance(error, errors.APIError):
+        return error.code
+    return None
+
+
+def describe_error(error: BaseException) -> str:
+    """Describe an error in one short line, such as "429 RESOURCE_EXHAUSTED: Quota exceeded"."""
+    if isinstance(error, errors.APIError):
+        return f"{error.code} {error.status}: {error.message}" if error.message else f"{error.code} {error.status}"
+    return f"{type(error).__name__}: {error}"
+
+
+def _find_retry_delay(value: Any) -> Optional[str]:
+    """Find a RetryInfo ``retryDelay`` anywhere in an error's JSON details."""
+    if isinstance(value, dict):
+        if isinstance(value.get('retryDelay'), str):
+            return value['retryDelay']
+        value = list(value.values())
+    if isinstance(value, list):
+        for item in value:
+            found = _find_retry_delay(item)
+            if found:
+                return found
+    return None
+
+
+def retry_hint(error: BaseException) -> Optional[float]:
+    """Get the wait in seconds the server asked for, from RetryInfo, a Retry-After header or the message."""
+    delay = _find_retry_delay(getattr(error, 'details', None))
+    if delay:
+        try:
+            return float(delay.rstrip('s'))
+        except ValueError:
+            pass
+
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if headers:
+        try:
+            return float(headers.get('retry-after'))
+        except (TypeError, ValueError):
+            pass
+
+    match = _RETRY_HINT_PATTERN.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+@dataclass
+class RetryPolicy:
+    """When to retry a failed request and how long to wait first."""
+
+    max_attempts: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """Check whether an error is transient: rate limits, server errors, timeouts and dropped connections."""
+        code = status_code(error)
+        if code is not None:
+            return code in RETRYABLE_STATUS_CODES
+        return isinstance(error, (httpx.TransportError, asyncio.TimeoutError, ConnectionError))
+
+    def delay(self, attempt: int, error: BaseException) -> float:
+        """Get the wait before retrying after failed attempt number ``attempt`` (1-based).
+
+        A server hint is followed, spread by up to 10% so queued callers do not
+        return at once. Otherwise the backoff doubles per attempt up to
+        ``max_delay``, with "equal jitter": half the backoff is fixed and half
+        random, so retries always back off but never synchronize.
+        """
+        hint = retry_hint(error)
+        if hint is not None:
+            return hint * random.uniform(1.0, 1.1)
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+class TokenBucket:
+    """Requests-per-minute and tokens-per-minute budgets shared by every caller.
+
+    Each budget refills continuously at its per-minute rate up to one
+    minute's worth. Callers wait in arrival order until both budgets cover
+    their request, so a burst is queued and released at the sustained rate
+    instead of being sent and rejected. A limit of 0 disables that budget.
+    ``pause`` holds every caller, for example after a 429 from the server.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        """Initialize full buckets for the given limits."""
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.requests = float(requests_per_minute)
+        self.tokens = float(tokens_per_minute)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waited_seconds = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """Wait until a request of about ``tokens`` prompt tokens may be sent; returns the time waited."""
+        start = time.monotonic()
+        # A request larger than the whole budget is let through once the bucket is full
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = max(
+                    self.paused_until - now,
+                    self._time_until(self.requests, 1, self.requests_per_minute),
+                    self._time_until(self.tokens, tokens, self.tokens_per_minute)
+                )
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+
+            if self.requests_per_minute:
+                self.requests -= 1
+            if self.tokens_per_minute:
+                self.tokens -= tokens
+        waited = time.monotonic() - start
+        self.waited_seconds += waited
+        return waited
+
+    def try_acquire(self, tokens: int = 0) -> bool:
+        """Take budget for a request only if it is available now and nobody is waiting."""
+        tokens = min(tokens, self.tokens_per_minute)
+        if self.lock.locked():
+            return False
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.paused_until or max(
+            self._time_until(self.requests, 1, self.requests_per_minute),
+            self._time_until(self.tokens, tokens, self.tokens_per_minute)
+        ) > 0:
+            return False
+        if self.requests_per_minute:
+            self.requests -= 1
+        if self.tokens_per_minute:
+            self.tokens -= tokens
+        return True
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Correct the token budget once the server reports what a request really used."""
+        if self.tokens_per_minute and actual_tokens is not None:
+            self.tokens = min(self.tokens + min(estimated_tokens, self.tokens_per_minute) - actual_tokens,
+                              float(self.tokens_per_minute))
+
+    def pause(self, seconds: float):
+        """Hold every caller for ``seconds``."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        self.updated = now
+        if self.requests_per_minute:
+            self.requests = min(self.requests + elapsed * self.requests_per_minute / 60, self.requests_per_minute)
+        if self.tokens_per_minute:
+            self.tokens = min(self.tokens + elapsed * self.tokens_per_minute / 60, self.tokens_per_minute)
+
+    @staticmethod
+    def _time_until(available: float, needed: float, per_minute: int) -> float:
+        if not per_minute or available >= needed:
+            return 0.0
+        return (needed - available) * 60 / per_minute
+
+
+_shared_buckets: Dict[Tuple[str, int, int], TokenBucket] = {}
+
+
+def shared_bucket(key: str, requests_per_minute: int, tokens_per_minute: int) -> TokenBucket:
+    """Get the bucket every client in this process uses for ``key`` (such as a model name) and these limits."""
+    bucket_key = (key, requests_per_minute, tokens_per_minute)
+    if bucket_key not in _shared_buckets:
+        _shared_buckets[bucket_key] = TokenBucket(requests_per_minute, tokens_per_minute)
+    return _shared_buckets[bucket_key]
@@ -0,0 +1,49 @@
+"""On-disk cache of model-written file summaries keyed by content hash."""
+
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from core.context_cache import blob_path, write_blob
+
+
+class SummaryCache:
+    """Summaries of file contents stored one file per content hash.
+
+    Keying by hash rather than path means a file is never summarized twice
+    while its content is unchanged, in any workspace, and a renamed or
+    copied file reuses its summary. Without a directory summaries only
+    live for the session. Lookups are memoized, misses included.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        """Initialize the cache, persisting to ``directory`` when given."""
+        self.directory = str(directory) if directory else None
+        self.summaries: Dict[str, str] = {}
+        self.missing: Set[str] = set()
+
+    def get(self, content_hash: Optional[str]) -> Optional[str]:
+        """Get the summary for a content hash, if one was written."""
+        if not content_hash or content_hash in self.missing:
+            return None
+        summary = self.summaries.get(content_hash)
+        if summary is None and self.directory:
+            try:
+                with open(blob_path(self.directory, content_hash), 'r', encoding='utf-8') as f:
+                    summary = f.read()
+            except OSError:
+                pass
+        if summary is None:
+            self.missing.add(content_hash)
+        else:
+            self.summaries[content_hash] = summary
+        return summary
+
+    def store(self, content_hash: str, summary: str):
+        """Record the summary for a content hash."""
+        self.summaries[content_hash] = summary
+        self.missing.discard(content_hash)
+        if self.directory:
+            try:
+                write_blob(self.directory, content_hash, summary)
+            except OSError:
+                pass
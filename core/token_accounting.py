@@ -0,0 +1,115 @@
+"""Local token estimates, pre-flight size checks and reported token usage."""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional, Union
+
+from core.context_document import BlobSegment, ContextDocument
+
+# Letter runs count one token per 8 letters, digits one per 3, and every other
+# non-space character one each: close to the API's counts for code and English
+# prose, and never far under them for symbol-heavy or non-Latin text
+_WORD_PIECES = re.compile(r"[A-Za-z]{1,8}")
+_OTHER_PIECES = re.compile(r"\d{1,3}|[^\sA-Za-z\d]")
+# Text segments shorter than this are counted directly rather than memoized
+MEMO_MIN_CHARS = 256
+
+# Names reported for each type of conversation message
+SOURCE_NAMES = {
+    'system': "system context",
+    'system_observation': "observations",
+    'user_input': "user",
+    'assistant_response': "assistant"
+}
+
+
+def _count(text: str) -> int:
+    return len(_WORD_PIECES.findall(text)) + len(_OTHER_PIECES.findall(text))
+
+
+@lru_cache(maxsize=1024)
+def _count_memoized(text: str) -> int:
+    return _count(text)
+
+
+@lru_cache(maxsize=16384)
+def _count_blob(path: str, length: int) -> int:
+    # Blobs are named by content hash, so a path always holds the same text
+    return _count(BlobSegment(path, length).read())
+
+
+def estimate_tokens(text: Union[str, ContextDocument, None]) -> int:
+    """Estimate the tokens in a message without calling the API.
+
+    Project context is re-sent with every request, so long strings and
+    stored file contents are only counted the first time they are seen.
+    """
+    if not text:
+        return 0
+    if isinstance(text, ContextDocument):
+        return sum(
+            estimate_tokens(segment) if isinstance(segment, str) else _count_blob(str(segment.path), segment.length)
+            for segment in text.segments
+        )
+    text = str(text)
+    return _count_memoized(text) if len(text) >= MEMO_MIN_CHARS else _count(text)
+
+
+def check_request_size(estimated_tokens: int, max_input_tokens: int):
+    """Refuse a request that would exceed the model's input limit before it is sent."""
+    if max_input_tokens and estimated_tokens > max_input_tokens:
+        raise ValueError(
+            f"Request of about {estimated_tokens:,} tokens exceeds the input limit of {max_input_tokens:,} tokens"
+        )
+
+
+@dataclass
+class TokenUsage:
+    """Tokens reported by the API for one or more responses."""
+
+    prompt_tokens: int = 0
+    cached_tokens: int = 0  # Part of prompt_tokens
+    thinking_tokens: int = 0
+    output_tokens: int = 0
+
+    @classmethod
+    def from_metadata(cls, usage_metadata: Any) -> Optional['TokenUsage']:
+        """Read the counts from a response's ``usage_metadata``."""
+        if usage_metadata is None:
+            return None
+        return cls(
+            prompt_tokens=usage_metadata.prompt_token_count or 0,
+            cached_tokens=getattr(usage_metadata, 'cached_content_token_count', None) or 0,
+            thinking_tokens=getattr(usage_metadata, 'thoughts_token_count', None) or 0,
+            output_tokens=getattr(usage_metadata, 'candidates_token_count', None) or 0
+        )
+
+    def add(self, other: Optional['TokenUsage']):
+        """Add the counts of another response."""
+        if other is None:
+            return
+        self.prompt_tokens += other.prompt_tokens
+        self.cached_tokens += other.cached_tokens
+        self.thinking_tokens += other.thinking_tokens
+        self.output_tokens += other.output_tokens
+
+    def describe(self, prompt_sources: Optional[Dict[str, int]] = None) -> str:
+        """Describe the counts in one line, attributing the prompt to its sources if given.
+
+        ``prompt_sources`` maps message types to estimated tokens; they are
+        scaled to add up to the reported prompt size.
+        """
+        text = (
+            f"{self.prompt_tokens:,} prompt ({self.cached_tokens:,} cached), "
+            f"{self.thinking_tokens:,} thinking, {self.output_tokens:,} output"
+        )
+        estimated = sum(prompt_sources.values()) if prompt_sources else 0
+        if not estimated:
+            return text
+        scale = self.prompt_tokens / estimated if self.prompt_tokens else 1.0
+        sources = ", ".join(
+            f"{SOURCE_NAMES.get(source, source)} {round(tokens * scale):,}"
+            for source, tokens in sorted(prompt_sources.items(), key=lambda item: -item[1])
+        )
+        return f"{text}; prompt by source: {sources}"
@@ -0,0 +1,304 @@
+"""Workspace filesystem watcher with debounced change coalescing."""
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from tools.gitignore import GitIgnoreMatcher
+from tools.workspace_walker import WalkResult, WorkspaceWalker
+from ui.display import display_info, display_warning
+
+
+# Callback receiving changed paths relative to the workspace root, or None
+# when events were lost and the whole workspace must be rescanned
+ChangeCallback = Callable[[Optional[Set[str]]], Awaitable[None]]
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyBackend:
+    """Linux inotify backend driven by the event loop's reader callbacks."""
+
+    def __init__(self, root_directory: Path, walker: WorkspaceWalker, on_paths: Callable[[Optional[Set[str]]], None]):
+        """Initialize the backend; ``on_paths`` receives raw changed paths."""
+        self.root_directory = root_directory
+        self.walker = walker
+        self.on_paths = on_paths
+        self.fd = -1
+        self.watches: Dict[int, str] = {}  # wd -> directory relative to the root ('' for root)
+        self.libc = None
+        self.git = None
+
+    @staticmethod
+    def available() -> bool:
+        """Check whether inotify can be used on this platform."""
+        return sys.platform.startswith('linux')
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """Create the inotify instance and watch every non-ignored directory."""
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Directories the walk ignores (such as a gitignored node_modules) are not watched
+        self.git = self.walker.load_ignore_state()
+        self._add_tree("")
+        loop.add_reader(self.fd, self.drain)
+
+    def stop(self, loop: asyncio.AbstractEventLoop):
+        """Stop watching and release the inotify descriptor."""
+        if self.fd >= 0:
+            loop.remove_reader(self.fd)
+            os.close(self.fd)
+            self.fd = -1
+            self.watches.clear()
+
+    async def poll(self):
+        """Deliver events already queued (reading them never blocks)."""
+        self.drain()
+
+    def drain(self):
+        """Read and translate every queued event without blocking."""
+        changed: Set[str] = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            except OSError:
+                break
+            if not data:
+                break
+
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                wd, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + name_len].rstrip(b'\0')
+                offset += EVENT_HEADER.size + name_len
+
+                if mask & IN_Q_OVERFLOW:
+                    self.on_paths(None)
+                    return
+                if mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                    continue
+
+                directory = self.watches.get(wd)
+                if directory is None:
+                    continue
+                if not name:
+                    continue  # Self events are reported by the parent directory's watch
+
+                rel_path = f"{directory}/{os.fsdecode(name)}" if directory else os.fsdecode(name)
+                changed.add(rel_path)
+
+                # New directories need their own watches (and may already contain files)
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_tree(rel_path)
+
+        if changed:
+            self.on_paths(changed)
+
+    def _add_tree(self, rel_dir: str):
+        """Watch a directory and all directories below it that the walk does not ignore."""
+        matcher = self.walker.matcher_for(rel_dir, self.git)
+        if matcher is not False:
+            self._watch_tree(rel_dir, matcher)
+
+    def _watch_tree(self, rel_dir: str, matcher: Optional[GitIgnoreMatcher]):
+        """Watch a directory and its non-ignored subdirectories, given the ignore rules in effect inside it."""
+        full_path = self.root_directory / rel_dir if rel_dir else self.root_directory
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(full_path), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            if errno == 28:  # ENOSPC: out of inotify watches
+                raise OSError(errno, "inotify watch limit reached")
+            return
+        self.watches[wd] = rel_dir
+
+        try:
+            with os.scandir(full_path) as iterator:
+                subdirs = [entry.name for entry in iterator if entry.is_dir(follow_symlinks=False)]
+        except OSError:
+            return
+        for name in subdirs:
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            sub_matcher = self.walker.descend_matcher(rel_path, matcher, self.git)
+            if sub_matcher is not False:
+                self._watch_tree(rel_path, sub_matcher)
+
+
+class PollingBackend:
+    """Fallback backend that diffs stat snapshots of the workspace periodically."""
+
+    def __init__(self, root_directory: Path, walker: WorkspaceWalker, on_paths: Callable[[Optional[Set[str]]], None],
+                 interval: float = 2.0):
+        """Initialize the backend; ``on_paths`` receives raw changed paths."""
+        self.root_directory = root_directory
+        self.walker = walker
+        self.on_paths = on_paths
+        self.interval = interval
+        self.snapshot = WalkResult()
+        self.task: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()  # Keeps snapshots from being compared out of order
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """Take the initial snapshot and start polling."""
+        self.snapshot = self._take_snapshot()
+        self.task = loop.create_task(self._poll_loop())
+
+    def stop(self, loop: asyncio.AbstractEventLoop):
+        """Stop polling."""
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    async def poll(self):
+        """Poll immediately, walking the workspace off the event loop."""
+        async with self.lock:
+            self._compare(await asyncio.to_thread(self._take_snapshot))
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.poll()
+
+    def _take_snapshot(self) -> WalkResult:
+        return self.walker.walk()
+
+    def _compare(self, snapshot: WalkResult):
+        created, modified, deleted = self.snapshot.table.diff(snapshot.table)
+        changed = set(created) | set(modified) | set(deleted)
+        # Entries that are not files (such as empty directories) only show up in the tree
+        for attr in ('dirs', 'denied', 'other_paths'):
+            changed |= getattr(self.snapshot, attr) ^ getattr(snapshot, attr)
+        self.snapshot = snapshot
+        if '' in changed:
+            self.on_paths(None)  # The root itself changed
+        elif changed:
+            self.on_paths(changed)
+
+
+class WorkspaceWatcher:
+    """Keeps subscribers informed of workspace changes, batching bursts of events.
+
+    Uses inotify where available and falls back to polling. Raw events are
+    coalesced into one set of paths, delivered once no new event has
+    arrived for ``debounce`` seconds, or immediately on ``flush``.
+    """
+
+    def __init__(self, root_directory: Path, on_change: ChangeCallback, debounce: float = 0.2,
+                 poll_interval: float = 2.0):
+        """Initialize the watcher for a workspace root."""
+        self.root_directory = Path(root_directory).resolve()
+        self.on_change = on_change
+        self.debounce = debounce
+        self.walker = WorkspaceWalker(self.root_directory)
+        self.backend = None
+        self.poll_interval = poll_interval
+        self.pending: Set[str] = set()
+        self.rescan_pending = False
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.delivery: Optional[asyncio.Task] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> bool:
+        """Start watching. Returns False if no backend could be started."""
+        self.loop = asyncio.get_running_loop()
+
+        if InotifyBackend.available():
+            backend = InotifyBackend(self.root_directory, self.walker, self._queue)
+            try:
+                backend.start(self.loop)
+                self.backend = backend
+                display_info(f"Watching workspace with inotify ({len(backend.watches)} directories)")
+                return True
+            except (OSError, AttributeError) as e:
+                backend.stop(self.loop)
+                display_warning(f"inotify unavailable ({e}); falling back to polling")
+
+        try:
+            self.backend = PollingBackend(self.root_directory, self.walker, self._queue, self.poll_interval)
+            self.backend.start(self.loop)
+            display_info(f"Watching workspace by polling every {self.poll_interval:.0f}s")
+            return True
+        except Exception as e:
+            display_warning(f"Workspace watcher disabled: {e}")
+            self.backend = None
+            return False
+
+    async def stop(self):
+        """Stop watching and drop pending events."""
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        if self.backend and self.loop:
+            self.backend.stop(self.loop)
+        self.backend = None
+        self.pending.clear()
+
+    async def flush(self):
+        """Deliver every change that has happened so far, without waiting for the debounce."""
+        if not self.backend:
+            return
+        await self.backend.poll()
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        if self.delivery and not self.delivery.done():
+            await self.delivery
+        await self._deliver()
+
+    def _queue(self, paths: Optional[Set[str]]):
+        """Collect raw changes and (re)start the debounce timer."""
+        if paths is None:
+            self.rescan_pending = True
+        else:
+            self.pending.update(paths)
+
+        if self.timer:
+            self.timer.cancel()
+        self.timer = self.loop.call_later(self.debounce, self._on_timer)
+
+    def _on_timer(self):
+        self.timer = None
+        if self.delivery is None or self.delivery.done():
+            self.delivery = self.loop.create_task(self._deliver())
+        else:
+            # A delivery is running; try again once it has had time to finish
+            self.timer = self.loop.call_later(self.debounce, self._on_timer)
+
+    async def _deliver(self):
+        """Hand the coalesced changes to the subscriber."""
+        if not self.pending and not self.rescan_pending:
+            return
+        paths = None if self.rescan_pending else set(self.pending)
+        self.pending.clear()
+        self.rescan_pending = False
+        try:
+            await self.on_change(paths)
+        except Exception as e:
+            display_warning(f"Failed to apply workspace changes: {e}")
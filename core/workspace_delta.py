@@ -0,0 +1,151 @@
+"""Reporting of workspace changes made by a batch of commands as a compact diff."""
+
+import asyncio
+import difflib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from core.context import ProjectContextBuilder
+from tools.content_sniffer import SNIFF_BLOCK_SIZE, sniff_bytes, decode_text
+from tools.file_table import FileTable
+
+DIFF_CONTEXT_LINES = 2
+
+
+@dataclass
+class Snapshot:
+    """Stat data of every file plus the hashes of those whose current content is cached."""
+
+    table: FileTable
+    hashes: Dict[str, str]
+
+
+class WorkspaceDelta:
+    """Compares stat snapshots taken around command execution.
+
+    A snapshot is the file table of the live view (or of a fresh walk when
+    no watcher keeps the view current) plus the content hash of every
+    file whose current version is in the context cache, so the previous
+    content of a modified file can be diffed even after the live view has
+    moved on. Both the cache check and the comparison are vectorized.
+    Diffs are capped per file and in total; files beyond the cap are still
+    listed by path.
+    """
+
+    def __init__(
+        self,
+        context_builder: ProjectContextBuilder,
+        max_chars: int = 8000,
+        max_file_chars: int = 3000,
+        max_file_size: int = 1024 * 1024
+    ):
+        """Initialize with the project context builder whose view, walker and cache are used."""
+        self.context_builder = context_builder
+        self.walker = context_builder.walker
+        self.cache = context_builder.cache
+        self.max_chars = max_chars
+        self.max_file_chars = max_file_chars
+        self.max_file_size = max_file_size
+
+    async def snapshot(self) -> Snapshot:
+        """Record the size and mtime of every file and the cached content hash where current."""
+        if self.context_builder.live_view:
+            await self.context_builder.sync()
+            table = self.context_builder.current_walk.table
+        else:
+            table = (await asyncio.to_thread(self.walker.walk)).table
+
+        # Only cached files can have a previous version to diff against
+        cached = [(path, entry) for path, entry in self.cache.entries.items() if 'hash' in entry]
+        rows = table.find([path for path, _ in cached])
+        found = rows >= 0
+        sizes = np.fromiter((entry['size'] for _, entry in cached), dtype=np.int64, count=len(cached))
+        mtimes = np.fromiter((entry['mtime_ns'] for _, entry in cached), dtype=np.int64, count=len(cached))
+        current = found.copy()
+        current[found] = (table.size[rows[found]] == sizes[found]) & (table.mtime_ns[rows[found]] == mtimes[found])
+
+        return Snapshot(table, {cached[i][0]: cached[i][1]['hash'] for i in np.flatnonzero(current)})
+
+    async def describe(self, before: Snapshot, after: Snapshot) -> str:
+        """Describe the files created, modified and deleted between two snapshots, or '' if none."""
+        created, modified, deleted = before.table.diff(after.table)
+        if not (created or deleted or modified):
+            return ""
+        return await asyncio.to_thread(self._render, created, modified, deleted, before)
+
+    def _render(self, created: List[str], modified: List[str], deleted: List[str], before: Snapshot) -> str:
+        lines = [
+            f"WORKSPACE CHANGES ({len(created)} created, {len(modified)} modified, {len(deleted)} deleted; "
+            "these supersede the project context):"
+        ]
+        used = len(lines[0])
+        skipped = []
+
+        old_sizes = dict(zip(modified, before.table.size[before.table.find(modified)].tolist())) if modified else {}
+        for path in created + modified:
+            status = "modified" if path in old_sizes else "created"
+            old_text = "" if status == "created" else self._read_cached(before.hashes.get(path))
+            new_text = self._read_current(path)
+
+            if new_text is None:
+                section = f"{status}: {path} (binary or too large to diff)"
+            elif old_text is None:
+                section = (
+                    f"{status}: {path} (was {old_sizes[path]} bytes, now {len(new_text)} chars; "
+                    "previous content was not in context, use READ_FILE to view)"
+                )
+            else:
+                section = f"{status}: {path}\n{self._diff(path, old_text, new_text)}"
+
+            if used + len(section) > self.max_chars:
+                skipped.append(f"{status}: {path}")
+                continue
+            lines.append(section)
+            used += len(section)
+
+        lines.extend(skipped)
+        lines.extend(f"deleted: {path}" for path in deleted)
+        return "\n".join(lines)
+
+    def _diff(self, path: str, old_text: str, new_text: str) -> str:
+        """Unified diff of two versions of a file, truncated to the per-file cap."""
+        diff = list(difflib.unified_diff(
+            old_text.splitlines(), new_text.splitlines(),
+            fromfile=f"a/{path}", tofile=f"b/{path}",
+            n=DIFF_CONTEXT_LINES, lineterm=''
+        ))
+        if not diff:
+            return "(content unchanged)"
+
+        kept = []
+        used = 0
+        for line in diff:
+            if used + len(line) + 1 > self.max_file_chars:
+                kept.append(f"... ({len(diff) - len(kept)} more diff lines; use READ_FILE for the full file)")
+                break
+            kept.append(line)
+            used += len(line) + 1
+        return "\n".join(kept)
+
+    def _read_cached(self, content_hash: Optional[str]) -> Optional[str]:
+        if content_hash is None:
+            return None
+        try:
+            return self.cache.read_content(content_hash)
+        except OSError:
+            return None
+
+    def _read_current(self, rel_path: str) -> Optional[str]:
+        try:
+            with open(self.walker.root_directory / rel_path, 'rb') as f:
+                data = f.read(self.max_file_size + 1)
+        except OSError:
+            return None
+        if len(data) > self.max_file_size:
+            return None
+        sniff = sniff_bytes(data[:SNIFF_BLOCK_SIZE])
+        if sniff.is_binary:
+            return None
+        return decode_text(data, sniff.encoding)
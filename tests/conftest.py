@@ -0,0 +1,16 @@
+"""Shared fixtures for the test suite."""
+
+import pytest
+
+from config.settings import Config
+
+
+@pytest.fixture
+def make_config(monkeypatch):
+    """Build a Config from the given environment variables on top of a test API key."""
+    def make(**env) -> Config:
+        monkeypatch.setenv("GEMINI_API_KEY", "test")
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        return Config()
+    return make
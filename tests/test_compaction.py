@@ -0,0 +1,25 @@
+"""Tests for generated-file detection."""
+
+import pytest
+
+from core.compaction import classify_content
+
+
+@pytest.mark.parametrize("text", [
+    "// Code generated by protoc-gen-go. DO NOT EDIT.\npackage api\n",
+    "# -*- coding: utf-8 -*-\n# Generated by Django 4.2 on 2024-01-01\nfrom django.db import migrations\n",
+    "/**\n * @generated SignedSource<<abc>>\n */\nexport const x = 1;\n",
+])
+def test_generated_headers(text):
+    assert classify_content(text) == 'generated'
+
+
+@pytest.mark.parametrize("text", [
+    "# The user id is auto-generated by the database\nclass User:\n    pass\n",
+    "# Settings are automatically generated on first run\nDEFAULTS = {}\n",
+    "x = 1\n# Do not edit\n",
+    'TEMPLATE = "Code generated by gen. DO NOT EDIT."\n',
+    "\n" * 20 + "// @generated\n",
+])
+def test_hand_written_files_are_kept(text):
+    assert classify_content(text) is None
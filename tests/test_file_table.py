@@ -0,0 +1,70 @@
+"""Tests for path matching in the columnar file table."""
+
+import numpy as np
+import pytest
+
+from tools import file_table
+from tools.file_table import FileTable, WalkEntry, path_key
+
+
+def make_table(*entries) -> FileTable:
+    return FileTable.from_entries(WalkEntry(path, size, 0) for path, size in entries)
+
+
+def row_paths(table: FileTable, columns) -> list:
+    names = bytes(table._names)
+    starts = [0] + list(columns['name_end'][:-1])
+    return [table.dirs[d] + names[s:e].decode() for d, s, e in zip(columns['dir_id'], starts, columns['name_end'])]
+
+
+@pytest.fixture
+def colliding_keys(monkeypatch):
+    """Give 'a.py' and 'b.py' the same key."""
+    real_key = file_table.path_key
+
+    def path_keys(table, columns):
+        paths = row_paths(table, columns)
+        return np.array([real_key('a.py' if path == 'b.py' else path) for path in paths], dtype=np.int64)
+
+    monkeypatch.setattr(file_table, 'path_key', lambda path: real_key('a.py' if path == 'b.py' else path))
+    monkeypatch.setattr(FileTable, '_path_keys', path_keys)
+
+
+def test_table_keys_match_path_key():
+    paths = ['a.py', 'src/a.py', 'src/lib/module_with_a_long_name.py', 'docs/caf\u00e9.md', 'Makefile']
+    table = make_table(*((path, 1) for path in paths))
+
+    assert list(table._arrays()['key']) == [path_key(path) for path in paths]
+    assert list(table.find(paths[::-1])) == [4, 3, 2, 1, 0]
+
+
+def test_path_key_is_stable_across_runs():
+    # Published 64-bit FNV-1a value of "a", independent of PYTHONHASHSEED
+    assert path_key('a') == 0xaf63dc4c8601ec8c - (1 << 64)
+
+
+def test_find_checks_the_matched_path(colliding_keys):
+    table = make_table(('a.py', 1), ('c.py', 2))
+
+    assert list(table.find(['a.py', 'b.py', 'c.py'])) == [0, -1, 1]
+
+
+def test_find_with_duplicate_keys(colliding_keys):
+    table = make_table(('a.py', 1), ('b.py', 2))
+
+    assert list(table.find(['b.py', 'a.py', 'd.py'])) == [1, 0, -1]
+
+
+def test_diff_with_duplicate_keys(colliding_keys):
+    old = make_table(('a.py', 1), ('b.py', 2), ('c.py', 3))
+    new = make_table(('b.py', 5), ('a.py', 1), ('d.py', 4))
+
+    assert old.diff(new) == (['d.py'], ['b.py'], ['c.py'])
+
+
+def test_diff():
+    old = make_table(('a.py', 1), ('b.py', 2), ('c.py', 3))
+    new = make_table(('a.py', 1), ('b.py', 5), ('d.py', 4))
+
+    assert old.diff(new) == (['d.py'], ['b.py'], ['c.py'])
+    assert old.diff(make_table(('a.py', 1), ('b.py', 2), ('c.py', 4))) == ([], ['c.py'], [])
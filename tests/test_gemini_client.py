@@ -0,0 +1,116 @@
+"""Tests for GeminiClient retries and prompt prefix caching against local stand-ins for the API."""
+
+import asyncio
+import time
+
+import pytest
+from google.genai import errors
+
+from core.fake_gemini import FakeGeminiClient, FakeGeminiServer
+from core.gemini_client import GeminiClient
+from core.mock_backend import MockScript
+
+SYSTEM_TEXT = "You are a coding agent.\n" + "def handler():\n    return 42\n" * 400
+HISTORY = [
+    {'role': 'system', 'content': SYSTEM_TEXT},
+    {'role': 'user', 'content': "Explain the handler"},
+]
+
+
+def fail_first_request(fake: FakeGeminiClient, status: int) -> list:
+    """Make the fake's first generate_content call fail with ``status``; returns the cached content of each call."""
+    models = fake.aio.models
+    generate_content = models.generate_content
+    calls = []
+
+    async def failing(model, contents, config=None):
+        calls.append(config.cached_content if config else None)
+        if len(calls) == 1:
+            raise errors.APIError(status, {'error': {'code': status, 'message': "Fake error", 'status': 'ERROR'}})
+        return await generate_content(model, contents, config)
+
+    models.generate_content = failing
+    return calls
+
+
+@pytest.mark.parametrize("status", [400, 403, 404])
+def test_prefix_invalidated_when_the_cache_is_gone(make_config, status):
+    async def run():
+        fake = FakeGeminiClient()
+        client = GeminiClient(make_config(GEMINI_MAX_ATTEMPTS=1), client=fake)
+        calls = fail_first_request(fake, status)
+
+        response = await client.generate_response(HISTORY)
+        assert response is not None
+        registered = calls[0]
+        assert registered is not None and calls[1:] == [None]  # Retried with the prefix inline
+        assert client.prompt_cache.name is None
+
+        await client.generate_response(HISTORY)
+        assert client.cache_stats.caches_created == 2
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_prefix_kept_on_transient_errors(make_config, status):
+    async def run():
+        fake = FakeGeminiClient()
+        client = GeminiClient(make_config(GEMINI_MAX_ATTEMPTS=2, GEMINI_RETRY_BASE_DELAY=0.01), client=fake)
+        calls = fail_first_request(fake, status)
+
+        response = await client.generate_response(HISTORY)
+        assert response is not None
+        assert calls[0] is not None and calls == [calls[0], calls[0]]
+        assert client.prompt_cache.name == calls[0]
+        assert client.cache_stats.caches_created == 1
+
+    asyncio.run(run())
+
+
+def server_client(make_config, server: FakeGeminiServer, **env) -> GeminiClient:
+    return GeminiClient(make_config(GEMINI_BASE_URL=server.url, GEMINI_PROMPT_CACHE="false", **env))
+
+
+def test_server_errors_are_retried(make_config):
+    async def run():
+        with FakeGeminiServer(MockScript(["<o>Done.</o>"])) as server:
+            client = server_client(make_config, server, GEMINI_RETRY_BASE_DELAY=0.01)
+            await client.initialize()
+            server.fail_next(503, count=2)
+
+            response = await client.generate_response_stream(HISTORY)
+            assert response['final_text'] == "<o>Done.</o>"
+            assert server.status_counts == {503: 2, 200: 1}
+
+    asyncio.run(run())
+
+
+def test_rate_limit_hint_pauses_the_shared_limiter(make_config):
+    async def run():
+        with FakeGeminiServer(MockScript(["<o>Done.</o>"])) as server:
+            client = server_client(make_config, server, GEMINI_REQUESTS_PER_MINUTE=6000)
+            await client.initialize()
+            server.fail_next(429, retry_delay=0.3)
+
+            start = time.monotonic()
+            response = await client.generate_response(HISTORY)
+            assert response['final_text'] == "<o>Done.</o>"
+            assert time.monotonic() - start >= 0.3
+            assert client.rate_limiter.paused_until >= start + 0.3
+            assert server.status_counts == {429: 1, 200: 1}
+
+    asyncio.run(run())
+
+
+def test_client_errors_are_not_retried(make_config):
+    async def run():
+        with FakeGeminiServer(MockScript(["<o>Done.</o>"])) as server:
+            client = server_client(make_config, server, GEMINI_RETRY_BASE_DELAY=0.01)
+            await client.initialize()
+            server.fail_next(400)
+
+            assert await client.generate_response(HISTORY) is None
+            assert server.status_counts == {400: 1}
+
+    asyncio.run(run())
@@ -0,0 +1,113 @@
+"""Tests for hedged requests: the duplicate's result is kept and the slower call is released."""
+
+import asyncio
+
+from core.fake_gemini import FakeGeminiClient
+from core.gemini_client import GeminiClient
+from core.hedging import HEDGE_MIN_SAMPLES, Hedger, LatencyTracker
+
+HISTORY = [
+    {'role': 'system', 'content': "You are a coding agent."},
+    {'role': 'user', 'content': "Explain the handler"},
+]
+
+
+class TrackedStream:
+    """Wraps a response stream, delaying its first chunk and recording whether it was closed."""
+
+    def __init__(self, stream, delay: float):
+        self.stream = stream
+        self.delay = delay
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+            self.delay = 0
+        return await self.stream.__anext__()
+
+    async def aclose(self):
+        self.closed = True
+        await self.stream.aclose()
+
+
+def prime(hedger: Hedger, kind: str, seconds: float = 0.01):
+    """Record enough fast calls of ``kind`` that the next slow one is hedged."""
+    tracker = hedger.trackers.setdefault(kind, LatencyTracker())
+    for _ in range(HEDGE_MIN_SAMPLES):
+        tracker.record(seconds)
+
+
+def test_slow_stream_is_closed_when_the_duplicate_wins(make_config):
+    async def run():
+        fake = FakeGeminiClient(lambda contents: "Handled.")
+        client = GeminiClient(make_config(GEMINI_HEDGING="true", GEMINI_HEDGE_MAX_RATE=1,
+                                          GEMINI_PROMPT_CACHE="false"), client=fake)
+        generate_content_stream = fake.aio.models.generate_content_stream
+        streams = []
+
+        async def tracked(model, contents, config=None):
+            stream = TrackedStream(await generate_content_stream(model, contents, config), 5.0 if not streams else 0)
+            streams.append(stream)
+            return stream
+
+        fake.aio.models.generate_content_stream = tracked
+        prime(client.hedger, "first chunk")
+
+        response = await asyncio.wait_for(client.generate_response_stream(HISTORY), timeout=2)
+        assert response['final_text'] == "Handled."
+        assert len(streams) == 2
+        assert streams[0].closed
+        assert client.hedger.stats.hedged == 1 and client.hedger.stats.won == 1
+
+    asyncio.run(run())
+
+
+def test_finished_loser_is_discarded():
+    async def run():
+        hedger = Hedger(max_rate=1.0)
+        prime(hedger, "response")
+        release = asyncio.Event()
+        started = 0
+        discarded = []
+
+        async def call():
+            nonlocal started
+            index = started
+            started += 1
+            await release.wait()  # Both calls finish on the same wake-up
+            return index
+
+        async def discard(result):
+            discarded.append(result)
+
+        task = asyncio.ensure_future(hedger.run("response", call, discard=discard))
+        await asyncio.sleep(0.1)
+        release.set()
+
+        assert await task == 0  # The original is kept when both are done
+        assert discarded == [1]
+        assert hedger.stats.hedged == 1 and hedger.stats.won == 0
+
+    asyncio.run(run())
+
+
+def test_no_duplicate_without_samples_or_admission():
+    async def run():
+        hedger = Hedger(max_rate=1.0)
+
+        async def call():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        assert await hedger.run("response", call) == "done"
+        assert hedger.stats.hedged == 0
+
+        prime(hedger, "response")
+        assert await hedger.run("response", call, admit=lambda: False) == "done"
+        assert hedger.stats.hedged == 0
+
+    asyncio.run(run())
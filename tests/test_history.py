@@ -0,0 +1,49 @@
+"""Regression tests for conversation history pruning."""
+
+from core.history import ConversationHistory
+
+CONTEXT = "def handler():\n    return 42\n" * 8000  # ~235k chars of project context
+
+
+def make_history(**limits) -> ConversationHistory:
+    history = ConversationHistory(**limits)
+    history.add_system_message("System initialized", CONTEXT)
+    return history
+
+
+def test_large_system_context_keeps_conversation():
+    history = make_history()
+    history.add_user_message("Explain the handler")
+    history.add_observation("[Command 1 - READ_FILE]: ok")
+
+    assert [msg['type'] for msg in history.messages] == ['system', 'user_input', 'system_observation']
+
+
+def test_char_pruning_keeps_system_and_latest():
+    history = make_history(max_total_chars=1000)
+    history.add_user_message("first request")
+    history.add_observation("x" * 5000)
+
+    assert history.messages[0]['content'] == CONTEXT
+    assert history.messages[-1]['type'] == 'system_observation'
+    assert len(history.messages) == 2
+
+
+def test_token_trim_agrees_with_char_pruning():
+    history = make_history()
+    for turn in range(10):
+        history.add_user_message(f"request {turn} " + "word " * 2000)
+
+    before = len(history.messages)
+    dropped = history.trim_to_tokens(1)
+
+    assert dropped == before - 2
+    assert [msg['type'] for msg in history.messages] == ['system', 'user_input']
+    assert history.messages[-1]['content'].startswith("request 9 ")
+
+
+def test_message_count_pruning_keeps_latest():
+    history = make_history(max_messages=1)
+    history.add_user_message("only request")
+
+    assert [msg['type'] for msg in history.messages] == ['system', 'user_input']
@@ -0,0 +1,79 @@
+"""Tests for retry backoff, server retry hints and the shared rate limiter."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from google.genai import errors
+
+from core.retry_policy import RetryPolicy, TokenBucket, retry_hint
+
+
+def api_error(code: int, message: str = "error", details=None, headers=None) -> errors.APIError:
+    response_json = {'error': {'code': code, 'message': message, 'status': 'ERROR', 'details': details or []}}
+    response = httpx.Response(code, headers=headers or {}) if headers else None
+    return errors.APIError(code, response_json, response)
+
+
+def test_retryable_errors():
+    policy = RetryPolicy()
+
+    assert policy.is_retryable(api_error(429))
+    assert policy.is_retryable(api_error(503))
+    assert policy.is_retryable(httpx.ConnectError("refused"))
+    assert not policy.is_retryable(api_error(400))
+    assert not policy.is_retryable(ValueError("bad request"))
+
+
+def test_backoff_doubles_with_equal_jitter_up_to_the_cap():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+    error = api_error(503)
+
+    for attempt, backoff in [(1, 1.0), (2, 2.0), (3, 4.0), (4, 5.0), (10, 5.0)]:
+        delays = [policy.delay(attempt, error) for _ in range(200)]
+        assert all(backoff / 2 <= delay <= backoff for delay in delays)
+
+
+@pytest.mark.parametrize("error, expected", [
+    (api_error(429, details=[{'@type': 'type.googleapis.com/google.rpc.RetryInfo', 'retryDelay': '23s'}]), 23.0),
+    (api_error(429, details=[{'metadata': {'nested': [{'retryDelay': '1.5s'}]}}]), 1.5),
+    (api_error(503, headers={'retry-after': '7'}), 7.0),
+    (api_error(429, message="Quota exceeded. Please retry in 12.5s."), 12.5),
+    (api_error(503), None),
+])
+def test_retry_hints(error, expected):
+    assert retry_hint(error) == expected
+
+
+def test_server_hint_overrides_backoff():
+    error = api_error(429, details=[{'retryDelay': '10s'}])
+
+    assert all(10.0 <= RetryPolicy().delay(1, error) <= 11.0 for _ in range(50))
+
+
+def test_pause_holds_every_caller():
+    async def run():
+        bucket = TokenBucket()
+        bucket.pause(0.2)
+        assert not bucket.try_acquire()
+
+        start = time.monotonic()
+        waits = await asyncio.gather(bucket.acquire(), bucket.acquire())
+        assert time.monotonic() - start >= 0.19
+        assert min(waits) >= 0.19
+        assert bucket.try_acquire()
+
+    asyncio.run(run())
+
+
+def test_requests_are_queued_at_the_sustained_rate():
+    async def run():
+        bucket = TokenBucket(requests_per_minute=600)  # One request per 0.1s once the burst is spent
+        bucket.requests = 0
+        start = time.monotonic()
+        await bucket.acquire()
+        await bucket.acquire()
+        assert 0.18 <= time.monotonic() - start < 0.5
+
+    asyncio.run(run())
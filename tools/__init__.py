@@ -6,6 +6,8 @@ from .file_writer import FileWriter
 from .terminal_executor import TerminalExecutor
 from .task_finisher import TaskFinisher
 from .path_resolver import PathResolver
+from .workspace_walker import WorkspaceWalker
+from .code_search import CodeSearcher
 
 __all__ = [
     'FileLister',
@@ -13,5 +15,7 @@ __all__ = [
     'FileWriter',
     'TerminalExecutor',
     'TaskFinisher',
-    'PathResolver'
+    'PathResolver',
+    'WorkspaceWalker',
+    'CodeSearcher'
 ]
@@ -0,0 +1,282 @@
+"""Trigram-indexed text search over the workspace for the SEARCH command."""
+
+import asyncio
+import re
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set
+
+from ui.display import display_info, display_success, display_error
+from .content_sniffer import sniff_bytes, decode_text
+from .workspace_walker import WalkEntry, WorkspaceWalker
+
+
+MAX_INDEXED_FILE_SIZE = 1024 * 1024
+MAX_RESULTS = 50
+MAX_SNIPPET_CHARS = 200
+
+_REGEX_METACHARS = set('.^$*+?{}[]()|\\')
+_REGEX_ESCAPE_CLASSES = set('dDwWsSbBAZ0123456789')
+# (?x), (?i), (?s:...) and the like change how the rest of the pattern reads
+_INLINE_FLAGS = re.compile(r'\(\?[aiLmsux-]+[:)]')
+
+
+def trigrams(text: str) -> Set[str]:
+    """Get the distinct lowercased trigrams of a string."""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def required_literals(pattern: str) -> List[str]:
+    """Extract literal runs that every match of a regex must contain.
+
+    The analysis is deliberately conservative: patterns with alternation
+    or inline flags yield nothing (every file is a candidate), groups and
+    character classes are skipped, and a character followed by an optional
+    quantifier is dropped from its run.
+    """
+    if '|' in pattern or _INLINE_FLAGS.search(pattern):
+        return []
+
+    runs: List[str] = []
+    current: List[str] = []
+
+    def end_run():
+        if current:
+            runs.append(''.join(current))
+            current.clear()
+
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\' and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            i += 2
+            if escaped in _REGEX_ESCAPE_CLASSES or escaped.isalpha():
+                end_run()
+            else:
+                current.append(escaped)
+            continue
+        if char in '?*':
+            if current:
+                current.pop()
+            end_run()
+        elif char == '{':
+            # {0,n} and {,n} make the previous character optional; {n} and {n,m} with n >= 1 keep it
+            close = pattern.find('}', i)
+            minimum = pattern[i + 1:close].split(',')[0].strip() if close != -1 else ''
+            if current and not (minimum.isdigit() and int(minimum) > 0):
+                current.pop()
+            end_run()
+            if close != -1:
+                i = close
+        elif char == '(':
+            end_run()
+            depth = 0
+            while i < len(pattern):
+                if pattern[i] == '\\':
+                    i += 1
+                elif pattern[i] == '(':
+                    depth += 1
+                elif pattern[i] == ')':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                i += 1
+        elif char == '[':
+            end_run()
+            close = pattern.find(']', i + 2)
+            i = close if close != -1 else len(pattern)
+        elif char in _REGEX_METACHARS:
+            end_run()
+        else:
+            current.append(char)
+        i += 1
+    end_run()
+
+    return [run for run in runs if len(run) >= 3]
+
+
+class TrigramIndex:
+    """Inverted index from lowercased trigrams to the files containing them.
+
+    Files are keyed by workspace-relative path and remembered with the size
+    and mtime they had when indexed, so ``update`` only re-reads files whose
+    stat data changed and drops files that disappeared.
+    """
+
+    def __init__(self, root_directory: Path, max_file_size: int = MAX_INDEXED_FILE_SIZE):
+        """Initialize an empty index for a workspace root."""
+        self.root_directory = Path(root_directory).resolve()
+        self.max_file_size = max_file_size
+        self.postings: Dict[str, Set[str]] = {}
+        self.files: Dict[str, tuple] = {}  # path -> (size, mtime_ns, trigrams)
+
+    def update(self, entries: List[WalkEntry]) -> int:
+        """Bring the index in line with a walk's file list. Returns the number of files (re)indexed."""
+        current = {}
+        for entry in entries:
+            if not entry.binary and entry.size <= self.max_file_size:
+                current[entry.path] = entry
+
+        for path in [path for path in self.files if path not in current]:
+            self._remove(path)
+
+        indexed = 0
+        for path, entry in current.items():
+            known = self.files.get(path)
+            if known and known[0] == entry.size and known[1] == entry.mtime_ns:
+                continue
+            if known:
+                self._remove(path)
+            text = self.read_text(path)
+            if text is None:
+                continue
+            grams = trigrams(text)
+            self.files[path] = (entry.size, entry.mtime_ns, grams)
+            for gram in grams:
+                self.postings.setdefault(gram, set()).add(path)
+            indexed += 1
+        return indexed
+
+    def candidates(self, literals: List[str]) -> List[str]:
+        """Get the files that contain every trigram of every literal, in path order."""
+        grams: Set[str] = set()
+        for literal in literals:
+            grams |= trigrams(literal)
+        if not grams:
+            return sorted(self.files)
+
+        # Intersect the rarest posting lists first
+        result: Optional[Set[str]] = None
+        for gram in sorted(grams, key=lambda g: len(self.postings.get(g, ()))):
+            paths = self.postings.get(gram)
+            if not paths:
+                return []
+            result = set(paths) if result is None else result & paths
+            if not result:
+                return []
+        return sorted(result)
+
+    def read_text(self, rel_path: str) -> Optional[str]:
+        """Read and decode an indexed file, or None if it is unreadable or binary."""
+        try:
+            with open(self.root_directory / rel_path, 'rb') as f:
+                data = f.read(self.max_file_size + 1)
+        except OSError:
+            return None
+        sniff = sniff_bytes(data[:8192])
+        if sniff.is_binary:
+            return None
+        return decode_text(data, sniff.encoding)
+
+    def _remove(self, path: str):
+        _, _, grams = self.files.pop(path)
+        for gram in grams:
+            paths = self.postings.get(gram)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self.postings[gram]
+
+
+class CodeSearcher:
+    """Tool for searching file contents in the workspace through a trigram index."""
+
+    def __init__(self, workspace_path: str, workspace_view=None, max_results: int = MAX_RESULTS):
+        """Initialize the searcher with workspace path and optional live workspace view."""
+        self.workspace_path = Path(workspace_path).resolve()
+        self.walker = WorkspaceWalker(self.workspace_path)
+        self.workspace_view = workspace_view
+        self.max_results = max_results
+        self.index = TrigramIndex(self.workspace_path)
+        self.lock = asyncio.Lock()
+
+    async def search(self, query: str, mode: str = "literal") -> Dict[str, Any]:
+        """Search the workspace for a literal string or regular expression."""
+        try:
+            if not query:
+                raise ValueError("Search query is empty")
+            mode = (mode or "literal").lower()
+            if mode == "regex":
+                try:
+                    pattern = re.compile(query)
+                except re.error as e:
+                    raise ValueError(f"Invalid regular expression: {e}")
+                literals = required_literals(query)
+            elif mode == "literal":
+                pattern = re.compile(re.escape(query))
+                literals = [query]
+            else:
+                raise ValueError(f"Unknown search mode '{mode}' (use 'literal' or 'regex')")
+
+            start = time.perf_counter()
+            async with self.lock:
+                if self.workspace_view is not None and self.workspace_view.live_view:
+                    await self.workspace_view.sync()
+                    walk = self.workspace_view.current_walk
+                else:
+                    walk = await asyncio.to_thread(self.walker.walk)
+
+                first_build = not self.index.files
+                indexed = await asyncio.to_thread(self.index.update, walk.files)
+                if first_build:
+                    display_info(f"Indexed {indexed} files for search")
+
+                matches, matched_files, scanned = await asyncio.to_thread(self._scan, pattern, literals)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            if not matches:
+                output = f"No matches for {mode} search '{query}'"
+            else:
+                header = f"{len(matches)} matches in {matched_files} files"
+                if len(matches) >= self.max_results:
+                    header = f"First {self.max_results} matches (results truncated; refine the query)"
+                output = header + ":\n" + "\n".join(matches)
+
+            display_success(
+                f"Searched {scanned} of {len(self.index.files)} files in {elapsed_ms:.0f} ms: {len(matches)} matches"
+            )
+
+            return {
+                "success": True,
+                "output": output,
+                "match_count": len(matches)
+            }
+
+        except Exception as e:
+            error_msg = f"Search failed: {e}"
+            display_error(error_msg)
+            return {
+                "success": False,
+                "error": error_msg,
+                "output": ""
+            }
+
+    def _scan(self, pattern: re.Pattern, literals: List[str]):
+        """Verify candidate files line by line, stopping at the result limit."""
+        matches: List[str] = []
+        matched_files = 0
+        candidates = self.index.candidates(literals)
+
+        for scanned, path in enumerate(candidates, 1):
+            text = self.index.read_text(path)
+            if text is None or not pattern.search(text):
+                continue
+            matched_files += 1
+            line_matched = False
+            for line_number, line in enumerate(text.splitlines(), 1):
+                if pattern.search(line):
+                    line_matched = True
+                    snippet = line.strip()
+                    if len(snippet) > MAX_SNIPPET_CHARS:
+                        snippet = snippet[:MAX_SNIPPET_CHARS] + "..."
+                    matches.append(f"{path}:{line_number}: {snippet}")
+                    if len(matches) >= self.max_results:
+                        return matches, matched_files, scanned
+            if not line_matched:
+                matches.append(f"{path}: (match spans multiple lines)")
+                if len(matches) >= self.max_results:
+                    return matches, matched_files, scanned
+
+        return matches, matched_files, len(candidates)
@@ -0,0 +1,110 @@
+"""Binary and text-encoding detection from a file's first block."""
+
+import codecs
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+
+SNIFF_BLOCK_SIZE = 8192
+
+# Extensions that are always treated as binary without opening the file
+BINARY_EXTENSIONS = {
+    '.pyc', '.pyo', '.pyd', '.so', '.dll', '.dylib', '.o', '.a', '.lib', '.exe', '.bin',
+    '.class', '.jar', '.war', '.whl', '.egg',
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.ico', '.webp', '.tif', '.tiff', '.psd',
+    '.mp3', '.mp4', '.avi', '.mov', '.wav', '.flac', '.ogg', '.mkv', '.webm', '.pdf',
+    '.zip', '.tar', '.gz', '.tgz', '.bz2', '.xz', '.zst', '.rar', '.7z', '.iso', '.dmg',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot',
+    '.sqlite', '.sqlite3', '.db', '.parquet', '.feather', '.arrow', '.avro', '.orc',
+    '.pkl', '.pickle', '.npy', '.npz', '.h5', '.hdf5', '.pt', '.pth', '.ckpt',
+    '.safetensors', '.onnx', '.tflite', '.pb'
+}
+
+# Extensions trusted to be text, so listing them never needs a sniff
+TEXT_EXTENSIONS = {
+    '.py', '.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs', '.html', '.htm', '.css', '.scss',
+    '.md', '.rst', '.txt', '.json', '.yaml', '.yml', '.toml', '.ini', '.cfg', '.xml',
+    '.csv', '.tsv', '.sh', '.go', '.rs', '.java', '.c', '.h', '.cpp', '.hpp', '.rb', '.php'
+}
+
+# Bytes that appear in text files besides printable ASCII
+_TEXT_CONTROL_BYTES = {0x07, 0x08, 0x09, 0x0A, 0x0C, 0x0D, 0x1B}
+_NON_TEXT_BYTES = bytes(b for b in range(0x20) if b not in _TEXT_CONTROL_BYTES) + b'\x7f'
+
+_BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+@dataclass
+class SniffResult:
+    """Outcome of sniffing a file's first block."""
+
+    is_binary: bool
+    encoding: Optional[str] = None
+
+
+def sniff_bytes(block: bytes) -> SniffResult:
+    """Classify a leading block of file data as binary or text with an encoding."""
+    if not block:
+        return SniffResult(is_binary=False, encoding='utf-8')
+
+    # A byte-order mark settles the encoding, even for NUL-heavy UTF-16/32
+    for bom, encoding in _BOMS:
+        if block.startswith(bom):
+            return SniffResult(is_binary=False, encoding=encoding)
+
+    if b'\x00' in block:
+        return SniffResult(is_binary=True)
+
+    # Count control bytes that never appear in text
+    non_text = len(block) - len(block.translate(None, _NON_TEXT_BYTES))
+    if non_text / len(block) > 0.1:
+        return SniffResult(is_binary=True)
+
+    # Incremental decode tolerates a multi-byte sequence cut off at the block end
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(block, final=False)
+        return SniffResult(is_binary=False, encoding='utf-8')
+    except UnicodeDecodeError:
+        pass
+
+    # Not UTF-8: mostly-ASCII data is a legacy single-byte text encoding
+    high = sum(1 for b in block if b >= 0x80)
+    if high / len(block) > 0.3:
+        return SniffResult(is_binary=True)
+    return SniffResult(is_binary=False, encoding='cp1252')
+
+
+def sniff_file(path: Path) -> SniffResult:
+    """Sniff a file by reading only its first block."""
+    with open(path, 'rb') as f:
+        return sniff_bytes(f.read(SNIFF_BLOCK_SIZE))
+
+
+def has_binary_extension(path) -> bool:
+    """Check whether a file's extension alone marks it as binary."""
+    return Path(path).suffix.lower() in BINARY_EXTENSIONS
+
+
+def is_binary_file(path: Path) -> bool:
+    """Check whether a file is binary, sniffing only when the extension is inconclusive."""
+    suffix = Path(path).suffix.lower()
+    if suffix in BINARY_EXTENSIONS:
+        return True
+    if suffix in TEXT_EXTENSIONS:
+        return False
+    try:
+        return sniff_file(path).is_binary
+    except OSError:
+        return False
+
+
+def decode_text(data: bytes, encoding: Optional[str]) -> str:
+    """Decode file data using a sniffed encoding."""
+    return data.decode(encoding or 'utf-8', errors='replace')
@@ -1,63 +1,48 @@
 """File listing tool for Agent Code."""
 
+import asyncio
 from pathlib import Path
 from typing import Dict, Any
 from ui.display import display_info, display_success, display_error
+from .workspace_walker import WorkspaceWalker
 
 
 class FileLister:
     """Tool for listing files and directories in the workspace."""
     
-    def __init__(self, workspace_path: str):
-        """Initialize the file lister with workspace path."""
+    def __init__(self, workspace_path: str, workspace_view=None):
+        """Initialize the file lister with workspace path.
+        
+        ``workspace_view`` is an optional live view (such as a watched
+        ProjectContextBuilder) whose current walk is used instead of
+        scanning the workspace again.
+        """
         self.workspace_path = Path(workspace_path).resolve()
+        self.walker = WorkspaceWalker(self.workspace_path)
+        self.workspace_view = workspace_view
         
     async def list_files(self) -> Dict[str, Any]:
         """List all files and directories in the workspace."""
         try:
-            file_tree = []
-            
-            def build_tree(path: Path, prefix: str = "", is_last: bool = True):
-                """Recursively build file tree representation."""
-                if not path.exists():
-                    return
-                
-                # Skip hidden files and common ignore patterns
-                if self._should_skip(path):
-                    return
-                
-                connector = "└── " if is_last else "├── "
-                
-                if path.is_file():
-                    file_tree.append(f"{prefix}{connector}{path.name}")
-                elif path.is_dir():
-                    file_tree.append(f"{prefix}{connector}{path.name}/")
-                    
-                    # Get directory contents
-                    try:
-                        children = sorted([p for p in path.iterdir() if not self._should_skip(p)])
-                        for i, child in enumerate(children):
-                            is_last_child = i == len(children) - 1
-                            next_prefix = prefix + ("    " if is_last else "│   ")
-                            build_tree(child, next_prefix, is_last_child)
-                    except PermissionError:
-                        file_tree.append(f"{prefix}    [Permission Denied]")
-            
-            # Start building tree from workspace root
-            display_info(f"Scanning workspace: {self.workspace_path}")
-            build_tree(self.workspace_path)
+            if self.workspace_view is not None and self.workspace_view.live_view:
+                await self.workspace_view.sync()
+                walk = self.workspace_view.current_walk
+            else:
+                display_info(f"Scanning workspace: {self.workspace_path}")
+                walk = await asyncio.to_thread(self.walker.walk)
             
-            if not file_tree:
+            item_count = len(walk.table) + walk.dir_count
+            if item_count == 0:
                 output = f"Workspace is empty: {self.workspace_path}"
             else:
-                output = f"File structure of {self.workspace_path}:\n" + "\n".join(file_tree)
+                output = f"File structure of {self.workspace_path}:\n" + walk.tree
             
-            display_success(f"Listed {len(file_tree)} items")
+            display_success(f"Listed {item_count} items")
             
             return {
                 "success": True,
                 "output": output,
-                "file_count": len(file_tree)
+                "file_count": item_count
             }
             
         except Exception as e:
@@ -68,16 +53,3 @@ class FileLister:
                 "error": error_msg,
                 "output": ""
             }
-    
-    def _should_skip(self, path: Path) -> bool:
-        """Check if a path should be skipped during directory scanning."""
-        skip_patterns = {
-            '.git', '__pycache__', '.pytest_cache', 'node_modules', 
-            '.venv', 'venv', '.DS_Store', 'Thumbs.db'
-        }
-        
-        # Skip hidden files except common config files
-        if path.name.startswith('.') and path.name not in {'.env', '.gitignore', '.dockerignore', '.editorconfig'}:
-            return True
-            
-        return path.name in skip_patterns
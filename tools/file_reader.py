@@ -5,6 +5,7 @@ from typing import Dict, Any
 import aiofiles
 from ui.display import display_success, display_error
 from .path_resolver import PathResolver
+from .content_sniffer import SNIFF_BLOCK_SIZE, sniff_bytes, decode_text
 
 
 class FileReader:
@@ -46,8 +47,21 @@ class FileReader:
                     "output": ""
                 }
             
-            async with aiofiles.open(full_path, mode='r', encoding='utf-8') as f:
-                content = await f.read()
+            # Sniff the first block so binary files are refused before a full read
+            async with aiofiles.open(full_path, mode='rb') as f:
+                head = await f.read(SNIFF_BLOCK_SIZE)
+                sniff = sniff_bytes(head)
+                if sniff.is_binary:
+                    error_msg = f"File appears to be binary, not reading: {file_path} ({full_path.stat().st_size} bytes)"
+                    display_error(error_msg)
+                    return {
+                        "success": False,
+                        "error": error_msg,
+                        "output": ""
+                    }
+                data = head + await f.read()
+            
+            content = decode_text(data, sniff.encoding)
             
             display_success(f"Read file: {file_path} ({len(content)} characters)")
             
@@ -0,0 +1,307 @@
+"""Columnar table of walked files for very large workspaces."""
+
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class WalkEntry:
+    """A file found during a workspace walk, with its cached stat data."""
+
+    path: str  # Relative to the workspace root, using '/' separators
+    size: int
+    mtime_ns: int
+    binary: bool = False
+    git_oid: Optional[str] = None  # Blob id from the git index when its stat data is current
+
+
+# 64-bit FNV-1a, a stable hash that a whole table's keys can be computed with column by column
+FNV_OFFSET = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+_MASK64 = (1 << 64) - 1
+
+
+def _fnv1a(data: bytes, state: int = FNV_OFFSET) -> int:
+    for byte in data:
+        state = ((state ^ byte) * FNV_PRIME) & _MASK64
+    return state
+
+
+def path_key(path: str) -> int:
+    """Get the 64-bit key a path is matched by across tables, the same in every run."""
+    key = _fnv1a(path.encode('utf-8', 'surrogateescape'))
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+class FileTable:
+    """Per-file walk data kept in flat columns instead of one object per file.
+
+    Directory prefixes are interned (each row stores a directory id), base
+    names are packed into one UTF-8 buffer with offsets, and extensions are
+    interned to small ids, so a million-file walk costs tens of bytes per
+    file. Rows are appended while walking into ``array`` columns and frozen
+    into NumPy arrays on the first query. ``WalkEntry`` objects are only
+    built for the rows a caller asks for. Rows are matched by a hash of
+    their path; a table where two paths share a key falls back to
+    matching by path.
+    """
+
+    def __init__(self):
+        """Initialize an empty table."""
+        self.dirs: List[str] = []  # Interned directory prefixes, '' or ending in '/'
+        self._dir_ids: Dict[str, int] = {}
+        self.extensions: List[str] = []  # Interned lowercased extensions, '' for none
+        self._extension_ids: Dict[str, int] = {}
+        self._oids: Dict[int, str] = {}  # Row -> git blob id, for the rows that have one
+
+        self._names = bytearray()
+        self._columns = {
+            'dir_id': array('i'),
+            'name_end': array('q'),
+            'extension_id': array('i'),
+            'size': array('q'),
+            'mtime_ns': array('q'),
+            'binary': array('b')
+        }
+        # Bound appenders in column order, since append runs once per walked file
+        self._appenders = [column.append for column in self._columns.values()]
+        self._frozen: Optional[Dict[str, np.ndarray]] = None
+        self._sorted_keys: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._duplicate_keys: Optional[bool] = None
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[WalkEntry]) -> 'FileTable':
+        """Build a table from walk entries."""
+        table = cls()
+        for entry in entries:
+            directory, _, name = entry.path.rpartition('/')
+            table.append(f"{directory}/" if directory else "", name, entry.size, entry.mtime_ns,
+                         entry.binary, entry.git_oid)
+        return table
+
+    def append(self, rel_dir: str, name: str, size: int, mtime_ns: int, binary: bool = False,
+               git_oid: Optional[str] = None):
+        """Add a file in the directory ``rel_dir`` ('' for the root, otherwise ending in '/')."""
+        if self._frozen is not None:
+            raise RuntimeError("FileTable is frozen")
+
+        dir_id = self._dir_ids.get(rel_dir)
+        if dir_id is None:
+            dir_id = self._dir_ids[rel_dir] = len(self.dirs)
+            self.dirs.append(rel_dir)
+
+        dot = name.rfind('.')
+        extension = name[dot:].lower() if dot > 0 else ''
+        extension_id = self._extension_ids.get(extension)
+        if extension_id is None:
+            extension_id = self._extension_ids[extension] = len(self.extensions)
+            self.extensions.append(extension)
+
+        if git_oid:
+            self._oids[len(self._columns['size'])] = git_oid
+        self._names += name.encode('utf-8', 'surrogateescape')
+
+        append_dir, append_name_end, append_extension, append_size, append_mtime, append_binary = self._appenders
+        append_dir(dir_id)
+        append_name_end(len(self._names))
+        append_extension(extension_id)
+        append_size(size)
+        append_mtime(mtime_ns)
+        append_binary(1 if binary else 0)
+
+    def __len__(self) -> int:
+        if self._frozen is not None:
+            return len(self._frozen['size'])
+        return len(self._columns['size'])
+
+    @property
+    def size(self) -> np.ndarray:
+        return self._column('size')
+
+    @property
+    def mtime_ns(self) -> np.ndarray:
+        return self._column('mtime_ns')
+
+    @property
+    def binary(self) -> np.ndarray:
+        return self._column('binary').astype(bool)
+
+    @property
+    def extension_id(self) -> np.ndarray:
+        return self._column('extension_id')
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the table's columns and buffers."""
+        columns = self._arrays()
+        return (
+            sum(column.nbytes for column in columns.values()) + len(self._names)
+            + sum(len(prefix) + 50 for prefix in self.dirs) + len(self._oids) * 100
+        )
+
+    def path(self, row: int) -> str:
+        """Get the relative path of a row."""
+        columns = self._arrays()
+        end = int(columns['name_end'][row])
+        start = int(columns['name_end'][row - 1]) if row > 0 else 0
+        name = self._names[start:end].decode('utf-8', 'surrogateescape')
+        return self.dirs[columns['dir_id'][row]] + name
+
+    def paths(self, rows: Optional[Iterable[int]] = None) -> Iterator[str]:
+        """Iterate over the paths of the given rows, or of every row."""
+        for row in range(len(self)) if rows is None else rows:
+            yield self.path(int(row))
+
+    def entry(self, row: int) -> WalkEntry:
+        """Build the walk entry for a row."""
+        columns = self._arrays()
+        row = int(row)
+        return WalkEntry(
+            path=self.path(row),
+            size=int(columns['size'][row]),
+            mtime_ns=int(columns['mtime_ns'][row]),
+            binary=bool(columns['binary'][row]),
+            git_oid=self._oids.get(row)
+        )
+
+    def entries(self, rows: Optional[Iterable[int]] = None) -> List[WalkEntry]:
+        """Build walk entries for the given rows (in order), or for every row."""
+        return [self.entry(row) for row in (range(len(self)) if rows is None else rows)]
+
+    def select(
+        self,
+        binary: Optional[bool] = None,
+        max_size: Optional[int] = None,
+        extensions: Optional[Iterable[str]] = None,
+        under: Optional[str] = None
+    ) -> np.ndarray:
+        """Get the rows, in table order, matching every given condition."""
+        columns = self._arrays()
+        mask = np.ones(len(self), dtype=bool)
+        if binary is not None:
+            mask &= columns['binary'] == (1 if binary else 0)
+        if max_size is not None:
+            mask &= columns['size'] <= max_size
+        if extensions is not None:
+            wanted = [self._extension_ids[ext.lower()] for ext in extensions if ext.lower() in self._extension_ids]
+            mask &= np.isin(columns['extension_id'], wanted)
+        if under:
+            prefix = under.rstrip('/') + '/'
+            dir_ids = [i for i, directory in enumerate(self.dirs) if directory.startswith(prefix)]
+            mask &= np.isin(columns['dir_id'], dir_ids)
+        return np.flatnonzero(mask)
+
+    def find(self, paths: List[str]) -> np.ndarray:
+        """Get the row of each path, or -1 for paths not in the table."""
+        sorted_keys, order = self._key_index()
+        if not len(sorted_keys):
+            return np.full(len(paths), -1, dtype=np.int64)
+        if self._has_duplicate_keys():
+            rows_by_path = {path: row for row, path in enumerate(self.paths())}
+            return np.fromiter((rows_by_path.get(path, -1) for path in paths), dtype=np.int64, count=len(paths))
+        keys = np.fromiter((path_key(path) for path in paths), dtype=np.int64, count=len(paths))
+        positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+        rows = np.where(sorted_keys[positions] == keys, order[positions], -1)
+        # A key match is only a hash match; a different path there means the path is absent
+        for i in np.flatnonzero(rows >= 0):
+            if self.path(int(rows[i])) != paths[i]:
+                rows[i] = -1
+        return rows
+
+    def diff(self, newer: 'FileTable') -> Tuple[List[str], List[str], List[str]]:
+        """Compare with a later table: paths created, modified (size or mtime) and deleted."""
+        old_columns, new_columns = self._arrays(), newer._arrays()
+        if np.array_equal(old_columns['key'], new_columns['key']):
+            # Same files in the same walk order: compare row by row without sorting
+            old_rows = new_rows = np.arange(len(self))
+            created = deleted = np.empty(0, dtype=np.int64)
+        elif self._has_duplicate_keys() or newer._has_duplicate_keys():
+            return self._diff_by_path(newer)
+        else:
+            _, old_rows, new_rows = np.intersect1d(
+                old_columns['key'], new_columns['key'], assume_unique=True, return_indices=True
+            )
+            created = np.setdiff1d(np.arange(len(newer)), new_rows, assume_unique=True)
+            deleted = np.setdiff1d(np.arange(len(self)), old_rows, assume_unique=True)
+        changed = (
+            (old_columns['size'][old_rows] != new_columns['size'][new_rows])
+            | (old_columns['mtime_ns'][old_rows] != new_columns['mtime_ns'][new_rows])
+        )
+        return (
+            sorted(newer.paths(created)),
+            sorted(newer.paths(new_rows[changed])),
+            sorted(self.paths(deleted))
+        )
+
+    def _diff_by_path(self, newer: 'FileTable') -> Tuple[List[str], List[str], List[str]]:
+        """Compare with a later table by path, for tables whose keys are not unique."""
+        old_rows = {path: row for row, path in enumerate(self.paths())}
+        new_rows = {path: row for row, path in enumerate(newer.paths())}
+        old_columns, new_columns = self._arrays(), newer._arrays()
+        modified = [
+            path for path, row in new_rows.items() if path in old_rows and (
+                old_columns['size'][old_rows[path]] != new_columns['size'][row]
+                or old_columns['mtime_ns'][old_rows[path]] != new_columns['mtime_ns'][row]
+            )
+        ]
+        return (
+            sorted(path for path in new_rows if path not in old_rows),
+            sorted(modified),
+            sorted(path for path in old_rows if path not in new_rows)
+        )
+
+    def _column(self, name: str) -> np.ndarray:
+        return self._arrays()[name]
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        """Freeze the append buffers into NumPy columns."""
+        if self._frozen is None:
+            self._frozen = {
+                name: np.frombuffer(column, dtype=column.typecode).copy() for name, column in self._columns.items()
+            }
+            self._frozen['key'] = self._path_keys(self._frozen)
+            self._columns = None
+            self._appenders = None
+            self._dir_ids = None
+        return self._frozen
+
+    def _path_keys(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """Compute ``path_key`` for every row, one name byte position at a time."""
+        ends = columns['name_end']
+        starts = np.concatenate(([0], ends[:-1])) if len(ends) else ends
+        lengths = ends - starts
+        names = np.frombuffer(bytes(self._names), dtype=np.uint8)
+        dir_states = np.array(
+            [_fnv1a(prefix.encode('utf-8', 'surrogateescape')) for prefix in self.dirs], dtype=np.uint64
+        )
+        # Rows sorted longest name first, so the rows still hashing at each position are a prefix
+        order = np.argsort(-lengths, kind='stable')
+        remaining = np.searchsorted(-lengths[order], -np.arange(int(lengths.max()) if len(lengths) else 0))
+        keys = dir_states[columns['dir_id'][order]] if len(ends) else np.empty(0, dtype=np.uint64)
+        positions = starts[order]
+        prime = np.uint64(FNV_PRIME)
+        for count in remaining:
+            hashing = keys[:count]
+            np.bitwise_xor(hashing, names[positions[:count]], out=hashing, casting='unsafe')
+            np.multiply(hashing, prime, out=hashing)
+            positions[:count] += 1
+        result = np.empty_like(keys)
+        result[order] = keys
+        return result.view(np.int64)
+
+    def _key_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._sorted_keys is None:
+            keys = self._arrays()['key']
+            order = np.argsort(keys, kind='stable')
+            self._sorted_keys = (keys[order], order)
+        return self._sorted_keys
+
+    def _has_duplicate_keys(self) -> bool:
+        """Check whether two rows share a key, which makes key matching ambiguous."""
+        if self._duplicate_keys is None:
+            sorted_keys, _ = self._key_index()
+            self._duplicate_keys = bool(np.any(sorted_keys[1:] == sorted_keys[:-1]))
+        return self._duplicate_keys
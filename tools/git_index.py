@@ -0,0 +1,121 @@
+"""Read-only access to a git repository's index for workspace scanning."""
+
+import hashlib
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+@dataclass
+class GitIndexEntry:
+    """Stat data and blob id recorded for a tracked file in the git index."""
+
+    size: int
+    mtime_ns: int
+    oid: str
+    trusted: bool = True  # False when the blob id may not match the file on disk
+
+
+def git_blob_id(data: bytes) -> str:
+    """Compute the git blob id (SHA-1 of the object header and content) of file data."""
+    header = f"blob {len(data)}\0".encode('ascii')
+    return hashlib.sha1(header + data).hexdigest()
+
+
+def find_git_root(directory: Path) -> Optional[Tuple[Path, Path]]:
+    """Find the enclosing repository, returning ``(work_tree_root, git_dir)``."""
+    current = Path(directory).resolve()
+    for candidate in [current, *current.parents]:
+        dot_git = candidate / '.git'
+        if dot_git.is_dir():
+            return candidate, dot_git
+        if dot_git.is_file():
+            # Worktrees and submodules point at their git dir from a .git file
+            try:
+                content = dot_git.read_text(encoding='utf-8').strip()
+            except OSError:
+                return None
+            if content.startswith('gitdir:'):
+                git_dir = Path(content[len('gitdir:'):].strip())
+                if not git_dir.is_absolute():
+                    git_dir = (candidate / git_dir).resolve()
+                return candidate, git_dir
+    return None
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    """Decode git's offset varint used for index v4 path compression."""
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7f
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7f)
+    return value, offset
+
+
+def read_git_index(git_dir: Path) -> Dict[str, GitIndexEntry]:
+    """Parse ``<git_dir>/index`` (versions 2-4) into stage-0 entries keyed by path.
+
+    Entries whose mtime is not older than the index file itself are
+    "racily clean" in git's terms, and symlink blobs hold the link target
+    rather than file content; both are marked untrusted so their blob id
+    is never used in place of hashing. Returns an empty mapping if the
+    index is missing or unreadable.
+    """
+    index_path = Path(git_dir) / 'index'
+    try:
+        data = index_path.read_bytes()
+        index_mtime_ns = index_path.stat().st_mtime_ns
+    except OSError:
+        return {}
+
+    if len(data) < 12 or data[:4] != b'DIRC':
+        return {}
+    version, count = struct.unpack('>II', data[4:12])
+    if version not in (2, 3, 4):
+        return {}
+
+    entries: Dict[str, GitIndexEntry] = {}
+    offset = 12
+    previous_path = b''
+    try:
+        for _ in range(count):
+            start = offset
+            (_, _, mtime_s, mtime_ns, _, _, mode, _, _, size) = struct.unpack('>10I', data[offset:offset + 40])
+            oid = data[offset + 40:offset + 60].hex()
+            flags = struct.unpack('>H', data[offset + 60:offset + 62])[0]
+            offset += 62
+            if version >= 3 and flags & 0x4000:
+                offset += 2  # Extended flags
+
+            if version == 4:
+                strip, offset = _read_varint(data, offset)
+                end = data.index(b'\0', offset)
+                path = previous_path[:len(previous_path) - strip] + data[offset:end]
+                offset = end + 1
+            else:
+                end = data.index(b'\0', offset)
+                path = data[offset:end]
+                # Entries are NUL-padded to a multiple of 8 bytes
+                offset = start + ((end - start) // 8 + 1) * 8
+            previous_path = path
+
+            stage = (flags >> 12) & 0x3
+            object_type = mode >> 12
+            if stage != 0 or object_type not in (0o10, 0o12):
+                continue  # Conflicted, gitlink or sparse-directory entries
+
+            entry_mtime_ns = mtime_s * 1_000_000_000 + mtime_ns
+            entries[path.decode('utf-8', errors='surrogateescape')] = GitIndexEntry(
+                size=size,
+                mtime_ns=entry_mtime_ns,
+                oid=oid,
+                trusted=object_type == 0o10 and entry_mtime_ns < index_mtime_ns
+            )
+    except (struct.error, ValueError, IndexError):
+        return {}
+
+    return entries
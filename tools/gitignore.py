@@ -0,0 +1,137 @@
+"""Compiled .gitignore rules for workspace scanning."""
+
+import re
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+class GitIgnoreRule:
+    """A single compiled .gitignore pattern."""
+
+    def __init__(self, pattern: str, base: str = ""):
+        """Compile a pattern found in the .gitignore of directory ``base`` (relative, '' for root)."""
+        self.negated = pattern.startswith('!')
+        if self.negated:
+            pattern = pattern[1:]
+        elif pattern.startswith('\\!') or pattern.startswith('\\#'):
+            pattern = pattern[1:]
+
+        self.dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+
+        # A slash anywhere but the end anchors the pattern to its .gitignore directory
+        anchored = '/' in pattern
+        pattern = pattern.lstrip('/')
+
+        body = self._translate(pattern)
+        prefix = re.escape(base + '/') if base else ''
+        if anchored:
+            regex = f"^{prefix}{body}$"
+        else:
+            regex = f"^{prefix}(?:.*/)?{body}$"
+        self.regex = re.compile(regex, re.DOTALL)
+
+    def matches(self, rel_path: str, is_dir: bool) -> bool:
+        """Check whether a path relative to the repository root matches this rule."""
+        if self.dir_only and not is_dir:
+            return False
+        return self.regex.match(rel_path) is not None
+
+    @staticmethod
+    def _translate(pattern: str) -> str:
+        """Translate gitignore glob syntax into a regular expression body."""
+        parts = []
+        i = 0
+        n = len(pattern)
+        while i < n:
+            c = pattern[i]
+            if pattern.startswith('**/', i):
+                parts.append('(?:.*/)?')
+                i += 3
+            elif pattern.startswith('/**', i) and i + 3 == n:
+                parts.append('/.*')
+                i += 3
+            elif pattern.startswith('**', i):
+                parts.append('.*')
+                i += 2
+            elif c == '*':
+                parts.append('[^/]*')
+                i += 1
+            elif c == '?':
+                parts.append('[^/]')
+                i += 1
+            elif c == '[':
+                end = pattern.find(']', i + 2 if pattern.startswith('[!', i) or pattern.startswith('[^', i) else i + 1)
+                if end == -1:
+                    parts.append(re.escape(c))
+                    i += 1
+                    continue
+                chars = pattern[i + 1:end]
+                if chars[:1] in ('!', '^'):
+                    chars = '^' + chars[1:]
+                parts.append(f"[{chars.replace(chr(92), chr(92) * 2)}]")
+                i = end + 1
+            elif c == '\\' and i + 1 < n:
+                parts.append(re.escape(pattern[i + 1]))
+                i += 2
+            else:
+                parts.append(re.escape(c))
+                i += 1
+        return ''.join(parts)
+
+
+def parse_gitignore(text: str, base: str = "") -> List[GitIgnoreRule]:
+    """Parse the contents of a .gitignore (or info/exclude) file into rules."""
+    rules = []
+    for line in text.splitlines():
+        # Trailing spaces are ignored unless escaped
+        stripped = line.rstrip()
+        if line.endswith('\\ ') and stripped.endswith('\\'):
+            stripped += ' '
+        if not stripped or stripped.startswith('#'):
+            continue
+        try:
+            rules.append(GitIgnoreRule(stripped, base))
+        except re.error:
+            continue
+    return rules
+
+
+def load_gitignore(path: Path, base: str = "") -> List[GitIgnoreRule]:
+    """Load rules from an ignore file, returning no rules if it cannot be read."""
+    try:
+        return parse_gitignore(Path(path).read_text(encoding='utf-8', errors='replace'), base)
+    except OSError:
+        return []
+
+
+class GitIgnoreMatcher:
+    """Evaluates stacked ignore rules; the last matching rule wins, as in git."""
+
+    def __init__(self, rules: Optional[List[GitIgnoreRule]] = None):
+        """Initialize with the rules that apply to the whole repository."""
+        self.rules: List[GitIgnoreRule] = list(rules or [])
+
+    def extended(self, rules: List[GitIgnoreRule]) -> 'GitIgnoreMatcher':
+        """Get a matcher for a subdirectory that has its own .gitignore."""
+        if not rules:
+            return self
+        return GitIgnoreMatcher(self.rules + rules)
+
+    def is_ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """Check whether a repository-relative path is ignored."""
+        ignored = False
+        for rule in self.rules:
+            if rule.negated == ignored and rule.matches(rel_path, is_dir):
+                ignored = not rule.negated
+        return ignored
+
+
+def split_repo_path(root: Path, git_root: Path) -> Tuple[str, List[str]]:
+    """Get the workspace's prefix inside the repository and its ancestor directories."""
+    rel = Path(root).resolve().relative_to(git_root).as_posix()
+    if rel == '.':
+        return '', ['']
+    parts = rel.split('/')
+    ancestors = [''] + ['/'.join(parts[:i]) for i in range(1, len(parts))]
+    return rel + '/', ancestors
@@ -0,0 +1,385 @@
+"""Single-pass workspace walker shared by context building and LIST_FILES."""
+
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from .content_sniffer import has_binary_extension
+from .file_table import FileTable, WalkEntry
+from .git_index import GitIndexEntry, find_git_root, read_git_index
+from .gitignore import GitIgnoreMatcher, load_gitignore, split_repo_path
+
+
+# Unified ignore policy for every workspace scan
+IGNORED_DIRS = {
+    '.git', '__pycache__', '.pytest_cache', 'node_modules',
+    '.venv', 'venv', '.env', 'dist', 'build', '.next',
+    '.docker', 'coverage', '.nyc_output', 'target'
+}
+ALLOWED_HIDDEN = {'.env.example', '.gitignore', '.dockerignore', '.editorconfig'}
+PERMISSION_DENIED = "[Permission Denied]"
+
+
+@dataclass
+class WalkResult:
+    """Tree rendering and file table produced by one walk.
+
+    ``dirs``, ``denied`` and ``other_paths`` record what the tree shows
+    besides files (directories, directories that could not be listed, and
+    entries that are neither), so it can be re-rendered after a patch.
+    """
+
+    tree_lines: List[str] = field(default_factory=list)
+    table: FileTable = field(default_factory=FileTable)
+    dir_count: int = 0
+    dirs: Set[str] = field(default_factory=set)
+    denied: Set[str] = field(default_factory=set)
+    other_paths: Set[str] = field(default_factory=set)
+    _files: Optional[List[WalkEntry]] = field(default=None, repr=False)
+
+    @property
+    def tree(self) -> str:
+        """Get the tree rendering as a single string."""
+        return "\n".join(self.tree_lines)
+
+    @property
+    def files(self) -> List[WalkEntry]:
+        """Get every file as a walk entry, built from the table on first use."""
+        if self._files is None:
+            self._files = self.table.entries()
+        return self._files
+
+
+@dataclass
+class _GitState:
+    """Repository data loaded once per walk."""
+
+    prefix: str  # Workspace root relative to the repository root, '' or ending in '/'
+    index: Dict[str, GitIndexEntry]
+    matcher: Optional[GitIgnoreMatcher]
+
+
+class WorkspaceWalker:
+    """Walks a workspace once with ``os.scandir``, building the tree and file list together.
+
+    Files are flagged as binary by extension only, so a walk needs nothing
+    but ``stat``; files are sniffed when their content is read. Inside a
+    git repository, .gitignore and .git/info/exclude rules are applied on
+    top of the built-in policy, and files whose stat data matches the git
+    index carry their blob id. ``walk_git_index`` builds the same result
+    from the index's list of tracked files without listing directories.
+    Files are recorded in a columnar ``FileTable`` rather than as one
+    object each.
+    """
+
+    def __init__(self, root_directory: Path, respect_gitignore: bool = True):
+        """Initialize the walker with the workspace root."""
+        self.root_directory = Path(root_directory).resolve()
+        self.respect_gitignore = respect_gitignore
+
+    def should_skip(self, name: str, is_dir: bool) -> bool:
+        """Check whether an entry is excluded by the built-in ignore policy."""
+        if is_dir and name in IGNORED_DIRS:
+            return True
+
+        # Skip hidden entries except common config files
+        return name.startswith('.') and name not in ALLOWED_HIDDEN
+
+    def walk(self, max_depth: Optional[int] = None) -> WalkResult:
+        """Walk the workspace and return the tree rendering and file list.
+
+        With ``max_depth``, only that many levels are listed (deeper
+        directories are shown but not entered) and the git index is not
+        read, for a quick first look at a large tree.
+        """
+        git = self._load_git_state(with_ignore_rules=self.respect_gitignore, with_index=max_depth is None)
+        result = WalkResult()
+        result.tree_lines.append(f"{self.root_directory.name}/")
+        self._walk_directory(
+            str(self.root_directory), "", "", result, git, git.matcher if git else None, max_depth
+        )
+        return result
+
+    def walk_git_index(self) -> Optional[WalkResult]:
+        """Build the walk result from the git index's tracked files.
+
+        Each tracked file is stat-ed once but no directory is listed, so
+        untracked files are not included. Returns None outside a git
+        repository.
+        """
+        git = self._load_git_state(with_ignore_rules=False)
+        if git is None or not git.index:
+            return None
+
+        files = []
+        for repo_path in sorted(git.index):
+            if not repo_path.startswith(git.prefix):
+                continue
+            rel_path = repo_path[len(git.prefix):]
+            parts = rel_path.split('/')
+            if any(self.should_skip(part, True) for part in parts[:-1]) or self.should_skip(parts[-1], False):
+                continue
+
+            full_path = self.root_directory / rel_path
+            try:
+                stat = os.stat(full_path)
+            except OSError:
+                continue  # Deleted in the working tree
+
+            files.append(self._make_entry(rel_path, full_path, stat, git.index.get(repo_path)))
+
+        return self.render_tree(files)
+
+    def scan_paths(self, rel_paths) -> WalkResult:
+        """Re-examine changed paths, returning what now exists at or below them (without a tree rendering).
+
+        A path that is now a directory is walked; a path that is ignored,
+        missing or inside an ignored directory yields nothing.
+        """
+        git = self._load_git_state(with_ignore_rules=self.respect_gitignore)
+        found = WalkResult()
+
+        for rel_path in sorted(set(rel_paths)):
+            parts = rel_path.split('/')
+            full_path = self.root_directory / rel_path
+            try:
+                stat = os.stat(full_path)
+            except OSError:
+                continue
+            is_dir = os.path.isdir(full_path)
+
+            matcher = self.matcher_for('/'.join(parts[:-1]), git)
+            if matcher is False:
+                continue  # An ancestor directory is ignored
+            if self.should_skip(parts[-1], is_dir):
+                continue
+            repo_path = f"{git.prefix}{rel_path}" if git else rel_path
+            if matcher is not None and matcher.is_ignored(repo_path, is_dir):
+                continue
+
+            if is_dir:
+                found.dirs.add(rel_path)
+                self._walk_directory(str(full_path), f"{rel_path}/", "", found, git, matcher)
+            elif os.path.isfile(full_path):
+                entry = self._make_entry(rel_path, full_path, stat, git.index.get(repo_path) if git else None)
+                prefix, _, name = rel_path.rpartition('/')
+                found.table.append(f"{prefix}/" if prefix else "", name, entry.size, entry.mtime_ns,
+                                   entry.binary, entry.git_oid)
+            else:
+                found.other_paths.add(rel_path)
+
+        found.tree_lines.clear()
+        return found
+
+    def render_tree(self, files: List[WalkEntry], dirs: Iterable[str] = (), denied: Iterable[str] = (),
+                    other_paths: Iterable[str] = ()) -> WalkResult:
+        """Build a walk result, including its tree rendering, from a flat file list.
+
+        ``dirs``, ``denied`` and ``other_paths`` are shown as a walk shows
+        them, so a patched view keeps empty and unreadable directories.
+        """
+        files = sorted(files, key=lambda entry: entry.path)
+        result = WalkResult(table=FileTable.from_entries(files), _files=files, dirs=set(dirs),
+                            denied=set(denied), other_paths=set(other_paths))
+        result.tree_lines.append(f"{self.root_directory.name}/")
+        result.dir_count = self._render_paths(result, result.tree_lines)
+        return result
+
+    def load_ignore_state(self) -> Optional[_GitState]:
+        """Load the repository-wide ignore rules for ``matcher_for``, without reading the index."""
+        return self._load_git_state(with_ignore_rules=self.respect_gitignore, with_index=False)
+
+    def matcher_for(self, rel_dir: str, git: Optional[_GitState]):
+        """Build the ignore matcher in effect inside a directory ('' for the root).
+
+        Returns False if the directory or one of its ancestors is skipped or
+        ignored, and None when no ignore rules apply.
+        """
+        matcher = git.matcher if git else None
+        if matcher is not None:
+            gitignore = self.root_directory / '.gitignore'
+            if gitignore.is_file():
+                matcher = matcher.extended(load_gitignore(gitignore, git.prefix.rstrip('/')))
+        path = ""
+        for name in rel_dir.split('/') if rel_dir else []:
+            path = f"{path}/{name}" if path else name
+            matcher = self.descend_matcher(path, matcher, git)
+            if matcher is False:
+                break
+        return matcher
+
+    def descend_matcher(self, rel_dir: str, parent_matcher, git: Optional[_GitState]):
+        """Get the ignore matcher inside ``rel_dir`` from the one in effect in its parent.
+
+        Returns False if the directory itself is skipped or ignored.
+        """
+        if self.should_skip(rel_dir.rpartition('/')[2], True):
+            return False
+        if parent_matcher is None:
+            return None
+        repo_dir = f"{git.prefix}{rel_dir}"
+        if parent_matcher.is_ignored(repo_dir, True):
+            return False
+        gitignore = self.root_directory / rel_dir / '.gitignore'
+        if gitignore.is_file():
+            return parent_matcher.extended(load_gitignore(gitignore, repo_dir))
+        return parent_matcher
+
+    def _load_git_state(self, with_ignore_rules: bool, with_index: bool = True) -> Optional[_GitState]:
+        """Load the index and repository-wide ignore rules for the enclosing repository."""
+        repo = find_git_root(self.root_directory)
+        if repo is None:
+            return None
+        git_root, git_dir = repo
+        prefix, ancestors = split_repo_path(self.root_directory, git_root)
+
+        matcher = None
+        if with_ignore_rules:
+            rules = load_gitignore(git_dir / 'info' / 'exclude')
+            # .gitignore files above the workspace root also apply to it
+            for ancestor in ancestors if prefix else []:
+                rules += load_gitignore(git_root / ancestor / '.gitignore', ancestor)
+            matcher = GitIgnoreMatcher(rules)
+
+        return _GitState(prefix=prefix, index=read_git_index(git_dir) if with_index else {}, matcher=matcher)
+
+    def _make_entry(self, rel_path: str, full_path, stat, index_entry: Optional[GitIndexEntry]) -> WalkEntry:
+        """Build a walk entry, attaching the index blob id when the file is unchanged."""
+        binary, git_oid = self._file_flags(full_path, stat, index_entry)
+        return WalkEntry(
+            path=rel_path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            binary=binary,
+            git_oid=git_oid
+        )
+
+    @staticmethod
+    def _file_flags(full_path, stat, index_entry: Optional[GitIndexEntry]):
+        """Get whether a file is binary by its extension and its index blob id if the file is unchanged."""
+        git_oid = None
+        if (
+            index_entry is not None and index_entry.trusted
+            and index_entry.size == stat.st_size & 0xFFFFFFFF
+            and index_entry.mtime_ns == stat.st_mtime_ns
+        ):
+            git_oid = index_entry.oid
+        return has_binary_extension(full_path), git_oid
+
+    def _walk_directory(
+        self,
+        directory: str,
+        rel_prefix: str,
+        tree_prefix: str,
+        result: WalkResult,
+        git: Optional[_GitState],
+        matcher: Optional[GitIgnoreMatcher],
+        depth_left: Optional[int] = None
+    ):
+        """Recursively scan one directory using cached DirEntry data."""
+        try:
+            with os.scandir(directory) as iterator:
+                scanned = []
+                for entry in iterator:
+                    try:
+                        scanned.append((entry, entry.is_dir(follow_symlinks=False)))
+                    except OSError:
+                        continue
+        except PermissionError:
+            result.tree_lines.append(f"{tree_prefix}└── {PERMISSION_DENIED}")
+            result.denied.add(rel_prefix.rstrip('/'))
+            return
+        except OSError:
+            return
+
+        repo_prefix = f"{git.prefix}{rel_prefix}" if git else rel_prefix
+        if matcher is not None and any(entry.name == '.gitignore' and not is_dir for entry, is_dir in scanned):
+            matcher = matcher.extended(load_gitignore(Path(directory) / '.gitignore', repo_prefix.rstrip('/')))
+
+        entries = [
+            (entry, is_dir) for entry, is_dir in scanned
+            if not self.should_skip(entry.name, is_dir)
+            and not (matcher is not None and matcher.is_ignored(f"{repo_prefix}{entry.name}", is_dir))
+        ]
+
+        # Directories first, then files, case-insensitive
+        entries.sort(key=lambda item: (not item[1], item[0].name.lower()))
+
+        for i, (entry, is_dir) in enumerate(entries):
+            is_last = i == len(entries) - 1
+            connector = "└── " if is_last else "├── "
+            rel_path = f"{rel_prefix}{entry.name}"
+
+            if is_dir:
+                result.dir_count += 1
+                result.dirs.add(rel_path)
+                if depth_left is not None and depth_left <= 1:
+                    result.tree_lines.append(f"{tree_prefix}{connector}{entry.name}/ [not expanded]")
+                    continue
+                result.tree_lines.append(f"{tree_prefix}{connector}{entry.name}/")
+                next_prefix = tree_prefix + ("    " if is_last else "│   ")
+                self._walk_directory(
+                    entry.path, f"{rel_path}/", next_prefix, result, git, matcher,
+                    None if depth_left is None else depth_left - 1
+                )
+                continue
+
+            try:
+                if not entry.is_file():
+                    result.tree_lines.append(f"{tree_prefix}{connector}{entry.name}")
+                    result.other_paths.add(rel_path)
+                    continue
+                stat = entry.stat()
+            except OSError:
+                result.tree_lines.append(f"{tree_prefix}{connector}{entry.name}")
+                result.other_paths.add(rel_path)
+                continue
+
+            binary, git_oid = self._file_flags(
+                entry.path, stat, git.index.get(f"{git.prefix}{rel_path}") if git else None
+            )
+            marker = " [binary]" if binary else ""
+            result.tree_lines.append(f"{tree_prefix}{connector}{entry.name}{marker}")
+            result.table.append(rel_prefix, entry.name, stat.st_size, stat.st_mtime_ns, binary, git_oid)
+
+    def _render_paths(self, result: WalkResult, tree_lines: List[str]) -> int:
+        """Render a tree from a result's flat path lists, returning the number of directories."""
+        root: Dict = {}
+
+        def directory(parts: List[str]) -> Dict:
+            node = root
+            for part in parts:
+                node = node.setdefault(part + '/', {})
+            return node
+
+        for rel_dir in result.dirs:
+            directory(rel_dir.split('/'))
+        for rel_dir in result.denied:
+            directory(rel_dir.split('/') if rel_dir else [])[PERMISSION_DENIED] = None
+        for rel_path in result.other_paths:
+            parts = rel_path.split('/')
+            directory(parts[:-1])[parts[-1]] = None
+        for entry in result.files:
+            parts = entry.path.split('/')
+            directory(parts[:-1])[parts[-1]] = entry
+
+        dir_count = 0
+
+        def render(node: Dict, prefix: str):
+            nonlocal dir_count
+            names = sorted(node, key=lambda name: (not name.endswith('/'), name.lower()))
+            for i, name in enumerate(names):
+                is_last = i == len(names) - 1
+                connector = "└── " if is_last else "├── "
+                child = node[name]
+                if isinstance(child, dict):
+                    dir_count += 1
+                    tree_lines.append(f"{prefix}{connector}{name}")
+                    render(child, prefix + ("    " if is_last else "│   "))
+                else:
+                    marker = " [binary]" if child is not None and child.binary else ""
+                    tree_lines.append(f"{prefix}{connector}{name}{marker}")
+
+        render(root, "")
+        return dir_count